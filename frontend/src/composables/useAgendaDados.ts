@@ -6,11 +6,11 @@ export function useAgendaDados(dataSelecionada: Ref<string>) {
   const appStore = useAppStore()
 
   watch(dataSelecionada, async (novaData) => {
-    await appStore.fetchAgendamentos(novaData, novaData)
+    await appStore.sincronizarAgendamentos(novaData, novaData)
   }, {immediate: true})
 
   const recarregarDados = async () => {
-    await appStore.fetchAgendamentos(dataSelecionada.value, dataSelecionada.value)
+    await appStore.sincronizarAgendamentos(dataSelecionada.value, dataSelecionada.value)
   }
 
   const agendamentosDoDia = computed(() => {
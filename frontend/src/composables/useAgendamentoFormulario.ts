@@ -31,6 +31,7 @@ export function useAgendamentoFormulario() {
   const dataSelecionada = ref('')
   const horarioInicio = ref('')
   const encaixe = ref(false)
+  const excedeCapacidade = ref(false)
   const observacoes = ref('')
 
   const tipoAgendamento = ref<TipoAgendamento>('infusao')
@@ -247,6 +248,7 @@ export function useAgendamentoFormulario() {
 
   const preValidarAgendamento = (vagasInfo: { full: boolean, label?: string, blocked?: boolean }) => {
     listaAvisos.value = []
+    excedeCapacidade.value = false
 
     if (!pacienteSelecionado.value || !dataSelecionada.value || !horarioInicio.value) {
       toast.error('Preencha todos os campos obrigatórios')
@@ -271,7 +273,8 @@ export function useAgendamentoFormulario() {
     }
 
     if (vagasInfo.full && !vagasInfo.blocked) {
-      listaAvisos.value.push(`A capacidade para "${vagasInfo.label}" está esgotada neste dia.`)
+      excedeCapacidade.value = true
+      listaAvisos.value.push(`A capacidade para "${vagasInfo.label}" está esgotada neste dia. O agendamento será registrado como encaixe.`)
     }
 
     const agendamentosDia = appStore.getAgendamentosDoDia(dataSelecionada.value)
@@ -339,7 +342,8 @@ export function useAgendamentoFormulario() {
         horarioInicio: horarioInicio.value,
         horarioFim: horarioFimCalculado.value || appStore.parametros.horarioFechamento,
         status: 'agendado',
-        encaixe: encaixe.value,
+        // O servidor recusa agendamentos acima da capacidade que não sejam encaixe
+        encaixe: encaixe.value || excedeCapacidade.value,
         observacoes: observacoes.value,
         detalhes: detalhes,
         prescricao: tipoAgendamento.value === 'infusao' ? prescricaoAtual.value : undefined
@@ -0,0 +1,154 @@
+import {onMounted, onUnmounted, ref, watch, type Ref} from 'vue'
+import {useDocumentVisibility} from '@vueuse/core'
+import api from '@/services/api'
+
+interface EventosAgendamentoOptions {
+  intervaloRetry?: number
+  condicoesPausa?: Array<() => boolean>
+}
+
+const TIPOS_EVENTO = [
+  'agendamento_criado',
+  'agendamento_atualizado',
+  'agendamento_remarcado',
+  'poltronas_realocadas',
+  'prescricao_trocada',
+  'reconexao'
+]
+
+const ESPERA_RECONEXAO_INICIAL = 1000
+const ESPERA_RECONEXAO_MAXIMA = 30000
+
+// Recarrega a tela quando o servidor avisa que algo mudou no dia, em vez de consultar em intervalos fixos.
+// EventSource não envia o cabeçalho Authorization, então cada conexão pede antes um token curto de stream.
+export function useEventosAgendamento(
+    dataSelecionada: Ref<string>,
+    fetchFunction: () => Promise<void>,
+    options: EventosAgendamentoOptions = {}
+) {
+  const {
+    intervaloRetry = 2500,
+    condicoesPausa = []
+  } = options
+
+  const conectado = ref(false)
+  const isTabVisible = useDocumentVisibility()
+
+  let fonte: EventSource | null = null
+  let pendente = false
+  let ativo = false
+  let esperaReconexao = ESPERA_RECONEXAO_INICIAL
+  let timerReconexao: ReturnType<typeof setTimeout> | null = null
+  let timerRetry: ReturnType<typeof setTimeout> | null = null
+
+  const isUserTyping = () => {
+    const active = document.activeElement
+    return active && (
+      active.tagName === 'INPUT' ||
+      active.tagName === 'TEXTAREA' ||
+      active.tagName === 'SELECT'
+    )
+  }
+
+  const isBlocked = () => {
+    if (isTabVisible.value === 'hidden') return true
+    if (isUserTyping()) return true
+    return condicoesPausa.some(cond => cond())
+  }
+
+  const recarregar = async () => {
+    if (timerRetry) {
+      clearTimeout(timerRetry)
+      timerRetry = null
+    }
+    if (isBlocked()) {
+      // A alteração fica pendente até o usuário terminar o que está fazendo.
+      pendente = true
+      timerRetry = setTimeout(recarregar, intervaloRetry)
+      return
+    }
+
+    pendente = false
+    try {
+      await fetchFunction()
+    } catch (error) {
+      console.error('Erro ao recarregar após evento:', error)
+    }
+  }
+
+  const fechar = () => {
+    if (fonte) {
+      fonte.close()
+      fonte = null
+    }
+    conectado.value = false
+  }
+
+  const agendarReconexao = () => {
+    fechar()
+    if (!ativo || timerReconexao) return
+    timerReconexao = setTimeout(() => {
+      timerReconexao = null
+      conectar()
+    }, esperaReconexao)
+    esperaReconexao = Math.min(esperaReconexao * 2, ESPERA_RECONEXAO_MAXIMA)
+  }
+
+  const conectar = async () => {
+    fechar()
+    if (!ativo) return
+
+    let token: string
+    try {
+      const {data} = await api.post('/api/agendamentos/stream/token')
+      token = data.token
+    } catch (error) {
+      console.error('Erro ao obter token do stream:', error)
+      agendarReconexao()
+      return
+    }
+    if (!ativo) return
+
+    const url = api.getUri({url: '/api/agendamentos/stream', params: {data: dataSelecionada.value, token}})
+    fonte = new EventSource(url)
+
+    fonte.onopen = () => {
+      const reconectando = esperaReconexao > ESPERA_RECONEXAO_INICIAL
+      conectado.value = true
+      esperaReconexao = ESPERA_RECONEXAO_INICIAL
+      // Eventos emitidos enquanto a conexão esteve fora não chegam: recarrega ao voltar.
+      if (reconectando) recarregar()
+    }
+    // O token do stream expira logo; a reconexão automática do EventSource falharia, então reabrimos com outro.
+    fonte.onerror = () => agendarReconexao()
+    TIPOS_EVENTO.forEach(tipo => fonte?.addEventListener(tipo, () => recarregar()))
+  }
+
+  watch(dataSelecionada, () => {
+    if (ativo) conectar()
+  })
+
+  watch(isTabVisible, (visibilidade) => {
+    if (visibilidade === 'visible' && pendente) recarregar()
+  })
+
+  const start = () => {
+    ativo = true
+    esperaReconexao = ESPERA_RECONEXAO_INICIAL
+    conectar()
+  }
+
+  const stop = () => {
+    ativo = false
+    if (timerReconexao) clearTimeout(timerReconexao)
+    if (timerRetry) clearTimeout(timerRetry)
+    timerReconexao = null
+    timerRetry = null
+    fechar()
+  }
+
+  onMounted(() => start())
+  onUnmounted(() => stop())
+
+  return {conectado, start, stop}
+}
@@ -9,6 +9,22 @@ const api = axios.create({
   }
 })
 
+// Respostas GET com ETag ficam guardadas para revalidação via If-None-Match;
+// um 304 devolve o corpo guardado sem que o servidor precise montar a listagem de novo.
+const LIMITE_CACHE_ETAG = 50
+const cacheEtag = new Map<string, { etag: string, data: any }>()
+
+const chaveCacheEtag = (config: any) => api.getUri(config)
+
+const guardarEtag = (chave: string, etag: string, data: any) => {
+  cacheEtag.delete(chave)
+  cacheEtag.set(chave, {etag, data: structuredClone(data)})
+  if (cacheEtag.size > LIMITE_CACHE_ETAG) {
+    const maisAntiga = cacheEtag.keys().next().value
+    if (maisAntiga !== undefined) cacheEtag.delete(maisAntiga)
+  }
+}
+
 let isRefreshing = false
 let failedQueue: any[] = []
 
@@ -30,13 +46,40 @@ api.interceptors.request.use((config) => {
   if (token) {
     config.headers.Authorization = `Bearer ${token}`
   }
+
+  if ((config.method ?? 'get').toLowerCase() === 'get') {
+    const guardado = cacheEtag.get(chaveCacheEtag(config))
+    if (guardado) {
+      config.headers['If-None-Match'] = guardado.etag
+    }
+    config.validateStatus = (status: number) => (status >= 200 && status < 300) || status === 304
+  }
   return config
 }, (error) => {
   return Promise.reject(error)
 })
 
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    if ((response.config.method ?? 'get').toLowerCase() !== 'get') return response
+
+    const chave = chaveCacheEtag(response.config)
+    if (response.status === 304) {
+      const guardado = cacheEtag.get(chave)
+      if (guardado) {
+        return {...response, status: 200, data: structuredClone(guardado.data)}
+      }
+      return response
+    }
+
+    const etag = response.headers['etag']
+    if (etag) {
+      guardarEtag(chave, etag, response.data)
+    } else {
+      cacheEtag.delete(chave)
+    }
+    return response
+  },
   async (error) => {
     const originalRequest = error.config
     const authStore = useAuthStore()
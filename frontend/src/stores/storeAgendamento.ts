@@ -2,10 +2,11 @@ import {defineStore} from 'pinia'
 import {ref} from 'vue'
 import api from '@/services/api'
 import {toast} from 'vue-sonner'
-import {Agendamento, AgendamentoStatusEnum, FarmaciaStatusEnum} from "@/types/typesAgendamento.ts";
+import {Agendamento, AgendamentoStatusEnum, AgendamentoSync, FarmaciaStatusEnum} from "@/types/typesAgendamento.ts";
 
 export const useAgendamentoStore = defineStore('agendamento', () => {
   const agendamentos = ref<Agendamento[]>([])
+  const cursorSincronizacao = ref<{ chave: string, cursor: number } | null>(null)
 
   function getAgendamentosDoDia(data: string) {
     return agendamentos.value.filter(a => a.data === data)
@@ -28,6 +29,7 @@ export const useAgendamentoStore = defineStore('agendamento', () => {
         return dadosRetornados
       } else {
         agendamentos.value = dadosRetornados
+        cursorSincronizacao.value = null
       }
 
     } catch (e) {
@@ -36,6 +38,29 @@ export const useAgendamentoStore = defineStore('agendamento', () => {
     }
   }
 
+  async function sincronizarAgendamentos(inicio: string, fim: string) {
+    try {
+      const chave = `${inicio}|${fim}`
+      const params: any = {data_inicio: inicio, data_fim: fim}
+      if (cursorSincronizacao.value?.chave === chave) params.since = cursorSincronizacao.value.cursor
+
+      const res = await api.get('/api/agendamentos/sync', {params})
+      const {cursor, completo, agendamentos: alterados, removidos} = res.data as AgendamentoSync
+
+      if (completo) {
+        agendamentos.value = alterados
+      } else if (alterados.length || removidos.length) {
+        const idsSubstituidos = new Set([...removidos, ...alterados.map(a => a.id)])
+        agendamentos.value = [...agendamentos.value.filter(a => !idsSubstituidos.has(a.id)), ...alterados]
+      }
+
+      cursorSincronizacao.value = {chave, cursor}
+    } catch (e) {
+      console.error(e)
+      toast.error("Erro ao buscar agendamentos")
+    }
+  }
+
   async function adicionarAgendamento(agendamento: any) {
     try {
       const res = await api.post('/api/agendamentos', agendamento)
@@ -51,6 +76,30 @@ export const useAgendamentoStore = defineStore('agendamento', () => {
     }
   }
 
+  async function agendarCiclo(payload: {
+    prescricaoId: string,
+    dataInicio: string,
+    horarioInicio: string,
+    horarioFim?: string,
+    encaixe?: boolean,
+    observacoes?: string
+  }) {
+    try {
+      const res = await api.post('/api/agendamentos/ciclo', payload)
+      agendamentos.value.push(...res.data.agendamentos)
+      return res.data.agendamentos as Agendamento[]
+    } catch (e: any) {
+      const detail = e.response?.data?.detail
+      if (e.response?.status === 409 && detail?.conflitos) {
+        const dias = detail.conflitos.map((c: any) => `D${c.diaCiclo}: ${c.motivo}`).join('; ')
+        toast.error(`${detail.mensagem} ${dias}`)
+      } else {
+        toast.error(detail || "Erro ao agendar ciclo")
+      }
+      throw e
+    }
+  }
+
   async function atualizarCheckin(id: string, checkin: boolean) {
     try {
       const res = await api.put(`/api/agendamentos/${id}`, {checkin})
@@ -253,7 +302,9 @@ export const useAgendamentoStore = defineStore('agendamento', () => {
     agendamentos,
     getAgendamentosDoDia,
     fetchAgendamentos,
+    sincronizarAgendamentos,
     adicionarAgendamento,
+    agendarCiclo,
     atualizarCheckin,
     atualizarStatusAgendamento,
     atualizarStatusFarmacia,
@@ -39,7 +39,8 @@ export const useConfiguracaoStore = defineStore('configuracao', () => {
       infusao_longo: 4,
       infusao_extra_longo: 4,
       consultas: 10,
-      procedimentos: 10
+      procedimentos: 10,
+      poltronas: 0
     },
     tags: [],
     cargos: [],
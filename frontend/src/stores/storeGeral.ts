@@ -48,6 +48,7 @@ export const useAppStore = defineStore('app', () => {
     adicionarPrescricao,
     adicionarPrescricaoSubstituicao,
     baixarPrescricao,
+    baixarPrescricoesDoDia,
     alterarStatusPrescricao,
     substituirPrescricao,
   } = prescricaoStore
@@ -55,7 +56,9 @@ export const useAppStore = defineStore('app', () => {
   const {
     getAgendamentosDoDia,
     fetchAgendamentos,
+    sincronizarAgendamentos,
     adicionarAgendamento,
+    agendarCiclo,
     atualizarCheckin,
     atualizarStatusAgendamento,
     atualizarStatusFarmacia,
@@ -90,10 +93,12 @@ export const useAppStore = defineStore('app', () => {
     carregarPaciente,
     buscarPacientesDropdown,
     fetchAgendamentos,
+    sincronizarAgendamentos,
     fetchPrescricoes,
     adicionarPaciente,
     atualizarPaciente,
     adicionarAgendamento,
+    agendarCiclo,
     atualizarCheckin,
     atualizarStatusAgendamento,
     atualizarStatusFarmacia,
@@ -113,6 +118,7 @@ export const useAppStore = defineStore('app', () => {
     adicionarPrescricao,
     adicionarPrescricaoSubstituicao,
     baixarPrescricao,
+    baixarPrescricoesDoDia,
     alterarStatusPrescricao,
     substituirPrescricao,
   }
@@ -5,6 +5,7 @@ import {toast} from 'vue-sonner'
 import {
   BlocoPrescricao,
   PacienteSnapshot,
+  PendenciaCiclo,
   PrescricaoMedica,
   PrescricaoStatusEnum,
   ProtocoloRef
@@ -21,6 +22,7 @@ interface PayloadCriacaoPrescricao {
 
 export const usePrescricaoStore = defineStore('prescricao', () => {
   const prescricoes = ref<PrescricaoMedica[]>([])
+  const pendencias = ref<PendenciaCiclo[]>([])
 
   const atualizarLocal = (prescricaoAtualizada: PrescricaoMedica) => {
     const idx = prescricoes.value.findIndex(p => p.id === prescricaoAtualizada.id)
@@ -44,6 +46,17 @@ export const usePrescricaoStore = defineStore('prescricao', () => {
     }
   }
 
+  async function fetchPendencias(dataLimite?: string) {
+    try {
+      const res = await api.get('/api/prescricoes/pendencias', {
+        params: dataLimite ? {data_limite: dataLimite} : {}
+      })
+      pendencias.value = res.data
+    } catch (e) {
+      console.error(e)
+    }
+  }
+
   async function adicionarPrescricao(payload: PayloadCriacaoPrescricao) {
     try {
       const res = await api.post('/api/prescricoes', payload)
@@ -100,6 +113,22 @@ export const usePrescricaoStore = defineStore('prescricao', () => {
     }
   }
 
+  async function baixarPrescricoesDoDia(data: string) {
+    toast.info('Gerando PDF das prescrições do dia...');
+    try {
+      const res = await api.get('/api/prescricoes/pdf-lote', {params: {data}, responseType: 'blob'});
+      const url = window.URL.createObjectURL(res.data);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `prescricoes_${data}.pdf`;
+      link.click();
+      window.URL.revokeObjectURL(url);
+    } catch (e) {
+      toast.error("Erro ao gerar PDF das prescrições do dia.");
+      console.error(e);
+    }
+  }
+
   async function alterarStatusPrescricao(id: string, status: PrescricaoStatusEnum, motivo?: string) {
     try {
       const payload: any = {status}
@@ -135,11 +164,14 @@ export const usePrescricaoStore = defineStore('prescricao', () => {
 
   return {
     prescricoes,
+    pendencias,
     getPrescricoesPorPaciente,
     fetchPrescricoes,
+    fetchPendencias,
     adicionarPrescricao,
     adicionarPrescricaoSubstituicao,
     baixarPrescricao,
+    baixarPrescricoesDoDia,
     alterarStatusPrescricao,
     substituirPrescricao
   }
@@ -116,11 +116,18 @@ export interface Agendamento {
   checkin: boolean;
   status: AgendamentoStatusEnum;
   encaixe: boolean;
+  poltrona?: number | null;
   observacoes?: string;
   tags?: string[];
   detalhes?: DetalhesAgendamento;
   prescricao?: PrescricaoMedica;
-  historicoAlteracoes?: AgendamentoHistoricoItem[];
+}
+
+export interface AgendamentoSync {
+  cursor: number;
+  completo: boolean;
+  agendamentos: Agendamento[];
+  removidos: string[];
 }
 
 export interface FiltrosAgenda {
@@ -9,6 +9,7 @@ export interface ParametrosAgendamento {
     infusao_extra_longo: number;
     consultas: number;
     procedimentos: number;
+    poltronas?: number;
   };
   tags: string[];
   cargos: string[];
@@ -106,6 +106,11 @@ export interface PrescricaoHistoricoAgendamentoItem {
   observacoes?: string;
 }
 
+export interface PrescricaoHistorico {
+  historicoStatus: PrescricaoStatusHistoricoItem[];
+  historicoAgendamentos: PrescricaoHistoricoAgendamentoItem[];
+}
+
 export interface PrescricaoMedica {
   id: string;
   pacienteId: string;
@@ -113,8 +118,19 @@ export interface PrescricaoMedica {
   dataEmissao: string;
   status: PrescricaoStatusEnum;
   conteudo: ConteudoPrescricao;
-  historicoStatus?: PrescricaoStatusHistoricoItem[];
-  historicoAgendamentos?: PrescricaoHistoricoAgendamentoItem[];
+  diasComMedicacao?: number[];
   prescricaoSubstitutaId?: string | null;
   prescricaoOriginalId?: string | null;
 }
+
+export interface PendenciaCiclo {
+  prescricaoId: string;
+  diaCiclo: number;
+  dataPrevista: string;
+  atrasada: boolean;
+  pacienteId: string;
+  pacienteNome: string;
+  pacienteRegistro?: string | null;
+  protocolo?: string | null;
+  statusPrescricao: PrescricaoStatusEnum;
+}
@@ -4,7 +4,7 @@ from typing import Optional, Dict, Union
 
 import jwt
 from dotenv import load_dotenv
-from fastapi import HTTPException, Security, Depends
+from fastapi import HTTPException, Security, Depends, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -20,6 +20,8 @@ class AuthHandler:
     secret = os.getenv("JWT_SECRET")
     exp_time = int(os.getenv("JWT_EXP_MINUTES")) * 60
     algorithm = "HS256"
+    # EventSource não envia cabeçalhos: o stream recebe na URL um token próprio, de vida curta.
+    exp_time_stream = 60
 
     def encode_token(self, user_id: str, claims: Optional[Dict] = None) -> str:
         payload = {
@@ -34,19 +36,39 @@ class AuthHandler:
 
         return jwt.encode(payload, self.secret, algorithm=self.algorithm)
 
+    def encode_token_stream(self, user_id: str) -> str:
+        payload = {
+            "sub": user_id,
+            "exp": time.time() + self.exp_time_stream,
+            "iat": time.time(),
+            "type": "stream"
+        }
+        return jwt.encode(payload, self.secret, algorithm=self.algorithm)
+
+    def _decodificar(self, actual_token: str) -> Dict:
+        try:
+            return jwt.decode(actual_token, self.secret, algorithms=[self.algorithm])
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token expirado")
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401, detail="Token inválido")
+
     def decode_token(self, token: Union[HTTPAuthorizationCredentials, str] = Security(security)) -> Dict:
         if hasattr(token, "credentials"):
             actual_token = token.credentials
         else:
             actual_token = str(token)
 
-        try:
-            payload = jwt.decode(actual_token, self.secret, algorithms=[self.algorithm])
-            return payload
-        except jwt.ExpiredSignatureError:
-            raise HTTPException(status_code=401, detail="Token expirado")
-        except jwt.InvalidTokenError:
+        payload = self._decodificar(actual_token)
+        if payload.get("type") == "stream":
+            raise HTTPException(status_code=401, detail="Token inválido")
+        return payload
+
+    def decode_token_stream(self, token: str = Query(...)) -> Dict:
+        payload = self._decodificar(token)
+        if payload.get("type") != "stream":
             raise HTTPException(status_code=401, detail="Token inválido")
+        return payload
 
     async def get_current_user(
             self,
@@ -1,24 +1,73 @@
+import asyncio
+import json
 import uuid
-from datetime import date, datetime
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Dict, Callable, Awaitable, AsyncIterator, Iterable, Tuple
 
 from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.attributes import flag_modified
 
-from src.models.agendamento_model import Agendamento
+from src.models.agendamento_model import Agendamento, INDICE_DIA_CICLO_ATIVO
 from src.providers.interfaces.agendamento_provider_interface import AgendamentoProviderInterface
+from src.providers.interfaces.configuracao_provider_interface import ConfiguracaoProviderInterface
 from src.providers.interfaces.prescricao_provider_interface import PrescricaoProviderInterface
+from src.providers.interfaces.protocolo_provider_interface import ProtocoloProviderInterface
 from src.controllers import prescricao_controller
 from src.schemas.agendamento_schema import AgendamentoCreate, AgendamentoUpdate, AgendamentoResponse, TipoAgendamento, \
     AgendamentoBulkUpdateList, AgendamentoPrescricaoUpdate, AgendamentoStatusEnum, FarmaciaStatusEnum, \
-    AgendamentoRemarcacaoLoteRequest, AgendamentoRemarcacaoRequest
+    AgendamentoRemarcacaoLoteRequest, AgendamentoRemarcacaoRequest, AgendamentoSyncResponse, \
+    AgendamentoNormalizadoItem, AgendamentoListaNormalizadaResponse, AgendamentoGridResponse, VisaoAgendaEnum, \
+    OcupacaoResponse, OcupacaoDia, ResumoCalendarioResponse, ResumoCalendarioDia, AgendamentoHistoricoItem, \
+    AgendamentoCicloCreate, AgendamentoCicloResponse, ConflitoCiclo, DetalhesAgendamento, DetalhesInfusao, \
+    SugestoesCicloResponse, AlocacaoPoltronasResponse, PoltronaAlocacao
 from src.schemas.prescricao_schema import PrescricaoResponse
+from src.services import agendador_service, auditoria_service, etag_service, ocupacao_service, poltronas_service
+from src.services.cache_diario_service import criar_cache_diario
+from src.services.eventos_service import eventos_agendamento
+
+INTERVALO_HEARTBEAT_SEGUNDOS = 15
+LIMITE_DIAS_OCUPACAO = 93
+
+cache_resumo_calendario = criar_cache_diario()
+
+# Alterações nesses campos podem colocar o agendamento por cima de outro do mesmo paciente.
+# O status só conta quando o agendamento volta a ocupar a agenda (ver _mudanca_de_periodo); avançar no fluxo
+# do dia (check-in, triagem, infusão...) não pode esbarrar em sobreposições que já existem.
+CAMPOS_PERIODO = {"data", "horario_inicio", "horario_fim"}
+
+
+def _mudanca_de_periodo(update_data: dict, status_anterior: str, status_atual: str) -> Tuple[bool, bool]:
+    # (checar sobreposição, realocar poltronas)
+    ocupava = status_anterior not in ocupacao_service.STATUS_FORA_DA_CAPACIDADE
+    ocupa = status_atual not in ocupacao_service.STATUS_FORA_DA_CAPACIDADE
+    reposicionado = bool(CAMPOS_PERIODO.intersection(update_data)) or (ocupa and not ocupava)
+    return reposicionado, reposicionado or ocupava != ocupa
+
+
+@asynccontextmanager
+async def _unicidade_dia_ciclo(dia_ciclo: Optional[int] = None):
+    # A unicidade é garantida pelo índice parcial; aqui só se traduz a violação.
+    try:
+        yield
+    except IntegrityError as e:
+        if INDICE_DIA_CICLO_ATIVO not in str(e.orig):
+            raise
+        dia = f"o Dia {dia_ciclo}" if dia_ciclo else "este dia do ciclo"
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Já existe um agendamento ativo para {dia} desta prescrição. Use a remarcação se necessário."
+        )
+
 
 def _aplicar_regras_atualizacao(
         agendamento: Agendamento,
         update_data: dict,
         usuario_id: str,
         usuario_nome: str,
+        eventos: List[dict],
 ) -> str:
     if 'tipo' in update_data:
         if update_data['tipo'] != agendamento.tipo:
@@ -110,44 +159,34 @@ def _aplicar_regras_atualizacao(
     if 'detalhes' in update_data:
         flag_modified(agendamento, "detalhes")
 
-    historico_alteracoes = list(agendamento.historico_alteracoes or [])
     if 'status' in update_data and update_data['status'] != status_anterior:
-        historico_alteracoes.append({
-            "data": datetime.now().isoformat(),
-            "usuario_id": usuario_id,
-            "usuario_nome": usuario_nome,
-            "tipo_alteracao": "status",
-            "campo": "status",
-            "valor_antigo": status_anterior,
-            "valor_novo": update_data['status']
-        })
+        eventos.append(auditoria_service.evento_alteracao_agendamento(
+            agendamento.id, "status", usuario_id, usuario_nome,
+            valor_antigo=status_anterior,
+            valor_novo=update_data['status'],
+            campo="status"
+        ))
 
     if 'checkin' in update_data and update_data['checkin'] != checkin_anterior:
-        historico_alteracoes.append({
-            "data": datetime.now().isoformat(),
-            "usuario_id": usuario_id,
-            "usuario_nome": usuario_nome,
-            "tipo_alteracao": "checkin",
-            "campo": "checkin",
-            "valor_antigo": str(checkin_anterior),
-            "valor_novo": str(update_data['checkin'])
-        })
+        eventos.append(auditoria_service.evento_alteracao_agendamento(
+            agendamento.id, "checkin", usuario_id, usuario_nome,
+            valor_antigo=str(checkin_anterior),
+            valor_novo=str(update_data['checkin']),
+            campo="checkin"
+        ))
 
     if agendamento.tipo == TipoAgendamento.INFUSAO.value and 'detalhes' in update_data:
         status_farmacia_novo = agendamento.detalhes.get('infusao', {}).get('status_farmacia')
 
         if (status_farmacia_anterior and status_farmacia_novo and
                 status_farmacia_anterior != status_farmacia_novo):
-            historico_alteracoes.append({
-                "data": datetime.now().isoformat(),
-                "usuario_id": usuario_id,
-                "usuario_nome": usuario_nome,
-                "tipo_alteracao": "status_farmacia",
-                "campo": "status_farmacia",
-                "valor_antigo": status_farmacia_anterior,
-                "valor_novo": status_farmacia_novo,
-                "motivo": "Alteração automática por check-in/status" if status_farmacia_novo == 'pendente' and status_farmacia_anterior == 'agendado' else None
-            })
+            eventos.append(auditoria_service.evento_alteracao_agendamento(
+                agendamento.id, "status_farmacia", usuario_id, usuario_nome,
+                valor_antigo=status_farmacia_anterior,
+                valor_novo=status_farmacia_novo,
+                campo="status_farmacia",
+                motivo="Alteração automática por check-in/status" if status_farmacia_novo == 'pendente' and status_farmacia_anterior == 'agendado' else None
+            ))
 
     if 'detalhes' in update_data and prescricao_id_anterior:
         prescricao_id_nova = agendamento.detalhes.get('infusao', {}).get('prescricao_id')
@@ -166,78 +205,96 @@ def _aplicar_regras_atualizacao(
             agendamento.detalhes = detalhes
             flag_modified(agendamento, "detalhes")
 
-            historico_alteracoes.append({
-                "data": datetime.now().isoformat(),
-                "usuario_id": usuario_id,
-                "usuario_nome": usuario_nome,
-                "tipo_alteracao": "prescricao",
-                "campo": "prescricao_id",
-                "valor_antigo": prescricao_id_anterior,
-                "valor_novo": prescricao_id_nova,
-                "motivo": "Substituição manual"
-            })
-
-    if historico_alteracoes:
-        agendamento.historico_alteracoes = historico_alteracoes
-        flag_modified(agendamento, "historico_alteracoes")
+            eventos.append(auditoria_service.evento_alteracao_agendamento(
+                agendamento.id, "prescricao", usuario_id, usuario_nome,
+                valor_antigo=prescricao_id_anterior,
+                valor_novo=prescricao_id_nova,
+                campo="prescricao_id",
+                motivo="Substituição manual"
+            ))
 
     return prescricao_id_anterior
 
 
+async def _publicar_evento(tipo: str, agendamentos: List[Agendamento], datas_anteriores: Iterable[date] = ()):
+    # datas_anteriores cobre agendamentos movidos de dia, para que quem acompanha o dia antigo também seja avisado.
+    datas = {ag.data for ag in agendamentos if ag.data} | set(datas_anteriores)
+    try:
+        await eventos_agendamento.publicar({
+            "tipo": tipo,
+            "ids": [ag.id for ag in agendamentos],
+            "datas": sorted(d.isoformat() for d in datas),
+        })
+    except Exception as e:
+        print(f"Erro ao publicar evento '{tipo}': {e}")
+
+
+async def stream_eventos_agendamento(
+        esta_desconectado: Callable[[], Awaitable[bool]],
+        data: Optional[date] = None
+) -> AsyncIterator[str]:
+    fila = eventos_agendamento.assinar()
+    try:
+        yield "retry: 5000\n\n"
+        while not await esta_desconectado():
+            try:
+                evento = await asyncio.wait_for(fila.get(), timeout=INTERVALO_HEARTBEAT_SEGUNDOS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+
+            if evento is None:
+                break
+            # Sem "datas" (reconexão do LISTEN), o evento vale para qualquer dia.
+            if data and "datas" in evento and data.isoformat() not in evento["datas"]:
+                continue
+            yield f"event: {evento['tipo']}\ndata: {json.dumps(evento)}\n\n"
+    finally:
+        eventos_agendamento.cancelar_assinatura(fila)
+
+
 def _calcular_novo_fim(inicio_original: str, fim_original: str, novo_inicio: str) -> str:
-    formato = "%H:%M"
     try:
-        t_inicio_orig = datetime.strptime(inicio_original, formato)
-        t_fim_orig = datetime.strptime(fim_original, formato)
-        duracao = t_fim_orig - t_inicio_orig
-        t_novo_inicio = datetime.strptime(novo_inicio, formato)
-        t_novo_fim = t_novo_inicio + duracao
-        return t_novo_fim.strftime(formato)
-    except Exception:
+        duracao = ocupacao_service.minutos_do_horario(fim_original) - ocupacao_service.minutos_do_horario(inicio_original)
+        novo_fim = ocupacao_service.minutos_do_horario(novo_inicio) + duracao
+    except (ValueError, AttributeError):
         return fim_original
+    # A coluna é TIME: o término não pode virar o dia.
+    return ocupacao_service.horario_dos_minutos(min(novo_fim, ocupacao_service.ULTIMO_MINUTO_DIA))
 
 
-async def _executar_remarcacao_atomica(
-        provider: AgendamentoProviderInterface,
-        prescricao_provider: PrescricaoProviderInterface,
+def _valores_original_remarcado(
         original: Agendamento,
         nova_data: date,
-        novo_horario: str,
-        motivo: str,
-        usuario_id: str,
-        usuario_nome: str
-) -> Agendamento:
+        motivo: str
+) -> dict:
     detalhes_originais = dict(original.detalhes) if original.detalhes else {}
     detalhes_originais['remarcacao'] = {
         "motivo_remarcacao": motivo,
         "nova_data": nova_data.isoformat()
     }
 
-    status_original = original.status
-    original.status = AgendamentoStatusEnum.REMARCADO
-    original.detalhes = detalhes_originais
-    historico = list(original.historico_alteracoes or [])
-    historico.append({
-        "data": datetime.now().isoformat(),
-        "usuario_id": usuario_id,
-        "usuario_nome": usuario_nome,
-        "tipo_alteracao": "status",
-        "valor_antigo": status_original,
-        "valor_novo": AgendamentoStatusEnum.REMARCADO,
-        "motivo": f"Remarcado para {nova_data}"
-    })
-    original.historico_alteracoes = historico
+    return {
+        "id": original.id,
+        "status": AgendamentoStatusEnum.REMARCADO.value,
+        "detalhes": detalhes_originais,
+        "poltrona": None
+    }
 
-    flag_modified(original, "detalhes")
-    flag_modified(original, "historico_alteracoes")
-    await provider.atualizar_agendamento(original, commit=False)
 
+def _valores_clone_remarcacao(
+        original: Agendamento,
+        nova_data: date,
+        novo_horario: str,
+        motivo: str,
+        usuario_id: str
+) -> dict:
     novo_horario_fim = _calcular_novo_fim(
         original.horario_inicio,
         original.horario_fim,
         novo_horario
     )
-    novos_detalhes = dict(original.detalhes)
+    novos_detalhes = dict(original.detalhes) if original.detalhes else {}
     if original.tipo == TipoAgendamento.INFUSAO.value:
         if 'remarcacao' in novos_detalhes: del novos_detalhes['remarcacao']
         if 'cancelamento' in novos_detalhes: del novos_detalhes['cancelamento']
@@ -245,56 +302,101 @@ async def _executar_remarcacao_atomica(
         if 'intercorrencia' in novos_detalhes: del novos_detalhes['intercorrencia']
 
         infusao = novos_detalhes.get('infusao', {}).copy()
-        infusao['status_farmacia'] = FarmaciaStatusEnum.PENDENTE
+        infusao['status_farmacia'] = FarmaciaStatusEnum.PENDENTE.value
         infusao['itens_preparados'] = []
         infusao['horario_previsao_entrega'] = None
         novos_detalhes['infusao'] = infusao
 
-    novo_agendamento = Agendamento(
-        id=str(uuid.uuid4()),
-        paciente_id=original.paciente_id,
-        tipo=original.tipo,
-        data=nova_data,
-        turno='manha' if int(novo_horario.split(':')[0]) < 13 else 'tarde',
-        horario_inicio=novo_horario,
-        horario_fim=novo_horario_fim,
-        checkin=False,
-        status=AgendamentoStatusEnum.AGENDADO,
-        encaixe=original.encaixe,
-        observacoes=f"Remarcado de {original.data.strftime('%d/%m/%Y')}. Motivo: {motivo}",
-        tags=original.tags,
-        detalhes=novos_detalhes,
-        criado_por_id=usuario_id
-    )
-    criado = await provider.criar_agendamento(novo_agendamento, commit=False)
+    return {
+        "id": str(uuid.uuid4()),
+        "paciente_id": original.paciente_id,
+        "tipo": original.tipo,
+        "data": nova_data,
+        "turno": 'manha' if int(novo_horario.split(':')[0]) < 13 else 'tarde',
+        "horario_inicio": novo_horario,
+        "horario_fim": novo_horario_fim,
+        "checkin": False,
+        "status": AgendamentoStatusEnum.AGENDADO.value,
+        "encaixe": original.encaixe,
+        "observacoes": f"Remarcado de {original.data.strftime('%d/%m/%Y')}. Motivo: {motivo}",
+        "tags": original.tags,
+        "detalhes": novos_detalhes,
+        "criado_por_id": usuario_id
+    }
 
-    if original.tipo == TipoAgendamento.INFUSAO.value:
-        prescricao_id = novos_detalhes.get('infusao', {}).get('prescricao_id')
-        if prescricao_id:
-            prescricao = await prescricao_provider.obter_prescricao(prescricao_id)
-            if prescricao:
-                hist_presc = list(prescricao.historico_agendamentos or [])
-                hist_presc.append({
-                    "data": datetime.now().isoformat(),
-                    "agendamento_id": original.id,
-                    "status_agendamento": AgendamentoStatusEnum.REMARCADO,
-                    "usuario_id": usuario_id,
-                    "usuario_nome": usuario_nome,
-                    "observacoes": f"Remarcado para novo agendamento {criado.id}"
-                })
-                hist_presc.append({
-                    "data": datetime.now().isoformat(),
-                    "agendamento_id": criado.id,
-                    "status_agendamento": AgendamentoStatusEnum.AGENDADO,
-                    "usuario_id": usuario_id,
-                    "usuario_nome": usuario_nome,
-                    "observacoes": f"Gerado a partir de remarcação de {original.id}"
-                })
-                prescricao.historico_agendamentos = hist_presc
-                flag_modified(prescricao, "historico_agendamentos")
-                await prescricao_provider.atualizar_prescricao(prescricao, commit=False)
-
-    return criado
+
+def _eventos_remarcacao(
+        original: Agendamento,
+        clone: dict,
+        nova_data: date,
+        usuario_id: str,
+        usuario_nome: str
+) -> List[dict]:
+    eventos = [auditoria_service.evento_alteracao_agendamento(
+        original.id, "status", usuario_id, usuario_nome,
+        valor_antigo=original.status,
+        valor_novo=AgendamentoStatusEnum.REMARCADO,
+        motivo=f"Remarcado para {nova_data}"
+    )]
+
+    prescricao_id = clone['detalhes'].get('infusao', {}).get('prescricao_id') \
+        if original.tipo == TipoAgendamento.INFUSAO.value else None
+    if prescricao_id:
+        eventos.append(auditoria_service.evento_agendamento_prescricao(
+            prescricao_id, original.id, AgendamentoStatusEnum.REMARCADO, usuario_id, usuario_nome,
+            f"Remarcado para novo agendamento {clone['id']}"
+        ))
+        eventos.append(auditoria_service.evento_agendamento_prescricao(
+            prescricao_id, clone['id'], AgendamentoStatusEnum.AGENDADO, usuario_id, usuario_nome,
+            f"Gerado a partir de remarcação de {original.id}"
+        ))
+    return eventos
+
+
+async def _executar_remarcacao_atomica(
+        provider: AgendamentoProviderInterface,
+        prescricao_provider: PrescricaoProviderInterface,
+        configuracao_provider: ConfiguracaoProviderInterface,
+        original: Agendamento,
+        nova_data: date,
+        novo_horario: str,
+        motivo: str,
+        usuario_id: str,
+        usuario_nome: str
+) -> Tuple[Agendamento, List[Agendamento]]:
+    valores_clone = _valores_clone_remarcacao(original, nova_data, novo_horario, motivo, usuario_id)
+    await _validar_sobreposicao_paciente(provider, [Agendamento(**valores_clone)], ignorar_ids=[original.id])
+    eventos = _eventos_remarcacao(original, valores_clone, nova_data, usuario_id, usuario_nome)
+
+    valores_original = _valores_original_remarcado(original, nova_data, motivo)
+    for campo, valor in valores_original.items():
+        setattr(original, campo, valor)
+    flag_modified(original, "detalhes")
+    await provider.atualizar_agendamento(original, commit=False)
+
+    async with _unicidade_dia_ciclo():
+        criado = await provider.criar_agendamento(Agendamento(**valores_clone), commit=False)
+    realocados = await _encaixar_poltronas(provider, configuracao_provider, [criado])
+    await provider.registrar_eventos_auditoria(eventos)
+    await prescricao_provider.atualizar_pendencias([_prescricao_id_do_agendamento(original)])
+
+    return criado, realocados
+
+
+async def obter_etag_agendamentos(
+        agendamento_provider: AgendamentoProviderInterface,
+        prescricao_provider: PrescricaoProviderInterface,
+        data_inicio: Optional[date],
+        data_fim: Optional[date],
+        paciente_id: Optional[str],
+        *variantes: str
+) -> str:
+    # As respostas embutem as prescrições, então a versão delas entra junto com a do período.
+    versao_agenda = await agendamento_provider.obter_versao_periodo(data_inicio, data_fim, paciente_id)
+    versao_prescricoes = await prescricao_provider.obter_versao_atual()
+    return etag_service.gerar_etag(
+        "agendamentos", data_inicio, data_fim, paciente_id, *variantes, *versao_agenda, versao_prescricoes
+    )
 
 
 async def listar_agendamentos(
@@ -305,34 +407,452 @@ async def listar_agendamentos(
         paciente_id: Optional[str] = None
 ) -> List[AgendamentoResponse]:
     agendamentos = await agendamento_provider.listar_agendamentos(data_inicio, data_fim, paciente_id)
+    return await _montar_respostas_com_prescricao(prescricao_provider, agendamentos)
+
+
+def _prescricao_id_do_agendamento(agendamento: Agendamento) -> Optional[str]:
+    if agendamento.tipo == TipoAgendamento.INFUSAO.value and agendamento.detalhes:
+        infusao = agendamento.detalhes.get('infusao') or {}
+        return infusao.get('prescricao_id')
+    return None
+
+
+async def _mapear_prescricoes(
+        prescricao_provider: PrescricaoProviderInterface,
+        agendamentos: List[Agendamento]
+) -> Dict[str, PrescricaoResponse]:
+    prescricao_ids = {p_id for p_id in map(_prescricao_id_do_agendamento, agendamentos) if p_id}
+    if not prescricao_ids: return {}
+
+    lista_prescricoes = await prescricao_provider.obter_prescricao_multi(list(prescricao_ids))
+    return {p.id: PrescricaoResponse.model_validate(p) for p in lista_prescricoes}
+
+
+async def _montar_respostas_com_prescricao(
+        prescricao_provider: PrescricaoProviderInterface,
+        agendamentos: List[Agendamento]
+) -> List[AgendamentoResponse]:
+    if not agendamentos: return []
+
+    mapa_prescricoes = await _mapear_prescricoes(prescricao_provider, agendamentos)
+
+    response = []
+    for ag in agendamentos:
+        ag_resp = AgendamentoResponse.model_validate(ag)
+        ag_resp.prescricao = mapa_prescricoes.get(_prescricao_id_do_agendamento(ag))
+        response.append(ag_resp)
+
+    return response
+
+
+async def listar_agendamentos_normalizado(
+        agendamento_provider: AgendamentoProviderInterface,
+        prescricao_provider: PrescricaoProviderInterface,
+        data_inicio: Optional[date],
+        data_fim: Optional[date],
+        paciente_id: Optional[str] = None
+) -> AgendamentoListaNormalizadaResponse:
+    agendamentos = await agendamento_provider.listar_agendamentos(data_inicio, data_fim, paciente_id)
+    mapa_prescricoes = await _mapear_prescricoes(prescricao_provider, agendamentos)
+
+    itens = []
+    for ag in agendamentos:
+        item = AgendamentoNormalizadoItem.model_validate(ag)
+        item.prescricao_id = _prescricao_id_do_agendamento(ag)
+        itens.append(item)
+
+    return AgendamentoListaNormalizadaResponse(agendamentos=itens, prescricoes=mapa_prescricoes)
+
+
+async def listar_agendamentos_resumidos(
+        agendamento_provider: AgendamentoProviderInterface,
+        prescricao_provider: PrescricaoProviderInterface,
+        data_inicio: Optional[date],
+        data_fim: Optional[date],
+        paciente_id: Optional[str] = None,
+        visao: VisaoAgendaEnum = VisaoAgendaEnum.GRID
+) -> List[AgendamentoGridResponse]:
+    tipo = TipoAgendamento.INFUSAO.value if visao == VisaoAgendaEnum.FARMACIA else None
+    agendamentos = await agendamento_provider.listar_agendamentos_resumidos(data_inicio, data_fim, paciente_id, tipo)
     if not agendamentos: return []
 
     prescricao_ids = set()
     for ag in agendamentos:
-        if ag.tipo == TipoAgendamento.INFUSAO and ag.detalhes:
-            infusao = ag.detalhes.get('infusao')
-            if infusao and 'prescricao_id' in infusao: prescricao_ids.add(infusao['prescricao_id'])
+        p_id = (ag['detalhes'].get('infusao') or {}).get('prescricao_id') if ag['tipo'] == TipoAgendamento.INFUSAO.value else None
+        ag['prescricao_id'] = p_id
+        if p_id: prescricao_ids.add(p_id)
 
-    lista_prescricoes = await prescricao_provider.obter_prescricao_multi(list(prescricao_ids))
-    mapa_prescricoes = {p.id: p for p in lista_prescricoes}
+    lista_prescricoes = await prescricao_provider.obter_prescricao_resumo_multi(list(prescricao_ids))
+    mapa_prescricoes = {p['id']: PrescricaoResponse.model_validate(p) for p in lista_prescricoes}
 
     response = []
     for ag in agendamentos:
-        ag_resp = AgendamentoResponse.model_validate(ag)
-        if ag.tipo == 'infusao' and ag.detalhes and 'infusao' in ag.detalhes:
-            p_id = ag.detalhes['infusao'].get('prescricao_id')
-            if p_id and p_id in mapa_prescricoes:
-                prescricao_obj = mapa_prescricoes[p_id]
-                p_resp = PrescricaoResponse.model_validate(prescricao_obj)
-                ag_resp.prescricao = p_resp
+        ag_resp = AgendamentoGridResponse.model_validate(ag)
+        ag_resp.prescricao = mapa_prescricoes.get(ag['prescricao_id'])
         response.append(ag_resp)
 
     return response
 
 
+async def listar_historico_agendamento(
+        provider: AgendamentoProviderInterface,
+        agendamento_id: str
+) -> List[AgendamentoHistoricoItem]:
+    eventos = await provider.listar_eventos_auditoria(agendamento_id)
+    if not eventos and not await provider.obter_agendamento(agendamento_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agendamento não encontrado")
+
+    return [AgendamentoHistoricoItem.model_validate(e) for e in auditoria_service.montar_historico_agendamento(eventos)]
+
+
+async def _carregar_ocupacao(
+        agendamento_provider: AgendamentoProviderInterface,
+        inicio: date,
+        fim: date
+) -> Dict[date, List[dict]]:
+    linhas_por_dia = {}
+    for linha in await agendamento_provider.contar_ocupacao(inicio, fim):
+        linhas_por_dia.setdefault(linha["data"], []).append(linha)
+    return linhas_por_dia
+
+
+async def obter_ocupacao(
+        agendamento_provider: AgendamentoProviderInterface,
+        configuracao_provider: ConfiguracaoProviderInterface,
+        inicio: date,
+        fim: date
+) -> OcupacaoResponse:
+    if fim < inicio:
+        raise HTTPException(status_code=400, detail="A data final deve ser posterior à inicial.")
+    if (fim - inicio).days >= LIMITE_DIAS_OCUPACAO:
+        raise HTTPException(status_code=400, detail=f"O período consultado não pode exceder {LIMITE_DIAS_OCUPACAO} dias.")
+
+    config = await configuracao_provider.obter_configuracao()
+    vagas = config.vagas or {}
+
+    linhas_por_dia = await ocupacao_service.cache_ocupacao.obter_periodo(
+        inicio,
+        fim,
+        lambda i, f: _carregar_ocupacao(agendamento_provider, i, f),
+        list
+    )
+
+    dias = [
+        OcupacaoDia(data=dia, **ocupacao_service.montar_ocupacao_dia(linhas, vagas))
+        for dia, linhas in sorted(linhas_por_dia.items())
+    ]
+    return OcupacaoResponse(inicio=inicio, fim=fim, dias=dias)
+
+
+async def sugerir_horarios_ciclo(
+        agendamento_provider: AgendamentoProviderInterface,
+        prescricao_provider: PrescricaoProviderInterface,
+        protocolo_provider: ProtocoloProviderInterface,
+        configuracao_provider: ConfiguracaoProviderInterface,
+        prescricao_id: str,
+        inicio: date,
+        semanas: int,
+        limite: int
+) -> SugestoesCicloResponse:
+    prescricao = await prescricao_provider.obter_prescricao(prescricao_id)
+    if not prescricao:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Prescrição não encontrada")
+
+    dias_ciclo = list(prescricao.dias_com_medicacao or [])
+    if not dias_ciclo:
+        raise HTTPException(status_code=400, detail="A prescrição não possui dias com medicação.")
+
+    protocolo = await protocolo_provider.obter_protocolo_por_nome((prescricao.conteudo.get('protocolo') or {}).get('nome'))
+    if not protocolo:
+        raise HTTPException(status_code=400, detail="Protocolo da prescrição não encontrado.")
+
+    config = await configuracao_provider.obter_configuracao()
+    duracao = protocolo.tempo_total_minutos
+    categoria = ocupacao_service.categoria_vaga(
+        TipoAgendamento.INFUSAO.value, "00:00", ocupacao_service.horario_dos_minutos(duracao)
+    )
+
+    fim = inicio + timedelta(days=semanas * 7 + dias_ciclo[-1] - 1)
+    linhas_por_dia = await ocupacao_service.cache_ocupacao.obter_periodo(
+        inicio,
+        fim,
+        lambda i, f: _carregar_ocupacao(agendamento_provider, i, f),
+        list
+    )
+
+    agenda = agendador_service.AgendaLivre(
+        linhas_por_dia,
+        config.horario_abertura,
+        config.horario_fechamento,
+        config.dias_funcionamento,
+        config.vagas
+    )
+    sugestoes = agendador_service.sugerir_ciclos(
+        agenda, dias_ciclo, inicio, semanas, duracao, categoria, protocolo.dias_semana_permitidos, limite
+    )
+
+    return SugestoesCicloResponse(
+        prescricao_id=prescricao.id,
+        duracao_minutos=duracao,
+        categoria=categoria,
+        sugestoes=sugestoes
+    )
+
+
+async def _carregar_resumo_calendario(
+        agendamento_provider: AgendamentoProviderInterface,
+        inicio: date,
+        fim: date
+) -> Dict[date, dict]:
+    resumos = {}
+    for linha in await agendamento_provider.contar_resumo_calendario(inicio, fim):
+        resumo = resumos.setdefault(linha["data"], {"total": 0, "encaixes": 0, "por_tipo": {}, "por_status": {}})
+        total = linha["total"]
+        resumo["total"] += total
+        if linha["encaixe"]:
+            resumo["encaixes"] += total
+        resumo["por_tipo"][linha["tipo"]] = resumo["por_tipo"].get(linha["tipo"], 0) + total
+        resumo["por_status"][linha["status"]] = resumo["por_status"].get(linha["status"], 0) + total
+    return resumos
+
+
+async def obter_resumo_calendario(
+        agendamento_provider: AgendamentoProviderInterface,
+        mes: str
+) -> ResumoCalendarioResponse:
+    ano, numero_mes = map(int, mes.split("-"))
+    inicio = date(ano, numero_mes, 1)
+    fim = date(ano + numero_mes // 12, numero_mes % 12 + 1, 1) - timedelta(days=1)
+
+    resumos = await cache_resumo_calendario.obter_periodo(
+        inicio,
+        fim,
+        lambda i, f: _carregar_resumo_calendario(agendamento_provider, i, f),
+        lambda: {"total": 0}
+    )
+
+    dias = [
+        ResumoCalendarioDia(data=dia, **resumo)
+        for dia, resumo in sorted(resumos.items())
+        if resumo["total"]
+    ]
+    return ResumoCalendarioResponse(mes=mes, dias=dias)
+
+
+def _aplicar_alocacao(agendamentos: List[Agendamento], alocacao: Dict[str, Optional[int]]) -> List[Agendamento]:
+    alterados = []
+    for agendamento in agendamentos:
+        if agendamento.id in alocacao and agendamento.poltrona != alocacao[agendamento.id]:
+            agendamento.poltrona = alocacao[agendamento.id]
+            alterados.append(agendamento)
+    return alterados
+
+
+async def _encaixar_poltronas(
+        provider: AgendamentoProviderInterface,
+        configuracao_provider: ConfiguracaoProviderInterface,
+        novos: List[Agendamento]
+) -> List[Agendamento]:
+    # Remarcados e suspensos deixam a poltrona livre; os demais disputam uma poltrona no novo período.
+    for agendamento in novos:
+        if agendamento.status in ocupacao_service.STATUS_FORA_DA_CAPACIDADE:
+            agendamento.poltrona = None
+    novos = [
+        a for a in novos
+        if a.tipo == TipoAgendamento.INFUSAO.value and a.status not in ocupacao_service.STATUS_FORA_DA_CAPACIDADE
+    ]
+    if not novos:
+        return []
+
+    config = await configuracao_provider.obter_configuracao()
+    total_poltronas = (config.vagas or {}).get("poltronas")
+
+    datas = sorted({a.data for a in novos})
+    for dia in datas:
+        await provider.bloquear_dia(dia)
+
+    # Os novos podem ainda não ter ido ao banco; entram na conta junto com o que a consulta trouxer.
+    existentes = await provider.listar_infusoes_por_data(datas)
+    por_dia = {}
+    for agendamento in {a.id: a for a in [*existentes, *novos]}.values():
+        por_dia.setdefault(agendamento.data, []).append(agendamento)
+
+    novos_ids = [a.id for a in novos]
+    alterados = []
+    for agendamentos in por_dia.values():
+        intervalos = [i for i in map(poltronas_service.intervalo_do_agendamento, agendamentos) if i]
+        alocacao = poltronas_service.encaixar(intervalos, novos_ids, total_poltronas)
+        if alocacao is None:
+            alocacao = poltronas_service.alocar_dia(intervalos, total_poltronas)
+        alterados.extend(_aplicar_alocacao(agendamentos, alocacao))
+
+    return [a for a in alterados if a.id not in novos_ids]
+
+
+async def obter_alocacao_poltronas(
+        provider: AgendamentoProviderInterface,
+        configuracao_provider: ConfiguracaoProviderInterface,
+        dia: date,
+        otimizar: bool = False
+) -> AlocacaoPoltronasResponse:
+    config = await configuracao_provider.obter_configuracao()
+    total_poltronas = (config.vagas or {}).get("poltronas")
+
+    if otimizar:
+        await provider.bloquear_dia(dia)
+    agendamentos = await provider.listar_infusoes_por_data([dia])
+    intervalos = [i for i in map(poltronas_service.intervalo_do_agendamento, agendamentos) if i]
+
+    if otimizar:
+        alocacao = poltronas_service.alocar_dia(intervalos, total_poltronas)
+        alterados = _aplicar_alocacao(agendamentos, alocacao)
+        await provider.commit()
+        if alterados:
+            await _publicar_evento("poltronas_realocadas", alterados)
+    else:
+        alocacao = {a.id: a.poltrona for a in agendamentos}
+
+    fixos = {i["id"] for i in intervalos if i["fixo"]}
+    return AlocacaoPoltronasResponse(
+        data=dia,
+        total_poltronas=total_poltronas,
+        poltronas_usadas=len({p for p in alocacao.values() if p is not None}),
+        minutos_ociosos=poltronas_service.minutos_ociosos(intervalos, alocacao),
+        alocacoes=[
+            PoltronaAlocacao(
+                agendamento_id=a.id,
+                paciente_id=a.paciente_id,
+                horario_inicio=a.horario_inicio,
+                horario_fim=a.horario_fim,
+                poltrona=alocacao.get(a.id),
+                fixo=a.id in fixos
+            )
+            for a in agendamentos
+        ],
+        sem_poltrona=[a.id for a in agendamentos if alocacao.get(a.id) is None]
+    )
+
+
+async def _validar_capacidade(
+        provider: AgendamentoProviderInterface,
+        configuracao_provider: ConfiguracaoProviderInterface,
+        dados: AgendamentoCreate
+):
+    if dados.encaixe:
+        return
+
+    categoria = ocupacao_service.categoria_vaga(TipoAgendamento(dados.tipo).value, dados.horario_inicio, dados.horario_fim)
+    if not categoria:
+        return
+
+    config = await configuracao_provider.obter_configuracao()
+    limite = (config.vagas or {}).get(categoria)
+    if limite is None:
+        return
+
+    # Conta direto no banco, sob lock do dia, em vez de confiar no cache.
+    await provider.bloquear_dia(dados.data)
+    linhas = await provider.contar_ocupacao(dados.data, dados.data)
+    ocupadas = ocupacao_service.contar_por_categoria(linhas).get(categoria, 0)
+
+    if ocupadas >= limite:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Sem vagas de '{categoria}' em {dados.data.strftime('%d/%m/%Y')} ({ocupadas}/{limite} ocupadas). Marque como encaixe para agendar acima da capacidade."
+        )
+
+
+def _sobrepoe(a: Agendamento, b: Agendamento) -> bool:
+    if a.paciente_id != b.paciente_id or a.data != b.data:
+        return False
+    return (ocupacao_service.minutos_do_horario(a.horario_inicio) < ocupacao_service.minutos_do_horario(b.horario_fim)
+            and ocupacao_service.minutos_do_horario(b.horario_inicio) < ocupacao_service.minutos_do_horario(a.horario_fim))
+
+
+async def _conflitos_paciente(
+        provider: AgendamentoProviderInterface,
+        agendamentos: List[Agendamento],
+        ignorar_ids: Iterable[str] = ()
+) -> List[tuple]:
+    ativos = [a for a in agendamentos if a.paciente_id and a.status not in ocupacao_service.STATUS_FORA_DA_CAPACIDADE]
+    if not ativos:
+        return []
+
+    # O lote pode ainda não estar no banco (ou estar com valores antigos): ele fica fora da consulta e é
+    # comparado entre si em memória.
+    ignorar = list({*ignorar_ids, *(a.id for a in agendamentos)})
+    for dia in sorted({a.data for a in ativos}):
+        await provider.bloquear_dia(dia)
+
+    conflitos = []
+    for i, agendamento in enumerate(ativos):
+        conflitante = next((a for a in ativos[:i] if _sobrepoe(a, agendamento)), None)
+        if conflitante is None:
+            conflitante = await provider.buscar_sobreposicao_paciente(
+                agendamento.paciente_id, agendamento.data, agendamento.horario_inicio, agendamento.horario_fim, ignorar
+            )
+        if conflitante:
+            conflitos.append((agendamento, conflitante))
+    return conflitos
+
+
+def _descrever_conflito_paciente(conflitante: Agendamento) -> str:
+    return (
+        f"O paciente já possui {conflitante.tipo} em {conflitante.data.strftime('%d/%m/%Y')} "
+        f"das {conflitante.horario_inicio} às {conflitante.horario_fim} (agendamento {conflitante.id})."
+    )
+
+
+async def _validar_sobreposicao_paciente(
+        provider: AgendamentoProviderInterface,
+        agendamentos: List[Agendamento],
+        ignorar_ids: Iterable[str] = ()
+):
+    conflitos = await _conflitos_paciente(provider, agendamentos, ignorar_ids)
+    if conflitos:
+        raise HTTPException(status_code=409, detail=_descrever_conflito_paciente(conflitos[0][1]))
+
+
+async def sincronizar_agendamentos(
+        agendamento_provider: AgendamentoProviderInterface,
+        prescricao_provider: PrescricaoProviderInterface,
+        data_inicio: Optional[date],
+        data_fim: Optional[date],
+        paciente_id: Optional[str] = None,
+        since: Optional[int] = None
+) -> AgendamentoSyncResponse:
+    # O cursor é lido antes da listagem: o que for gravado no meio do caminho volta na próxima sincronização.
+    # Linhas de transações ainda abertas ficam acima dele e também voltam, mesmo que confirmem fora de ordem.
+    cursor = await agendamento_provider.obter_cursor_sincronizacao()
+    completo = since is None or since > cursor
+
+    agendamentos = await agendamento_provider.listar_agendamentos(
+        data_inicio,
+        data_fim,
+        paciente_id,
+        alterados_desde=None if completo else since
+    )
+    respostas = await _montar_respostas_com_prescricao(prescricao_provider, agendamentos)
+
+    removidos = []
+    if not completo:
+        # Só o que saiu deste período/paciente; quem continua nele já veio na listagem acima.
+        ids_no_periodo = {ag.id for ag in agendamentos}
+        ids_movidos = await agendamento_provider.listar_ids_movidos_desde(since, data_inicio, data_fim, paciente_id)
+        removidos = [ag_id for ag_id in ids_movidos if ag_id not in ids_no_periodo]
+
+    return AgendamentoSyncResponse(
+        cursor=cursor,
+        completo=completo,
+        agendamentos=respostas,
+        removidos=removidos
+    )
+
+
 async def criar_agendamento(
         provider: AgendamentoProviderInterface,
         prescricao_provider: PrescricaoProviderInterface,
+        configuracao_provider: ConfiguracaoProviderInterface,
         dados: AgendamentoCreate,
         criado_por_id: str,
         usuario_nome: Optional[str] = None
@@ -350,14 +870,7 @@ async def criar_agendamento(
         if prescricao.paciente_id != dados.paciente_id:
             raise HTTPException(status_code=400, detail="A prescrição não pertence ao paciente informado.")
 
-        conteudo = prescricao.conteudo
-        dias_validos = set()
-
-        if 'blocos' in conteudo:
-            for bloco in conteudo['blocos']:
-                for item in bloco.get('itens', []):
-                    for dia in item.get('dias_do_ciclo', []):
-                        dias_validos.add(dia)
+        dias_validos = set(prescricao.dias_com_medicacao or [])
 
         if detalhes_inf.dia_ciclo not in dias_validos:
             dias_str = ", ".join(map(str, sorted(dias_validos)))
@@ -366,19 +879,7 @@ async def criar_agendamento(
                 detail=f"Dia do ciclo {detalhes_inf.dia_ciclo} inválido para esta prescrição. Dias válidos com medicação: {dias_str}."
             )
 
-        agendamentos_existentes = await provider.buscar_por_prescricao_e_dia(
-            detalhes_inf.prescricao_id,
-            detalhes_inf.dia_ciclo
-        )
-
-        conflito = [a for a in agendamentos_existentes if a.status not in ['cancelado', 'suspenso', 'remarcado']]
-
-        if conflito:
-            data_existente = conflito[0].data.strftime('%d/%m/%Y')
-            raise HTTPException(
-                status_code=409,
-                detail=f"Já existe um agendamento ativo para o Dia {detalhes_inf.dia_ciclo} desta prescrição em {data_existente}. Use a remarcação se necessário."
-            )
+    await _validar_capacidade(provider, configuracao_provider, dados)
 
     novo_id = str(uuid.uuid4())
 
@@ -387,25 +888,22 @@ async def criar_agendamento(
         id=novo_id,
         criado_por_id=criado_por_id
     )
+    await _validar_sobreposicao_paciente(provider, [agendamento])
 
-    criado = await provider.criar_agendamento(agendamento)
+    dia_ciclo = dados.detalhes.infusao.dia_ciclo if dados.tipo == TipoAgendamento.INFUSAO else None
+    async with _unicidade_dia_ciclo(dia_ciclo):
+        await provider.criar_agendamento(agendamento, commit=False)
+    realocados = await _encaixar_poltronas(provider, configuracao_provider, [agendamento])
 
     if dados.tipo == TipoAgendamento.INFUSAO:
-        prescricao = await prescricao_provider.obter_prescricao(dados.detalhes.infusao.prescricao_id)
-        if prescricao:
-            historico_agendamentos = list(prescricao.historico_agendamentos or [])
-            historico_agendamentos.append({
-                "data": datetime.now().isoformat(),
-                "agendamento_id": criado.id,
-                "status_agendamento": criado.status,
-                "usuario_id": criado_por_id,
-                "usuario_nome": usuario_nome,
-                "observacoes": "Agendamento criado"
-            })
-            prescricao.historico_agendamentos = historico_agendamentos
-            flag_modified(prescricao, "historico_agendamentos")
-            await prescricao_provider.atualizar_prescricao(prescricao)
+        await provider.registrar_eventos_auditoria([auditoria_service.evento_agendamento_prescricao(
+            dados.detalhes.infusao.prescricao_id, novo_id, agendamento.status,
+            criado_por_id, usuario_nome, "Agendamento criado"
+        )])
+    await provider.commit()
+    criado = await provider.obter_agendamento(novo_id)
 
+    if dados.tipo == TipoAgendamento.INFUSAO:
         await prescricao_controller.recalcular_status_prescricao(
             prescricao_provider,
             provider,
@@ -414,12 +912,149 @@ async def criar_agendamento(
             usuario_nome=usuario_nome
         )
 
+    await _publicar_evento("agendamento_criado", [criado])
+    if realocados:
+        await _publicar_evento("poltronas_realocadas", realocados)
     return AgendamentoResponse.model_validate(criado)
 
 
+async def agendar_ciclo(
+        provider: AgendamentoProviderInterface,
+        prescricao_provider: PrescricaoProviderInterface,
+        protocolo_provider: ProtocoloProviderInterface,
+        configuracao_provider: ConfiguracaoProviderInterface,
+        dados: AgendamentoCicloCreate,
+        criado_por_id: str,
+        usuario_nome: Optional[str] = None
+) -> AgendamentoCicloResponse:
+    prescricao = await prescricao_provider.obter_prescricao(dados.prescricao_id)
+    if not prescricao:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Prescrição não encontrada")
+
+    if prescricao.status in ['suspensa', 'cancelada', 'substituida']:
+        raise HTTPException(status_code=400, detail="Prescrição indisponível para novos agendamentos.")
+
+    dias_ciclo = list(prescricao.dias_com_medicacao or [])
+    if not dias_ciclo:
+        raise HTTPException(status_code=400, detail="A prescrição não possui dias com medicação.")
+
+    protocolo_ref = prescricao.conteudo.get('protocolo') or {}
+    protocolo = await protocolo_provider.obter_protocolo_por_nome(protocolo_ref.get('nome'))
+    config = await configuracao_provider.obter_configuracao()
+
+    horario_fim = dados.horario_fim
+    if not horario_fim:
+        if not protocolo:
+            raise HTTPException(status_code=400, detail="Protocolo da prescrição não encontrado; informe o horário de término.")
+        fim_minutos = ocupacao_service.minutos_do_horario(dados.horario_inicio) + protocolo.tempo_total_minutos
+        if fim_minutos > ocupacao_service.ULTIMO_MINUTO_DIA:
+            raise HTTPException(status_code=400, detail="A duração do protocolo ultrapassa o fim do dia.")
+        horario_fim = ocupacao_service.horario_dos_minutos(fim_minutos)
+
+    datas = {dia: dados.data_inicio + timedelta(days=dia - 1) for dia in dias_ciclo}
+    # Mesma convenção do front (0 = domingo).
+    dias_semana_permitidos = set(protocolo.dias_semana_permitidos or []) if protocolo else set()
+    dias_funcionamento = set(config.dias_funcionamento or [])
+
+    existentes = await provider.listar_por_prescricao(prescricao.id, incluir_concluidos=True)
+    dias_ocupados = {
+        a.dia_ciclo for a in existentes if a.status not in ['cancelado', 'suspenso', 'remarcado']
+    }
+
+    conflitos = []
+    for dia, data_dia in datas.items():
+        dia_semana = data_dia.isoweekday() % 7
+        if dia in dias_ocupados:
+            conflitos.append(ConflitoCiclo(dia_ciclo=dia, data=data_dia, motivo="Dia do ciclo já possui agendamento ativo"))
+        elif dias_semana_permitidos and dia_semana not in dias_semana_permitidos:
+            conflitos.append(ConflitoCiclo(dia_ciclo=dia, data=data_dia, motivo="Dia da semana não permitido pelo protocolo"))
+        elif dias_funcionamento and dia_semana not in dias_funcionamento:
+            conflitos.append(ConflitoCiclo(dia_ciclo=dia, data=data_dia, motivo="Clínica fechada neste dia"))
+
+    categoria = ocupacao_service.categoria_vaga(TipoAgendamento.INFUSAO.value, dados.horario_inicio, horario_fim)
+    limite = (config.vagas or {}).get(categoria) if categoria else None
+    if limite is not None and not dados.encaixe:
+        # Locks em ordem de data para não disputar com outro ciclo na ordem inversa.
+        for data_dia in sorted(set(datas.values())):
+            await provider.bloquear_dia(data_dia)
+
+        linhas = await provider.contar_ocupacao(min(datas.values()), max(datas.values()))
+        linhas_por_dia = {}
+        for linha in linhas:
+            linhas_por_dia.setdefault(linha["data"], []).append(linha)
+
+        for dia, data_dia in datas.items():
+            ocupadas = ocupacao_service.contar_por_categoria(linhas_por_dia.get(data_dia, [])).get(categoria, 0)
+            if ocupadas >= limite:
+                conflitos.append(ConflitoCiclo(
+                    dia_ciclo=dia, data=data_dia, motivo=f"Sem vagas de '{categoria}' ({ocupadas}/{limite} ocupadas)"
+                ))
+
+    turno = "manha" if ocupacao_service.minutos_do_horario(dados.horario_inicio) < 13 * 60 else "tarde"
+    valores = []
+    for dia, data_dia in datas.items():
+        agendamento = AgendamentoCreate(
+            paciente_id=prescricao.paciente_id,
+            tipo=TipoAgendamento.INFUSAO,
+            data=data_dia,
+            turno=turno,
+            horario_inicio=dados.horario_inicio,
+            horario_fim=horario_fim,
+            encaixe=dados.encaixe,
+            observacoes=dados.observacoes,
+            tags=dados.tags,
+            detalhes=DetalhesAgendamento(infusao=DetalhesInfusao(
+                prescricao_id=prescricao.id,
+                status_farmacia=FarmaciaStatusEnum.AGENDADO,
+                ciclo_atual=protocolo_ref.get('ciclo_atual') or 1,
+                dia_ciclo=dia
+            ))
+        )
+        valores.append({**agendamento.model_dump(), "id": str(uuid.uuid4()), "criado_por_id": criado_por_id})
+
+    for novo, conflitante in await _conflitos_paciente(provider, [Agendamento(**v) for v in valores]):
+        conflitos.append(ConflitoCiclo(
+            dia_ciclo=novo.detalhes['infusao']['dia_ciclo'], data=novo.data, motivo=_descrever_conflito_paciente(conflitante)
+        ))
+
+    if conflitos:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "mensagem": "Não foi possível agendar o ciclo completo.",
+                "conflitos": jsonable_encoder(sorted(conflitos, key=lambda c: c.dia_ciclo), by_alias=True)
+            }
+        )
+
+    async with _unicidade_dia_ciclo():
+        criados = await provider.criar_agendamentos_em_lote(valores)
+    realocados = await _encaixar_poltronas(provider, configuracao_provider, criados)
+    await provider.registrar_eventos_auditoria([
+        auditoria_service.evento_agendamento_prescricao(
+            prescricao.id, a.id, a.status, criado_por_id, usuario_nome, "Agendamento criado (ciclo completo)"
+        )
+        for a in criados
+    ])
+    await prescricao_controller.recalcular_status_prescricao(
+        prescricao_provider,
+        provider,
+        prescricao.id,
+        usuario_id=criado_por_id,
+        usuario_nome=usuario_nome,
+        commit=False
+    )
+    await provider.commit()
+
+    await _publicar_evento("agendamento_criado", criados)
+    if realocados:
+        await _publicar_evento("poltronas_realocadas", realocados)
+    return AgendamentoCicloResponse(agendamentos=[AgendamentoResponse.model_validate(a) for a in criados])
+
+
 async def atualizar_agendamento(
         provider: AgendamentoProviderInterface,
         prescricao_provider: PrescricaoProviderInterface,
+        configuracao_provider: ConfiguracaoProviderInterface,
         agendamento_id: str,
         dados: AgendamentoUpdate,
         usuario_id: Optional[str] = None,
@@ -429,12 +1064,33 @@ async def atualizar_agendamento(
     if not agendamento:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agendamento não encontrado")
 
+    data_anterior = agendamento.data
+    status_anterior = agendamento.status
     update_data = dados.model_dump(exclude_unset=True)
-    prescricao_id_anterior = _aplicar_regras_atualizacao(agendamento, update_data, usuario_id, usuario_nome)
-    atualizado = await provider.atualizar_agendamento(agendamento)
+    eventos = []
+    prescricao_id_anterior = _aplicar_regras_atualizacao(agendamento, update_data, usuario_id, usuario_nome, eventos)
+    reposicionado, realocar = _mudanca_de_periodo(update_data, status_anterior, agendamento.status)
+    if reposicionado:
+        await _validar_sobreposicao_paciente(provider, [agendamento])
 
+    prescricao_id_atual = None
     if agendamento.tipo == TipoAgendamento.INFUSAO.value:
         prescricao_id_atual = agendamento.detalhes.get('infusao', {}).get('prescricao_id') if agendamento.detalhes else None
+        if prescricao_id_atual and 'status' in update_data:
+            eventos.append(auditoria_service.evento_agendamento_prescricao(
+                prescricao_id_atual, agendamento.id, update_data['status'],
+                usuario_id, usuario_nome, "Status do agendamento atualizado"
+            ))
+
+    realocados = []
+    if realocar:
+        realocados = await _encaixar_poltronas(provider, configuracao_provider, [agendamento])
+    async with _unicidade_dia_ciclo():
+        atualizado = await provider.atualizar_agendamento(agendamento, commit=False)
+    await provider.registrar_eventos_auditoria(eventos)
+    await provider.commit()
+
+    if agendamento.tipo == TipoAgendamento.INFUSAO.value:
         if prescricao_id_atual:
             await prescricao_controller.recalcular_status_prescricao(
                 prescricao_provider,
@@ -444,22 +1100,6 @@ async def atualizar_agendamento(
                 usuario_nome=usuario_nome
             )
 
-            if 'status' in update_data:
-                prescricao = await prescricao_provider.obter_prescricao(prescricao_id_atual)
-                if prescricao:
-                    historico_agendamentos = list(prescricao.historico_agendamentos or [])
-                    historico_agendamentos.append({
-                        "data": datetime.now().isoformat(),
-                        "agendamento_id": agendamento.id,
-                        "status_agendamento": update_data['status'],
-                        "usuario_id": usuario_id,
-                        "usuario_nome": usuario_nome,
-                        "observacoes": "Status do agendamento atualizado"
-                    })
-                    prescricao.historico_agendamentos = historico_agendamentos
-                    flag_modified(prescricao, "historico_agendamentos")
-                    await prescricao_provider.atualizar_prescricao(prescricao)
-
         if prescricao_id_anterior and prescricao_id_anterior != prescricao_id_atual:
             await prescricao_controller.recalcular_status_prescricao(
                 prescricao_provider,
@@ -469,12 +1109,16 @@ async def atualizar_agendamento(
                 usuario_nome=usuario_nome
             )
 
+    await _publicar_evento("agendamento_atualizado", [atualizado], [data_anterior])
+    if realocados:
+        await _publicar_evento("poltronas_realocadas", realocados)
     return AgendamentoResponse.model_validate(atualizado)
 
 
 async def atualizar_agendamentos_lote(
         provider: AgendamentoProviderInterface,
         prescricao_provider: PrescricaoProviderInterface,
+        configuracao_provider: ConfiguracaoProviderInterface,
         dados_lote: AgendamentoBulkUpdateList,
         usuario_id: Optional[str] = None,
         usuario_nome: Optional[str] = None
@@ -491,67 +1135,78 @@ async def atualizar_agendamentos_lote(
             detail=f"Agendamentos não encontrados: {', '.join(ids_faltantes)}"
         )
 
+    datas_anteriores = {a.data for a in agendamentos_existentes}
     processamento_pendente = []
+    eventos = []
     for item_update in dados_lote.itens:
         agendamento = mapa_agendamentos[item_update.id]
         update_data = item_update.model_dump(exclude={'id'}, exclude_unset=True)
+        status_anterior = agendamento.status
         prescricao_id_anterior = _aplicar_regras_atualizacao(
             agendamento,
             update_data,
             usuario_id=usuario_id,
-            usuario_nome=usuario_nome
+            usuario_nome=usuario_nome,
+            eventos=eventos
         )
+        reposicionado, realocar = _mudanca_de_periodo(update_data, status_anterior, agendamento.status)
 
         processamento_pendente.append({
             "agendamento": agendamento,
             "update_data": update_data,
-            "prescricao_id_anterior": prescricao_id_anterior
+            "prescricao_id_anterior": prescricao_id_anterior,
+            "reposicionado": reposicionado,
+            "realocar": realocar
         })
 
-    atualizados = await provider.atualizar_agendamento_multi(list(mapa_agendamentos.values()))
+    reposicionados = [i["agendamento"] for i in processamento_pendente if i["reposicionado"]]
+    if reposicionados:
+        await _validar_sobreposicao_paciente(provider, reposicionados)
+    realocar = [i["agendamento"] for i in processamento_pendente if i["realocar"]]
+    realocados = []
+    if realocar:
+        realocados = await _encaixar_poltronas(provider, configuracao_provider, realocar)
+
+    async with _unicidade_dia_ciclo():
+        atualizados = await provider.atualizar_agendamento_multi(list(mapa_agendamentos.values()), commit=False)
+
+    prescricoes_afetadas = set()
     for item in processamento_pendente:
         agendamento = item["agendamento"]
         update_data = item["update_data"]
         prescricao_id_anterior = item["prescricao_id_anterior"]
 
-        if agendamento.tipo == TipoAgendamento.INFUSAO.value:
-            prescricao_id_atual = agendamento.detalhes.get('infusao', {}).get(
-                'prescricao_id') if agendamento.detalhes else None
-
-            if prescricao_id_atual:
-                await prescricao_controller.recalcular_status_prescricao(
-                    prescricao_provider,
-                    provider,
-                    prescricao_id_atual,
-                    usuario_id=usuario_id,
-                    usuario_nome=usuario_nome
-                )
+        if agendamento.tipo != TipoAgendamento.INFUSAO.value:
+            continue
 
-                if 'status' in update_data:
-                    prescricao = await prescricao_provider.obter_prescricao(prescricao_id_atual)
-                    if prescricao:
-                        historico_agendamentos = list(prescricao.historico_agendamentos or [])
-                        historico_agendamentos.append({
-                            "data": datetime.now().isoformat(),
-                            "agendamento_id": agendamento.id,
-                            "status_agendamento": update_data['status'],
-                            "usuario_id": usuario_id,
-                            "usuario_nome": usuario_nome,
-                            "observacoes": "Status do agendamento atualizado em lote"
-                        })
-                        prescricao.historico_agendamentos = historico_agendamentos
-                        flag_modified(prescricao, "historico_agendamentos")
-                        await prescricao_provider.atualizar_prescricao(prescricao)
-
-            if prescricao_id_anterior and prescricao_id_anterior != prescricao_id_atual:
-                await prescricao_controller.recalcular_status_prescricao(
-                    prescricao_provider,
-                    provider,
-                    prescricao_id_anterior,
-                    usuario_id=usuario_id,
-                    usuario_nome=usuario_nome
-                )
+        prescricao_id_atual = agendamento.detalhes.get('infusao', {}).get(
+            'prescricao_id') if agendamento.detalhes else None
+
+        if prescricao_id_atual:
+            prescricoes_afetadas.add(prescricao_id_atual)
+            if 'status' in update_data:
+                eventos.append(auditoria_service.evento_agendamento_prescricao(
+                    prescricao_id_atual, agendamento.id, update_data['status'],
+                    usuario_id, usuario_nome, "Status do agendamento atualizado em lote"
+                ))
 
+        if prescricao_id_anterior and prescricao_id_anterior != prescricao_id_atual:
+            prescricoes_afetadas.add(prescricao_id_anterior)
+
+    await provider.registrar_eventos_auditoria(eventos)
+    await prescricao_controller.recalcular_status_prescricoes_lote(
+        prescricao_provider,
+        provider,
+        prescricoes_afetadas,
+        usuario_id=usuario_id,
+        usuario_nome=usuario_nome,
+        commit=False
+    )
+    await provider.commit()
+
+    await _publicar_evento("agendamento_atualizado", atualizados, datas_anteriores)
+    if realocados:
+        await _publicar_evento("poltronas_realocadas", realocados)
     return [AgendamentoResponse.model_validate(a) for a in atualizados]
 
 
@@ -587,13 +1242,7 @@ async def trocar_prescricao_agendamento(
     if prescricao_nova.paciente_id != agendamento.paciente_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="A prescrição não pertence ao paciente do agendamento")
 
-    conteudo = prescricao_nova.conteudo
-    dias_validos = set()
-    if 'blocos' in conteudo:
-        for bloco in conteudo['blocos']:
-            for item in bloco.get('itens', []):
-                for dia in item.get('dias_do_ciclo', []):
-                    dias_validos.add(dia)
+    dias_validos = set(prescricao_nova.dias_com_medicacao or [])
 
     dia_ciclo = infusao.get('dia_ciclo')
     if dia_ciclo and dia_ciclo not in dias_validos:
@@ -622,50 +1271,27 @@ async def trocar_prescricao_agendamento(
     agendamento.detalhes = detalhes
     flag_modified(agendamento, "detalhes")
 
-    historico_alteracoes = list(agendamento.historico_alteracoes or [])
-    historico_alteracoes.append({
-        "data": datetime.now().isoformat(),
-        "usuario_id": usuario_id,
-        "usuario_nome": usuario_nome,
-        "tipo_alteracao": "prescricao",
-        "campo": "prescricao_id",
-        "valor_antigo": prescricao_id_anterior,
-        "valor_novo": prescricao_nova.id,
-        "motivo": dados.motivo or "Substituição manual"
-    })
-    agendamento.historico_alteracoes = historico_alteracoes
-    flag_modified(agendamento, "historico_alteracoes")
-
-    atualizado = await provider.atualizar_agendamento(agendamento)
-
+    eventos = [auditoria_service.evento_alteracao_agendamento(
+        agendamento.id, "prescricao", usuario_id, usuario_nome,
+        valor_antigo=prescricao_id_anterior,
+        valor_novo=prescricao_nova.id,
+        campo="prescricao_id",
+        motivo=dados.motivo or "Substituição manual"
+    )]
     if prescricao_id_anterior:
-        prescricao_antiga = await prescricao_provider.obter_prescricao(prescricao_id_anterior)
-        if prescricao_antiga:
-            historico_agendamentos_antigo = list(prescricao_antiga.historico_agendamentos or [])
-            historico_agendamentos_antigo.append({
-                "data": datetime.now().isoformat(),
-                "agendamento_id": agendamento.id,
-                "status_agendamento": agendamento.status,
-                "usuario_id": usuario_id,
-                "usuario_nome": usuario_nome,
-                "observacoes": "Agendamento desvinculado da prescrição"
-            })
-            prescricao_antiga.historico_agendamentos = historico_agendamentos_antigo
-            flag_modified(prescricao_antiga, "historico_agendamentos")
-            await prescricao_provider.atualizar_prescricao(prescricao_antiga)
-
-    historico_agendamentos_novo = list(prescricao_nova.historico_agendamentos or [])
-    historico_agendamentos_novo.append({
-        "data": datetime.now().isoformat(),
-        "agendamento_id": agendamento.id,
-        "status_agendamento": agendamento.status,
-        "usuario_id": usuario_id,
-        "usuario_nome": usuario_nome,
-        "observacoes": "Agendamento vinculado à prescrição"
-    })
-    prescricao_nova.historico_agendamentos = historico_agendamentos_novo
-    flag_modified(prescricao_nova, "historico_agendamentos")
-    await prescricao_provider.atualizar_prescricao(prescricao_nova)
+        eventos.append(auditoria_service.evento_agendamento_prescricao(
+            prescricao_id_anterior, agendamento.id, agendamento.status,
+            usuario_id, usuario_nome, "Agendamento desvinculado da prescrição"
+        ))
+    eventos.append(auditoria_service.evento_agendamento_prescricao(
+        prescricao_nova.id, agendamento.id, agendamento.status,
+        usuario_id, usuario_nome, "Agendamento vinculado à prescrição"
+    ))
+
+    async with _unicidade_dia_ciclo():
+        atualizado = await provider.atualizar_agendamento(agendamento, commit=False)
+    await provider.registrar_eventos_auditoria(eventos)
+    await provider.commit()
 
     if prescricao_id_anterior:
         await prescricao_controller.recalcular_status_prescricao(
@@ -684,6 +1310,7 @@ async def trocar_prescricao_agendamento(
         usuario_nome=usuario_nome
     )
 
+    await _publicar_evento("prescricao_trocada", [atualizado])
     response = AgendamentoResponse.model_validate(atualizado)
     response.prescricao = PrescricaoResponse.model_validate(prescricao_nova)
     return response
@@ -692,6 +1319,7 @@ async def trocar_prescricao_agendamento(
 async def remarcar_agendamento(
         provider: AgendamentoProviderInterface,
         prescricao_provider: PrescricaoProviderInterface,
+        configuracao_provider: ConfiguracaoProviderInterface,
         agendamento_id: str,
         dados: AgendamentoRemarcacaoRequest,
         usuario_id: str,
@@ -705,13 +1333,16 @@ async def remarcar_agendamento(
     if not horario_final:
         raise HTTPException(status_code=400, detail="Horário não fornecido")
 
-    novo_agendamento = await _executar_remarcacao_atomica(
-        provider, prescricao_provider, agendamento, dados.nova_data, horario_final,
+    novo_agendamento, realocados = await _executar_remarcacao_atomica(
+        provider, prescricao_provider, configuracao_provider, agendamento, dados.nova_data, horario_final,
         dados.motivo, usuario_id, usuario_nome
     )
 
     await provider.commit()
     agendamento_final = await provider.obter_agendamento(novo_agendamento.id)
+    await _publicar_evento("agendamento_remarcado", [agendamento, agendamento_final])
+    if realocados:
+        await _publicar_evento("poltronas_realocadas", realocados)
     response = AgendamentoResponse.model_validate(agendamento_final)
     return response
 
@@ -719,6 +1350,7 @@ async def remarcar_agendamento(
 async def remarcar_agendamentos_lote(
         provider: AgendamentoProviderInterface,
         prescricao_provider: PrescricaoProviderInterface,
+        configuracao_provider: ConfiguracaoProviderInterface,
         dados: AgendamentoRemarcacaoLoteRequest,
         usuario_id: str,
         usuario_nome: str
@@ -728,8 +1360,9 @@ async def remarcar_agendamentos_lote(
     if len(agendamentos) != len(set(dados.ids)):
         raise HTTPException(status_code=404, detail="Alguns agendamentos não foram encontrados")
 
-    novos_agendamentos = []
-
+    atualizacoes = []
+    clones = []
+    eventos = []
     for original in agendamentos:
         if original.status == AgendamentoStatusEnum.REMARCADO:
             continue
@@ -738,16 +1371,26 @@ async def remarcar_agendamentos_lote(
         if not horario_final:
             horario_final = original.horario_inicio
 
-        novo = await _executar_remarcacao_atomica(
-            provider, prescricao_provider, original, dados.nova_data, horario_final,
-            dados.motivo, usuario_id, usuario_nome
-        )
-        novos_agendamentos.append(novo)
+        clone = _valores_clone_remarcacao(original, dados.nova_data, horario_final, dados.motivo, usuario_id)
+        atualizacoes.append(_valores_original_remarcado(original, dados.nova_data, dados.motivo))
+        clones.append(clone)
+        eventos.extend(_eventos_remarcacao(original, clone, dados.nova_data, usuario_id, usuario_nome))
+
+    if not clones:
+        return []
 
+    await _validar_sobreposicao_paciente(
+        provider, [Agendamento(**c) for c in clones], ignorar_ids=[a["id"] for a in atualizacoes]
+    )
+    await provider.atualizar_agendamentos_em_lote(atualizacoes)
+    async with _unicidade_dia_ciclo():
+        agendamentos_finais = await provider.criar_agendamentos_em_lote(clones)
+    realocados = await _encaixar_poltronas(provider, configuracao_provider, agendamentos_finais)
+    await provider.registrar_eventos_auditoria(eventos)
+    await prescricao_provider.atualizar_pendencias([_prescricao_id_do_agendamento(a) for a in agendamentos])
     await provider.commit()
-    response = []
-    if novos_agendamentos:
-        ids_novos = [a.id for a in novos_agendamentos]
-        agendamentos_finais = await provider.buscar_por_id_multi(ids_novos)
-        response = [AgendamentoResponse.model_validate(a) for a in agendamentos_finais]
-    return response
+
+    await _publicar_evento("agendamento_remarcado", [*agendamentos, *agendamentos_finais])
+    if realocados:
+        await _publicar_evento("poltronas_realocadas", realocados)
+    return [AgendamentoResponse.model_validate(a) for a in agendamentos_finais]
@@ -1,5 +1,14 @@
+from typing import Optional
+
 from src.providers.interfaces.configuracao_provider_interface import ConfiguracaoProviderInterface
 from src.schemas.configuracao_schema import ConfiguracaoUpdate, ConfiguracaoResponse
+from src.services import etag_service
+
+
+async def obter_etag_configuracao(provider: ConfiguracaoProviderInterface) -> Optional[str]:
+    versao = await provider.obter_versao()
+    if versao is None: return None
+    return etag_service.gerar_etag("configuracoes", versao)
 
 
 async def obter_configuracao(provider: ConfiguracaoProviderInterface) -> ConfiguracaoResponse:
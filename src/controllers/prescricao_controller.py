@@ -1,14 +1,13 @@
+import asyncio
+import copy
 import io
-import os
 import uuid
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, date
+from typing import List, Optional, Iterable, Dict
 from contextlib import asynccontextmanager
 
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Request, status
 from fastapi.responses import StreamingResponse
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML
 
 from src.models.prescricao_model import Prescricao
 from src.providers.interfaces.auth_provider_interface import AuthProviderInterface
@@ -16,7 +15,28 @@ from sqlalchemy.orm.attributes import flag_modified
 
 from src.providers.interfaces.agendamento_provider_interface import AgendamentoProviderInterface
 from src.providers.interfaces.prescricao_provider_interface import PrescricaoProviderInterface
-from src.schemas.prescricao_schema import PrescricaoCreate, PrescricaoResponse, MedicoSnapshot, PrescricaoStatusEnum, PrescricaoStatusUpdate, PrescricaoSubstituicaoCreate
+from src.schemas.prescricao_schema import PrescricaoCreate, PrescricaoResponse, MedicoSnapshot, PrescricaoStatusEnum, PrescricaoStatusUpdate, PrescricaoSubstituicaoCreate, \
+    PrescricaoHistoricoResponse, PendenciaCicloResponse
+from src.services import auditoria_service, ciclo_service, etag_service
+from src.services.pdf_cache_service import cache_pdf, chave_pdf
+from src.services.pdf_service import renderizador_pdf, concatenar_pdfs
+from src.services.templates_service import versao_template
+
+STATUS_PRESCRICAO_FINAIS = [
+    PrescricaoStatusEnum.SUSPENSA.value,
+    PrescricaoStatusEnum.CANCELADA.value,
+    PrescricaoStatusEnum.SUBSTITUIDA.value
+]
+
+STATUS_AGENDAMENTO_EM_CURSO = [
+    'em-triagem',
+    'em-infusao',
+    'intercorrencia',
+    'aguardando-consulta',
+    'aguardando-exame',
+    'aguardando-medicamento',
+    'internado'
+]
 
 
 async def listar_prescricoes_por_paciente(
@@ -37,6 +57,20 @@ async def buscar_prescricao(
     return PrescricaoResponse.model_validate(prescricao)
 
 
+async def obter_historico_prescricao(
+        provider: PrescricaoProviderInterface,
+        prescricao_id: str,
+) -> PrescricaoHistoricoResponse:
+    eventos = await provider.listar_eventos_auditoria(prescricao_id)
+    if not eventos and not await provider.obter_prescricao(prescricao_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Prescrição não encontrada")
+
+    return PrescricaoHistoricoResponse(
+        historico_status=auditoria_service.montar_historico_status_prescricao(eventos),
+        historico_agendamentos=auditoria_service.montar_historico_agendamentos_prescricao(eventos)
+    )
+
+
 async def buscar_prescricao_multi(
         provider: PrescricaoProviderInterface,
         prescricao_ids: List[str],
@@ -45,6 +79,15 @@ async def buscar_prescricao_multi(
     return [PrescricaoResponse.model_validate(p) for p in lista]
 
 
+async def listar_pendencias(
+        provider: PrescricaoProviderInterface,
+        data_limite: Optional[date] = None,
+) -> List[PendenciaCicloResponse]:
+    hoje = date.today()
+    pendencias = await provider.listar_pendencias(data_limite)
+    return [PendenciaCicloResponse(**p, atrasada=p["data_prevista"] < hoje) for p in pendencias]
+
+
 async def _montar_prescricao(
         auth_provider: AuthProviderInterface,
         dados: PrescricaoCreate,
@@ -93,6 +136,7 @@ async def _montar_prescricao(
         "blocos": blocos_processados,
         "diagnostico": dados.diagnostico
     }
+    dias_com_medicacao, itens_por_dia = ciclo_service.indexar_dias_ciclo(blocos_processados)
 
     return Prescricao(
         id=str(uuid.uuid4()),
@@ -100,7 +144,9 @@ async def _montar_prescricao(
         medico_id=dados.medico_id,
         status="pendente",
         data_emissao=datetime.now(),
-        conteudo=documento_json
+        conteudo=documento_json,
+        dias_com_medicacao=dias_com_medicacao,
+        itens_por_dia=itens_por_dia
     )
 
 
@@ -110,7 +156,9 @@ async def criar_prescricao(
         dados: PrescricaoCreate,
 ) -> PrescricaoResponse:
     nova_prescricao = await _montar_prescricao(auth_provider, dados)
-    criado = await prescricao_provider.criar_prescricao(nova_prescricao)
+    criado = await prescricao_provider.criar_prescricao(nova_prescricao, commit=False)
+    await prescricao_provider.atualizar_pendencias([criado.id])
+    await prescricao_provider.commit()
     return PrescricaoResponse.model_validate(criado)
 
 
@@ -146,14 +194,14 @@ async def criar_prescricao_substituicao_atomic(
         status_anterior = prescricao_original.status
         prescricao_original.prescricao_substituta_id = criado.id
         prescricao_original.status = PrescricaoStatusEnum.SUBSTITUIDA.value
-        _append_historico_status(
-            prescricao_original,
+        eventos = [auditoria_service.evento_status_prescricao(
+            prescricao_original.id,
             status_anterior,
             PrescricaoStatusEnum.SUBSTITUIDA.value,
             usuario_id,
             usuario_nome,
             dados.motivo
-        )
+        )]
 
         criado.prescricao_original_id = prescricao_original.id
         await prescricao_provider.atualizar_prescricao(prescricao_original, commit=False)
@@ -181,22 +229,18 @@ async def criar_prescricao_substituicao_atomic(
             ag.detalhes = detalhes
             flag_modified(ag, "detalhes")
 
-            historico_agendamento = list(ag.historico_alteracoes or [])
-            historico_agendamento.append({
-                "data": datetime.now().isoformat(),
-                "usuario_id": usuario_id,
-                "usuario_nome": usuario_nome,
-                "tipo_alteracao": "prescricao",
-                "campo": "prescricao_id",
-                "valor_antigo": prescricao_id_anterior,
-                "valor_novo": criado.id,
-                "motivo": dados.motivo
-            })
-            ag.historico_alteracoes = historico_agendamento
-            flag_modified(ag, "historico_alteracoes")
+            eventos.append(auditoria_service.evento_alteracao_agendamento(
+                ag.id, "prescricao", usuario_id, usuario_nome,
+                valor_antigo=prescricao_id_anterior,
+                valor_novo=criado.id,
+                campo="prescricao_id",
+                motivo=dados.motivo
+            ))
 
             await agendamento_provider.atualizar_agendamento(ag, commit=False)
 
+        await prescricao_provider.registrar_eventos_auditoria(eventos)
+
         await recalcular_status_prescricao(
             prescricao_provider,
             agendamento_provider,
@@ -205,25 +249,22 @@ async def criar_prescricao_substituicao_atomic(
             usuario_nome=usuario_nome,
             commit=False
         )
+        await prescricao_provider.atualizar_pendencias([prescricao_original.id])
 
     response = PrescricaoResponse.model_validate(criado)
     await session.commit()
     return response
 
 
-def _append_historico_status(prescricao: Prescricao, status_anterior: str, status_novo: str,
-                             usuario_id: Optional[str], usuario_nome: Optional[str], motivo: Optional[str] = None):
-    historico = list(prescricao.historico_status or [])
-    historico.append({
-        "data": datetime.now().isoformat(),
-        "usuario_id": usuario_id,
-        "usuario_nome": usuario_nome,
-        "status_anterior": status_anterior,
-        "status_novo": status_novo,
-        "motivo": motivo
-    })
-    prescricao.historico_status = historico
-    flag_modified(prescricao, "historico_status")
+def _derivar_status_prescricao(contagem: Dict[str, int]) -> str:
+    total = sum(contagem.values())
+    if not total:
+        return PrescricaoStatusEnum.PENDENTE.value
+    if contagem.get('concluido', 0) == total:
+        return PrescricaoStatusEnum.CONCLUIDA.value
+    if any(contagem.get(s) for s in STATUS_AGENDAMENTO_EM_CURSO):
+        return PrescricaoStatusEnum.EM_CURSO.value
+    return PrescricaoStatusEnum.AGENDADA.value
 
 
 async def recalcular_status_prescricao(
@@ -238,36 +279,55 @@ async def recalcular_status_prescricao(
     if not prescricao:
         return
 
-    if prescricao.status in [
-        PrescricaoStatusEnum.SUSPENSA.value,
-        PrescricaoStatusEnum.CANCELADA.value,
-        PrescricaoStatusEnum.SUBSTITUIDA.value
-    ]:
+    if prescricao.status not in STATUS_PRESCRICAO_FINAIS:
+        contagem = await agendamento_provider.contar_status_por_prescricao([prescricao_id])
+        novo_status = _derivar_status_prescricao(contagem.get(prescricao_id, {}))
+
+        if prescricao.status != novo_status:
+            status_anterior = prescricao.status
+            prescricao.status = novo_status
+            await prescricao_provider.registrar_eventos_auditoria([auditoria_service.evento_status_prescricao(
+                prescricao.id, status_anterior, novo_status, usuario_id, usuario_nome, motivo="Atualização automática"
+            )])
+
+    # Os fluxos de agendamento passam todos por aqui; é o ponto que mantém a tabela de pendências em dia.
+    await prescricao_provider.atualizar_pendencias([prescricao.id])
+    if commit:
+        await prescricao_provider.commit()
+
+
+async def recalcular_status_prescricoes_lote(
+        prescricao_provider: PrescricaoProviderInterface,
+        agendamento_provider: AgendamentoProviderInterface,
+        prescricao_ids: Iterable[str],
+        usuario_id: Optional[str] = "sistema",
+        usuario_nome: Optional[str] = "Sistema",
+        commit: bool = True
+):
+    ids = list({p_id for p_id in prescricao_ids if p_id})
+    if not ids:
         return
 
-    agendamentos = await agendamento_provider.listar_por_prescricao(prescricao_id, incluir_concluidos=True)
-    if not agendamentos:
-        novo_status = PrescricaoStatusEnum.PENDENTE.value
-    elif all(ag.status == 'concluido' for ag in agendamentos):
-        novo_status = PrescricaoStatusEnum.CONCLUIDA.value
-    elif any(ag.status in [
-        'em-triagem',
-        'em-infusao',
-        'intercorrencia',
-        'aguardando-consulta',
-        'aguardando-exame',
-        'aguardando-medicamento',
-        'internado'
-    ] for ag in agendamentos):
-        novo_status = PrescricaoStatusEnum.EM_CURSO.value
-    else:
-        novo_status = PrescricaoStatusEnum.AGENDADA.value
+    prescricoes = await prescricao_provider.obter_prescricao_multi(ids)
+    contagem = await agendamento_provider.contar_status_por_prescricao(ids)
 
-    if prescricao.status != novo_status:
-        status_anterior = prescricao.status
-        prescricao.status = novo_status
-        _append_historico_status(prescricao, status_anterior, novo_status, usuario_id, usuario_nome, motivo="Atualização automática")
-        await prescricao_provider.atualizar_prescricao(prescricao, commit=commit)
+    eventos = []
+    for prescricao in prescricoes:
+        if prescricao.status in STATUS_PRESCRICAO_FINAIS:
+            continue
+
+        novo_status = _derivar_status_prescricao(contagem.get(prescricao.id, {}))
+        if prescricao.status != novo_status:
+            status_anterior = prescricao.status
+            prescricao.status = novo_status
+            eventos.append(auditoria_service.evento_status_prescricao(
+                prescricao.id, status_anterior, novo_status, usuario_id, usuario_nome, motivo="Atualização automática"
+            ))
+
+    await prescricao_provider.registrar_eventos_auditoria(eventos)
+    await prescricao_provider.atualizar_pendencias(ids)
+    if commit:
+        await prescricao_provider.commit()
 
 
 async def atualizar_status_prescricao(
@@ -310,7 +370,9 @@ async def atualizar_status_prescricao(
             prescricao_substituta.prescricao_original_id = prescricao.id
             prescricao.status = status_novo
 
-            _append_historico_status(prescricao, status_anterior, status_novo, usuario_id, usuario_nome, dados.motivo)
+            eventos = [auditoria_service.evento_status_prescricao(
+                prescricao.id, status_anterior, status_novo, usuario_id, usuario_nome, dados.motivo
+            )]
             await prescricao_provider.atualizar_prescricao(prescricao, commit=False)
             await prescricao_provider.atualizar_prescricao(prescricao_substituta, commit=False)
 
@@ -336,22 +398,18 @@ async def atualizar_status_prescricao(
                 ag.detalhes = detalhes
                 flag_modified(ag, "detalhes")
 
-                historico_agendamento = list(ag.historico_alteracoes or [])
-                historico_agendamento.append({
-                    "data": datetime.now().isoformat(),
-                    "usuario_id": usuario_id,
-                    "usuario_nome": usuario_nome,
-                    "tipo_alteracao": "prescricao",
-                    "campo": "prescricao_id",
-                    "valor_antigo": prescricao_id_anterior,
-                    "valor_novo": dados.prescricao_substituta_id,
-                    "motivo": dados.motivo
-                })
-                ag.historico_alteracoes = historico_agendamento
-                flag_modified(ag, "historico_alteracoes")
+                eventos.append(auditoria_service.evento_alteracao_agendamento(
+                    ag.id, "prescricao", usuario_id, usuario_nome,
+                    valor_antigo=prescricao_id_anterior,
+                    valor_novo=dados.prescricao_substituta_id,
+                    campo="prescricao_id",
+                    motivo=dados.motivo
+                ))
 
                 await agendamento_provider.atualizar_agendamento(ag, commit=False)
 
+            await prescricao_provider.registrar_eventos_auditoria(eventos)
+
             await recalcular_status_prescricao(
                 prescricao_provider,
                 agendamento_provider,
@@ -360,13 +418,16 @@ async def atualizar_status_prescricao(
                 usuario_nome=usuario_nome,
                 commit=False
             )
+            await prescricao_provider.atualizar_pendencias([prescricao.id])
 
         return PrescricaoResponse.model_validate(prescricao)
 
     if status_novo in [PrescricaoStatusEnum.SUSPENSA.value, PrescricaoStatusEnum.CANCELADA.value]:
         prescricao.status = status_novo
-        _append_historico_status(prescricao, status_anterior, status_novo, usuario_id, usuario_nome, dados.motivo)
-        await prescricao_provider.atualizar_prescricao(prescricao)
+        eventos = [auditoria_service.evento_status_prescricao(
+            prescricao.id, status_anterior, status_novo, usuario_id, usuario_nome, dados.motivo
+        )]
+        await prescricao_provider.atualizar_prescricao(prescricao, commit=False)
 
         agendamentos = await agendamento_provider.listar_por_prescricao(prescricao.id, incluir_concluidos=False)
         for ag in agendamentos:
@@ -380,76 +441,163 @@ async def atualizar_status_prescricao(
             ag.detalhes = detalhes
             flag_modified(ag, "detalhes")
 
-            historico_agendamento = list(ag.historico_alteracoes or [])
-            historico_agendamento.append({
-                "data": datetime.now().isoformat(),
-                "usuario_id": usuario_id,
-                "usuario_nome": usuario_nome,
-                "tipo_alteracao": "status",
-                "campo": "status",
-                "valor_antigo": status_anterior_ag,
-                "valor_novo": "suspenso",
-                "motivo": dados.motivo
-            })
-            ag.historico_alteracoes = historico_agendamento
-            flag_modified(ag, "historico_alteracoes")
+            eventos.append(auditoria_service.evento_alteracao_agendamento(
+                ag.id, "status", usuario_id, usuario_nome,
+                valor_antigo=status_anterior_ag,
+                valor_novo="suspenso",
+                campo="status",
+                motivo=dados.motivo
+            ))
 
-            await agendamento_provider.atualizar_agendamento(ag)
+        await prescricao_provider.registrar_eventos_auditoria(eventos)
+        await prescricao_provider.atualizar_pendencias([prescricao.id])
+        await prescricao_provider.commit()
 
         return PrescricaoResponse.model_validate(prescricao)
 
     prescricao.status = status_novo
-    _append_historico_status(prescricao, status_anterior, status_novo, usuario_id, usuario_nome, dados.motivo)
-    atualizado = await prescricao_provider.atualizar_prescricao(prescricao)
+    await prescricao_provider.registrar_eventos_auditoria([auditoria_service.evento_status_prescricao(
+        prescricao.id, status_anterior, status_novo, usuario_id, usuario_nome, dados.motivo
+    )])
+    atualizado = await prescricao_provider.atualizar_prescricao(prescricao, commit=False)
+    await prescricao_provider.atualizar_pendencias([prescricao.id])
+    await prescricao_provider.commit()
     return PrescricaoResponse.model_validate(atualizado)
 
 
+TEMPLATE_PDF_PRESCRICAO = 'prescricao_pdf.html'
+LIMITE_PDF_LOTE = 200
+
+MAPA_CATEGORIAS_PDF = {
+    'pre_med': 'Pré-Medicação',
+    'qt': 'Terapia',
+    'pos_med_hospitalar': 'Pós-Medicação (Hospitalar)',
+    'pos_med_domiciliar': 'Pós-Medicação (Domiciliar)',
+    'infusor': 'Instalação de Infusor'
+}
+
+
+def _contexto_pdf_prescricao(prescricao_db: Prescricao, incluir_geracao: bool) -> dict:
+    # Cópia: o conteúdo da prescrição não deve receber os campos de apresentação.
+    dados_prescricao = copy.deepcopy(prescricao_db.conteudo)
+
+    for bloco in dados_prescricao['blocos']:
+        cat_codigo = bloco.get('categoria')
+        bloco['categoria_label'] = MAPA_CATEGORIAS_PDF.get(cat_codigo, cat_codigo.upper())
+
+        for item in bloco['itens']:
+            un = item.get('unidade', '')
+            item['unidade_formatada'] = un.split('/')[0] if '/' in un else 'mg' if 'AUC' in un else un
+
+    data_emissao_dt = datetime.fromisoformat(dados_prescricao['data_emissao'])
+    return {
+        "prescricao": dados_prescricao,
+        "data_formatada": data_emissao_dt.strftime("%d/%m/%Y"),
+        "data_hora_geracao": datetime.now().strftime("%d/%m/%Y às %H:%M") if incluir_geracao else None
+    }
+
+
+def _chave_pdf_prescricao(prescricao_db: Prescricao) -> str:
+    # O conteúdo não muda depois da emissão; uma substituição gera outra prescrição, com outra chave.
+    return chave_pdf(prescricao_db.id, prescricao_db.conteudo, versao_template(TEMPLATE_PDF_PRESCRICAO))
+
+
+async def _ler_pdf_prescricao(prescricao_db: Prescricao, chave: str) -> bytes:
+    pdf_file = await asyncio.to_thread(cache_pdf.ler, chave)
+    if pdf_file is not None:
+        return pdf_file
+    pdf_file = await renderizador_pdf.renderizar(TEMPLATE_PDF_PRESCRICAO, _contexto_pdf_prescricao(prescricao_db, False))
+    await asyncio.to_thread(cache_pdf.guardar, chave, pdf_file)
+    return pdf_file
+
+
 async def gerar_pdf_prescricao(
         prescricao_id: str,
         prescricao_provider: PrescricaoProviderInterface,
+        request: Request,
+        gerado_em: bool = False
 ):
     prescricao_db = await prescricao_provider.obter_prescricao(prescricao_id)
     if not prescricao_db:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Prescrição não encontrada")
 
-    dados_prescricao = prescricao_db.conteudo
+    disposicao = f"inline; filename=prescricao_{prescricao_id}.pdf"
 
-    mapa_categorias = {
-        'pre_med': 'Pré-Medicação',
-        'qt': 'Terapia',
-        'pos_med_hospitalar': 'Pós-Medicação (Hospitalar)',
-        'pos_med_domiciliar': 'Pós-Medicação (Domiciliar)',
-        'infusor': 'Instalação de Infusor'
-    }
+    # Com o rodapé de geração, cada PDF é único: renderiza na hora e não passa pelo cache.
+    if gerado_em:
+        pdf_file = await renderizador_pdf.renderizar(TEMPLATE_PDF_PRESCRICAO, _contexto_pdf_prescricao(prescricao_db, True))
+        return StreamingResponse(
+            io.BytesIO(pdf_file),
+            media_type="application/pdf",
+            headers={"Content-Disposition": disposicao, "Cache-Control": "no-store"}
+        )
 
-    for bloco in dados_prescricao['blocos']:
-        cat_codigo = bloco.get('categoria')
-        bloco['categoria_label'] = mapa_categorias.get(cat_codigo, cat_codigo.upper())
+    chave = _chave_pdf_prescricao(prescricao_db)
+    etag = f'"{chave}"'
+    # A URL não muda quando o template muda, então o navegador sempre revalida pelo ETag.
+    if etag_service.etag_corresponde(request, etag):
+        return etag_service.resposta_nao_modificada(etag)
 
-        for item in bloco['itens']:
-            un = item.get('unidade', '')
-            item['unidade_formatada'] = un.split('/')[0] if '/' in un else 'mg' if 'AUC' in un else un
+    pdf_file = await _ler_pdf_prescricao(prescricao_db, chave)
+    return StreamingResponse(
+        io.BytesIO(pdf_file),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": disposicao,
+            "ETag": etag,
+            "Cache-Control": etag_service.CACHE_CONTROL_REVALIDAR
+        }
+    )
 
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    templates_dir = os.path.join(base_dir, 'templates')
 
-    env = Environment(loader=FileSystemLoader(templates_dir))
-    template = env.get_template('prescricao_pdf.html')
+async def gerar_pdf_lote(
+        prescricao_provider: PrescricaoProviderInterface,
+        data: Optional[date] = None,
+        ids: Optional[List[str]] = None
+):
+    if bool(data) == bool(ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Informe a data ou a lista de ids")
 
-    data_emissao_dt = datetime.fromisoformat(dados_prescricao['data_emissao'])
-    data_formatada = data_emissao_dt.strftime("%d/%m/%Y")
-    hora_geracao = datetime.now().strftime("%d/%m/%Y às %H:%M")
+    if data:
+        prescricoes = await prescricao_provider.listar_para_impressao(data)
+        nome_arquivo = f"prescricoes_{data}"
+    else:
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > LIMITE_PDF_LOTE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No máximo {LIMITE_PDF_LOTE} prescrições por lote"
+            )
+        mapa = {p.id: p for p in await prescricao_provider.obter_prescricao_multi(ids)}
+        faltantes = [i for i in ids if i not in mapa]
+        if faltantes:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Prescrições não encontradas: {', '.join(faltantes)}"
+            )
+        prescricoes = [mapa[i] for i in ids]
+        nome_arquivo = "prescricoes_lote"
 
-    html_content = template.render(
-        prescricao=dados_prescricao,
-        data_formatada=data_formatada,
-        data_hora_geracao=hora_geracao
-    )
+    if not prescricoes:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Nenhuma prescrição para imprimir")
+
+    # Não ocupa mais processos do que o pool tem, para não estourar a fila dos demais PDFs do worker.
+    limite = asyncio.Semaphore(renderizador_pdf.processos)
+
+    # Os PDFs do lote ficam em memória: a limpeza do cache pode apagar os primeiros arquivos antes da concatenação.
+    async def _obter(prescricao_db: Prescricao) -> bytes:
+        chave = _chave_pdf_prescricao(prescricao_db)
+        pdf_file = await asyncio.to_thread(cache_pdf.ler, chave)
+        if pdf_file is not None:
+            return pdf_file
+        async with limite:
+            return await _ler_pdf_prescricao(prescricao_db, chave)
 
-    pdf_file = HTML(string=html_content).write_pdf()
+    pdfs = await asyncio.gather(*(_obter(p) for p in prescricoes))
+    pdf_file = await asyncio.to_thread(concatenar_pdfs, pdfs)
 
     return StreamingResponse(
         io.BytesIO(pdf_file),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"inline; filename=prescricao_{prescricao_id}.pdf"}
+        headers={"Content-Disposition": f"inline; filename={nome_arquivo}.pdf"}
     )
@@ -7,12 +7,18 @@ from sqlalchemy.orm.attributes import flag_modified
 from src.models.protocolo_model import Protocolo
 from src.providers.interfaces.protocolo_provider_interface import ProtocoloProviderInterface
 from src.schemas.protocolo_schema import ProtocoloCreate, ProtocoloUpdate, ProtocoloResponse
+from src.services import etag_service
 
 
 def _montar_resposta(protocolo: Protocolo) -> ProtocoloResponse:
     return ProtocoloResponse.model_validate(protocolo)
 
 
+async def obter_etag_protocolos(provider: ProtocoloProviderInterface, ativo: bool = None) -> str:
+    versao, total = await provider.obter_versao_catalogo()
+    return etag_service.gerar_etag("protocolos", ativo, versao, total)
+
+
 async def listar_protocolos(provider: ProtocoloProviderInterface, ativo: bool = None) -> List[ProtocoloResponse]:
     protocolos = await provider.listar_protocolos(ativo)
     return [_montar_resposta(p) for p in protocolos]
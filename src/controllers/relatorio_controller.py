@@ -1,39 +1,44 @@
 import io
-import os
+import uuid
 from collections import defaultdict
 from datetime import datetime, date
+from typing import Optional, Tuple
 
+from fastapi import HTTPException, status
 from fastapi.responses import StreamingResponse
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import HTML
+
+from src.models.relatorio_model import TrabalhoRelatorio
 
 from src.providers.interfaces.agendamento_provider_interface import AgendamentoProviderInterface
 from src.providers.interfaces.equipe_provider_interface import EquipeProviderInterface
 from src.providers.interfaces.prescricao_provider_interface import PrescricaoProviderInterface
+from src.providers.interfaces.relatorio_provider_interface import RelatorioProviderInterface
 from src.schemas.agendamento_schema import AgendamentoResponse, TipoAgendamento, TipoConsulta, AgendamentoStatusEnum, \
     TipoIntercorrencia, MotivoSuspensao, FarmaciaStatusEnum, MAPA_PROCEDIMENTOS, MAPA_MOTIVOS_SUSPENSAO
 from src.schemas.equipe_schema import EscalaPlantaoResponse, AusenciaProfissionalResponse
 from src.schemas.protocolo_schema import TipoTerapiaEnum
+from src.schemas.relatorio_schema import TrabalhoRelatorioCreate, TrabalhoRelatorioResponse, TipoRelatorioEnum, \
+    StatusTrabalhoEnum
+from src.services.ciclo_service import itens_do_dia
+from src.services.fila_relatorios_service import fila_relatorios
+from src.services.ocupacao_service import minutos_do_horario
+from src.services.pdf_service import renderizador_pdf
 
 
 def calcular_duracao_horas(inicio_str: str, fim_str: str) -> float:
     try:
-        fmt = "%H:%M"
-        t1 = datetime.strptime(inicio_str, fmt)
-        t2 = datetime.strptime(fim_str, fmt)
-        delta = t2 - t1
-        return delta.total_seconds() / 3600
-    except:
+        return (minutos_do_horario(fim_str) - minutos_do_horario(inicio_str)) / 60
+    except (ValueError, AttributeError):
         return 0.0
 
 
-async def gerar_relatorio_fim_plantao(
+async def _pdf_fim_plantao(
         data_inicio: date,
         data_fim: date,
         agendamento_provider: AgendamentoProviderInterface,
         prescricao_provider: PrescricaoProviderInterface,
         equipe_provider: EquipeProviderInterface
-):
+) -> Tuple[bytes, str]:
     agendamentos_orm = await agendamento_provider.listar_agendamentos(data_inicio=data_inicio, data_fim=data_fim)
     agendamentos = [AgendamentoResponse.model_validate(ag) for ag in agendamentos_orm]
     escala = []
@@ -157,36 +162,46 @@ async def gerar_relatorio_fim_plantao(
                                 if 'rituximabe' in nome_med:
                                     stats["rituximabe_especial"] += 1
 
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    templates_dir = os.path.join(base_dir, 'templates')
-    env = Environment(loader=FileSystemLoader(templates_dir))
-    template = env.get_template('relatorio_fim_plantao.html')
-
-    html_content = template.render(
-        data_formatada=data_inicio.strftime(
+    pdf_file = await renderizador_pdf.renderizar('relatorio_fim_plantao.html', {
+        "data_formatada": data_inicio.strftime(
             "%d/%m/%Y") if data_inicio == data_fim else f"{data_inicio.strftime('%d/%m/%Y')} a {data_fim.strftime('%d/%m/%Y')}",
-        data_hora_geracao=datetime.now().strftime("%d/%m/%Y às %H:%M"),
-        equipe=escala,
-        ausencias=ausencias,
-        stats=stats
-    )
-
-    pdf_file = HTML(string=html_content).write_pdf()
+        "data_hora_geracao": datetime.now().strftime("%d/%m/%Y às %H:%M"),
+        "equipe": escala,
+        "ausencias": ausencias,
+        "stats": stats
+    })
 
     nome_arquivo = f"plantao_{data_inicio}" if data_inicio == data_fim else f"plantao_{data_inicio}_{data_fim}"
+    return pdf_file, f"{nome_arquivo}.pdf"
+
+
+def _resposta_pdf(pdf_file: bytes, nome_arquivo: str) -> StreamingResponse:
     return StreamingResponse(
         io.BytesIO(pdf_file),
         media_type="application/pdf",
-        headers={"Content-Disposition": f"inline; filename={nome_arquivo}.pdf"}
+        headers={"Content-Disposition": f"inline; filename={nome_arquivo}"}
     )
 
 
-async def gerar_relatorio_medicacoes(
+async def gerar_relatorio_fim_plantao(
         data_inicio: date,
         data_fim: date,
         agendamento_provider: AgendamentoProviderInterface,
-        prescricao_provider: PrescricaoProviderInterface
+        prescricao_provider: PrescricaoProviderInterface,
+        equipe_provider: EquipeProviderInterface
 ):
+    pdf_file, nome_arquivo = await _pdf_fim_plantao(
+        data_inicio, data_fim, agendamento_provider, prescricao_provider, equipe_provider
+    )
+    return _resposta_pdf(pdf_file, nome_arquivo)
+
+
+async def _pdf_medicacoes(
+        data_inicio: date,
+        data_fim: date,
+        agendamento_provider: AgendamentoProviderInterface,
+        prescricao_provider: PrescricaoProviderInterface
+) -> Tuple[bytes, str]:
     agendamentos_orm = await agendamento_provider.listar_agendamentos(data_inicio=data_inicio, data_fim=data_fim)
     agendamentos = [AgendamentoResponse.model_validate(ag) for ag in agendamentos_orm]
 
@@ -219,77 +234,126 @@ async def gerar_relatorio_medicacoes(
         dia_ciclo_agendamento = ag.detalhes.infusao.dia_ciclo
         conteudo = prescricao.conteudo if isinstance(prescricao.conteudo, dict) else {}
 
-        if 'blocos' in conteudo and isinstance(conteudo['blocos'], list):
-            for bloco in conteudo['blocos']:
-                for item in bloco.get('itens', []):
-                    dias_item = item.get('dias_do_ciclo', [])
-                    if dia_ciclo_agendamento in dias_item:
-                        nome = item.get('medicamento')
-                        unidade_original = item.get('unidade', '')
-
-                        if unidade_original.upper() == 'AUC':
-                            unidade = 'mg'
-                        elif '/' in unidade_original:
-                            unidade = unidade_original.split('/')[0]
-                        else:
-                            unidade = unidade_original
-                        raw_dose = item.get('dose_final')
-
-                        try:
-                            if raw_dose is None or raw_dose == "":
-                                dose = 0.0
-                            else:
-                                if isinstance(raw_dose, str):
-                                    raw_dose = raw_dose.replace(',', '.')
-                                dose = float(raw_dose)
-                        except (ValueError, TypeError):
-                            dose = 0.0
-
-                        chave = f"{nome} - {unidade}"
-                        if chave not in resumo_meds:
-                            resumo_meds[chave] = {
-                                "nome": nome,
-                                "unidade": unidade,
-                                "qtd_prescrito": 0.0,
-                                "qtd_enviado": 0.0,
-                                "qtd_ausente": 0.0,
-                                "lista_enviados": [],
-                                "lista_ausentes": []
-                            }
-
-                        resumo_meds[chave]["qtd_prescrito"] = round(resumo_meds[chave]["qtd_prescrito"] + dose, 2)
-
-                        info_paciente = {
-                            "nome": nome_paciente,
-                            "dose": round(dose, 2)
-                        }
-
-                        if foi_enviado:
-                            resumo_meds[chave]["lista_enviados"].append(info_paciente)
-                            resumo_meds[chave]["qtd_enviado"] = round(resumo_meds[chave]["qtd_enviado"] + dose, 2)
-
-                        if eh_ausente:
-                            resumo_meds[chave]["lista_ausentes"].append(info_paciente)
-                            resumo_meds[chave]["qtd_ausente"] = round(resumo_meds[chave]["qtd_ausente"] + dose, 2)
+        for item in itens_do_dia(conteudo, prescricao.itens_por_dia, dia_ciclo_agendamento):
+            nome = item.get('medicamento')
+            unidade_original = item.get('unidade', '')
+
+            if unidade_original.upper() == 'AUC':
+                unidade = 'mg'
+            elif '/' in unidade_original:
+                unidade = unidade_original.split('/')[0]
+            else:
+                unidade = unidade_original
+            raw_dose = item.get('dose_final')
+
+            try:
+                if raw_dose is None or raw_dose == "":
+                    dose = 0.0
+                else:
+                    if isinstance(raw_dose, str):
+                        raw_dose = raw_dose.replace(',', '.')
+                    dose = float(raw_dose)
+            except (ValueError, TypeError):
+                dose = 0.0
+
+            chave = f"{nome} - {unidade}"
+            if chave not in resumo_meds:
+                resumo_meds[chave] = {
+                    "nome": nome,
+                    "unidade": unidade,
+                    "qtd_prescrito": 0.0,
+                    "qtd_enviado": 0.0,
+                    "qtd_ausente": 0.0,
+                    "lista_enviados": [],
+                    "lista_ausentes": []
+                }
+
+            resumo_meds[chave]["qtd_prescrito"] = round(resumo_meds[chave]["qtd_prescrito"] + dose, 2)
+
+            info_paciente = {
+                "nome": nome_paciente,
+                "dose": round(dose, 2)
+            }
+
+            if foi_enviado:
+                resumo_meds[chave]["lista_enviados"].append(info_paciente)
+                resumo_meds[chave]["qtd_enviado"] = round(resumo_meds[chave]["qtd_enviado"] + dose, 2)
+
+            if eh_ausente:
+                resumo_meds[chave]["lista_ausentes"].append(info_paciente)
+                resumo_meds[chave]["qtd_ausente"] = round(resumo_meds[chave]["qtd_ausente"] + dose, 2)
 
     lista_medicacoes = sorted(resumo_meds.values(), key=lambda x: x['nome'])
 
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    templates_dir = os.path.join(base_dir, 'templates')
-    env = Environment(loader=FileSystemLoader(templates_dir))
-    template = env.get_template('relatorio_medicacoes.html')
+    pdf_file = await renderizador_pdf.renderizar('relatorio_medicacoes.html', {
+        "data_inicio": data_inicio.strftime("%d/%m/%Y"),
+        "data_fim": data_fim.strftime("%d/%m/%Y"),
+        "data_hora_geracao": datetime.now().strftime("%d/%m/%Y às %H:%M"),
+        "medicacoes": lista_medicacoes
+    })
 
-    html_content = template.render(
-        data_inicio=data_inicio.strftime("%d/%m/%Y"),
-        data_fim=data_fim.strftime("%d/%m/%Y"),
-        data_hora_geracao=datetime.now().strftime("%d/%m/%Y às %H:%M"),
-        medicacoes=lista_medicacoes
-    )
+    return pdf_file, f"medicacoes_{data_inicio}.pdf"
 
-    pdf_file = HTML(string=html_content).write_pdf()
 
-    return StreamingResponse(
-        io.BytesIO(pdf_file),
-        media_type="application/pdf",
-        headers={"Content-Disposition": f"inline; filename=medicacoes_{data_inicio}.pdf"}
+async def gerar_relatorio_medicacoes(
+        data_inicio: date,
+        data_fim: date,
+        agendamento_provider: AgendamentoProviderInterface,
+        prescricao_provider: PrescricaoProviderInterface
+):
+    pdf_file, nome_arquivo = await _pdf_medicacoes(data_inicio, data_fim, agendamento_provider, prescricao_provider)
+    return _resposta_pdf(pdf_file, nome_arquivo)
+
+
+async def criar_trabalho(
+        dados: TrabalhoRelatorioCreate,
+        relatorio_provider: RelatorioProviderInterface,
+        usuario_id: Optional[str]
+) -> TrabalhoRelatorioResponse:
+    trabalho = TrabalhoRelatorio(
+        id=str(uuid.uuid4()),
+        tipo=dados.tipo,
+        parametros={"data_inicio": dados.data_inicio.isoformat(), "data_fim": dados.data_fim.isoformat()},
+        status=StatusTrabalhoEnum.PENDENTE.value,
+        tentativas=0,
+        criado_por_id=usuario_id,
+        criado_em=datetime.now()
     )
+    await relatorio_provider.criar_trabalho(trabalho)
+    fila_relatorios.notificar()
+    return TrabalhoRelatorioResponse.model_validate(trabalho)
+
+
+async def obter_trabalho(trabalho_id: str, relatorio_provider: RelatorioProviderInterface) -> TrabalhoRelatorioResponse:
+    trabalho = await relatorio_provider.obter_trabalho(trabalho_id)
+    if not trabalho:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Relatório não encontrado ou expirado")
+    return TrabalhoRelatorioResponse.model_validate(trabalho)
+
+
+async def baixar_trabalho(trabalho_id: str, relatorio_provider: RelatorioProviderInterface):
+    trabalho = await relatorio_provider.obter_trabalho(trabalho_id, com_arquivo=True)
+    if not trabalho:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Relatório não encontrado ou expirado")
+    if trabalho.status != StatusTrabalhoEnum.CONCLUIDO.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Relatório ainda não disponível (status: {trabalho.status})"
+        )
+    return _resposta_pdf(trabalho.arquivo, trabalho.nome_arquivo)
+
+
+async def executar_trabalho(
+        trabalho: TrabalhoRelatorio,
+        agendamento_provider: AgendamentoProviderInterface,
+        prescricao_provider: PrescricaoProviderInterface,
+        equipe_provider: EquipeProviderInterface
+) -> Tuple[bytes, str]:
+    data_inicio = date.fromisoformat(trabalho.parametros["data_inicio"])
+    data_fim = date.fromisoformat(trabalho.parametros["data_fim"])
+
+    if trabalho.tipo == TipoRelatorioEnum.FIM_PLANTAO.value:
+        return await _pdf_fim_plantao(data_inicio, data_fim, agendamento_provider, prescricao_provider, equipe_provider)
+    if trabalho.tipo == TipoRelatorioEnum.MEDICACOES.value:
+        return await _pdf_medicacoes(data_inicio, data_fim, agendamento_provider, prescricao_provider)
+    raise ValueError(f"Tipo de relatório desconhecido: {trabalho.tipo}")
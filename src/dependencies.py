@@ -9,6 +9,7 @@ from src.providers.implementations.paciente_sqlalchemy_provider import PacienteS
 from src.providers.implementations.paciente_legacy_provider import PacienteLegacyProvider
 from src.providers.implementations.prescricao_sqlalchemy_provider import PrescricaoSQLAlchemyProvider
 from src.providers.implementations.protocolo_sqlalchemy_provider import ProtocoloSQLAlchemyProvider
+from src.providers.implementations.relatorio_sqlalchemy_provider import RelatorioSQLAlchemyProvider
 from src.providers.interfaces.agendamento_provider_interface import AgendamentoProviderInterface
 from src.providers.interfaces.auth_provider_interface import AuthProviderInterface
 from src.providers.interfaces.configuracao_provider_interface import ConfiguracaoProviderInterface
@@ -16,6 +17,7 @@ from src.providers.interfaces.equipe_provider_interface import EquipeProviderInt
 from src.providers.interfaces.paciente_provider_interface import PacienteProviderInterface
 from src.providers.interfaces.prescricao_provider_interface import PrescricaoProviderInterface
 from src.providers.interfaces.protocolo_provider_interface import ProtocoloProviderInterface
+from src.providers.interfaces.relatorio_provider_interface import RelatorioProviderInterface
 from src.resources.database import get_app_db_session
 from src.resources.database_aghu import get_aghu_db_session
 
@@ -40,6 +42,10 @@ def get_prescricao_provider(session: AsyncSession = Depends(get_app_db_session))
     return PrescricaoSQLAlchemyProvider(session=session)
 
 
+def get_relatorio_provider(session: AsyncSession = Depends(get_app_db_session)) -> RelatorioProviderInterface:
+    return RelatorioSQLAlchemyProvider(session=session)
+
+
 def get_configuracao_provider(session: AsyncSession = Depends(get_app_db_session)) -> ConfiguracaoProviderInterface:
     return ConfiguracaoSQLAlchemyProvider(session=session)
 
@@ -9,13 +9,22 @@ from fastapi.staticfiles import StaticFiles
 from src.resources.database import app_engine
 from src.resources.database_aghu import aghu_engine
 from src.routers import auth_router, agendamento_router, configuracao_router, paciente_router, prescricao_router, protocolo_router, equipe_router, relatorio_router
+from src.controllers import relatorio_controller
+from src.services.eventos_service import eventos_agendamento
+from src.services.fila_relatorios_service import fila_relatorios
+from src.services.pdf_service import renderizador_pdf
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Iniciando aplicação...")
+    await eventos_agendamento.iniciar()
+    await fila_relatorios.iniciar(relatorio_controller.executar_trabalho)
     yield
     print("Encerrando conexões com o banco de dados...")
+    await fila_relatorios.encerrar()
+    await eventos_agendamento.encerrar()
+    renderizador_pdf.encerrar()
     await app_engine.dispose()
     await aghu_engine.dispose()
     print("Conexões encerradas.")
@@ -29,9 +38,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 app.include_router(agendamento_router.router)
+app.include_router(agendamento_router.stream_router)
 app.include_router(auth_router.router)
 app.include_router(configuracao_router.router)
 app.include_router(equipe_router.router)
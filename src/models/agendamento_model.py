@@ -1,9 +1,39 @@
-from sqlalchemy import Column, Integer, String, Boolean, Text, Date, JSON, ForeignKey
+from datetime import time
+
+from sqlalchemy import Column, Integer, String, Boolean, Text, Date, JSON, ForeignKey, BigInteger, DateTime, Sequence, \
+    func, Computed, Index, Time, TypeDecorator, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 
 from src.resources.database import Base
 
+agendamentos_versao_seq = Sequence("agendamentos_versao_seq", metadata=Base.metadata)
+
+# Id da transação que gravou a linha. O cursor da sincronização é o xmin do snapshot, que nunca passa à frente
+# de uma transação ainda aberta; com a versão (sequência), um commit fora de ordem faria o cliente pular linhas.
+TRANSACAO_ATUAL_SQL = "pg_current_xact_id()::text::bigint"
+
+# Um único agendamento ativo por dia do ciclo de cada prescrição; o nome é usado para traduzir a violação em 409.
+INDICE_DIA_CICLO_ATIVO = "uq_agendamentos_prescricao_dia_ativo"
+
+
+class Horario(TypeDecorator):
+    """Horário do dia gravado como TIME; para o restante da aplicação continua sendo a string "HH:MM"."""
+
+    impl = Time
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, time):
+            return value
+        horas, minutos = value.split(":")[:2]
+        return time(int(horas), int(minutos))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return value.strftime("%H:%M")
+
 
 class Agendamento(Base):
     __tablename__ = "agendamentos"
@@ -14,15 +44,83 @@ class Agendamento(Base):
     tipo = Column(String, nullable=False)
     data = Column(Date, nullable=False, index=True)
     turno = Column(String, nullable=False)
-    horario_inicio = Column(String, nullable=False)
-    horario_fim = Column(String, nullable=False)
+    horario_inicio = Column(Horario, nullable=False)
+    horario_fim = Column(Horario, nullable=False)
     encaixe = Column(Boolean, default=False)
     checkin = Column(Boolean, default=False)
     status = Column(String, default='agendado')
     observacoes = Column(Text, nullable=True)
     tags = Column(JSON, nullable=True)
     detalhes = Column(JSONB, nullable=True)
-    historico_alteracoes = Column(JSONB, nullable=True, default=list)
+    poltrona = Column(Integer, nullable=True)
+
+    # Derivadas de detalhes.infusao pelo próprio banco, para indexar o vínculo com a prescrição.
+    prescricao_id = Column(String, Computed("detalhes -> 'infusao' ->> 'prescricao_id'", persisted=True))
+    dia_ciclo = Column(Integer, Computed("(detalhes -> 'infusao' ->> 'dia_ciclo')::integer", persisted=True))
+
+    # Toda escrita via ORM consome um novo valor da sequência; entra no ETag das listagens.
+    versao = Column(
+        BigInteger,
+        nullable=False,
+        index=True,
+        server_default=agendamentos_versao_seq.next_value(),
+        onupdate=agendamentos_versao_seq.next_value()
+    )
+    atualizado_em = Column(DateTime, nullable=False, server_default=func.now(), onupdate=func.now())
+    transacao = Column(
+        BigInteger,
+        nullable=False,
+        index=True,
+        server_default=text(TRANSACAO_ATUAL_SQL),
+        onupdate=text(TRANSACAO_ATUAL_SQL)
+    )
 
     paciente = relationship("Paciente", back_populates="agendamentos")
     criado_por = relationship("User")
+
+    __table_args__ = (
+        Index("ix_agendamentos_prescricao_dia", "prescricao_id", "dia_ciclo"),
+        Index("ix_agendamentos_paciente_data", "paciente_id", "data"),
+        Index(
+            INDICE_DIA_CICLO_ATIVO,
+            "prescricao_id",
+            "dia_ciclo",
+            unique=True,
+            postgresql_where=text("status NOT IN ('suspenso', 'remarcado')")
+        ),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
+
+class ContadorStatusPrescricao(Base):
+    """Quantidade de agendamentos de cada prescrição por status.
+
+    Mantida pelo trigger contar_status_prescricao (ver migrações) na mesma transação da escrita do agendamento;
+    o status derivado da prescrição sai daqui sem listar os agendamentos.
+    """
+
+    __tablename__ = "contadores_status_prescricao"
+
+    prescricao_id = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+
+
+class MovimentoAgendamento(Base):
+    """Data e paciente que um agendamento deixou para trás ao ser alterado.
+
+    Gravado pelo trigger registrar_movimento_agendamento (ver migrações); a sincronização incremental usa estes
+    registros para mandar remover o agendamento de quem acompanha o período ou o paciente antigo.
+    """
+
+    __tablename__ = "movimentos_agendamento"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    agendamento_id = Column(String, nullable=False)
+    data_origem = Column(Date, nullable=False)
+    paciente_origem = Column(String, nullable=True)
+    transacao = Column(BigInteger, nullable=False, server_default=text(TRANSACAO_ATUAL_SQL))
+
+    __table_args__ = (
+        Index("ix_movimentos_agendamento_transacao", "transacao", "data_origem"),
+    )
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import Column, BigInteger, String, Text, DateTime, Index
+
+from src.resources.database import Base
+
+
+class EventoAuditoria(Base):
+    __tablename__ = "eventos_auditoria"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    entidade = Column(String, nullable=False)
+    entidade_id = Column(String, nullable=False)
+    categoria = Column(String, nullable=False)
+    tipo = Column(String, nullable=True)
+    campo = Column(String, nullable=True)
+    valor_antigo = Column(Text, nullable=True)
+    valor_novo = Column(Text, nullable=True)
+    motivo = Column(Text, nullable=True)
+    referencia_id = Column(String, nullable=True)
+    usuario_id = Column(String, nullable=True)
+    usuario_nome = Column(String, nullable=True)
+    data = Column(DateTime, nullable=False, default=datetime.now)
+
+    __table_args__ = (
+        Index("ix_eventos_auditoria_entidade", "entidade", "entidade_id", "data"),
+    )
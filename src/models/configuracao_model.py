@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, JSON, Float
+from sqlalchemy import Column, Integer, String, JSON, Float, BigInteger, Sequence
 
 from src.resources.database import Base
 
+configuracoes_versao_seq = Sequence("configuracoes_versao_seq", metadata=Base.metadata)
+
 
 class Configuracao(Base):
     __tablename__ = "configuracoes"
@@ -15,3 +17,11 @@ class Configuracao(Base):
     cargos = Column(JSON, default=[])
     funcoes = Column(JSON, default=[])
     diluentes = Column(JSON, default=[])
+    versao = Column(
+        BigInteger,
+        nullable=False,
+        server_default=configuracoes_versao_seq.next_value(),
+        onupdate=configuracoes_versao_seq.next_value()
+    )
+
+    __mapper_args__ = {"eager_defaults": True}
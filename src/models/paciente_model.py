@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, Text, Date, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Float, Text, Date, ForeignKey, DateTime, func, BigInteger, Sequence
 from sqlalchemy.orm import relationship
 
 from src.resources.database import Base
 
+pacientes_versao_seq = Sequence("pacientes_versao_seq", metadata=Base.metadata)
+
 
 class Paciente(Base):
     __tablename__ = "pacientes"
@@ -19,6 +21,13 @@ class Paciente(Base):
     peso = Column(Float, nullable=True)
     altura = Column(Float, nullable=True)
     observacoes_clinicas = Column(Text, nullable=True)
+    # Os agendamentos embutem nome, registro e observações do paciente; entra no ETag das listagens.
+    versao = Column(
+        BigInteger,
+        nullable=False,
+        server_default=pacientes_versao_seq.next_value(),
+        onupdate=pacientes_versao_seq.next_value()
+    )
 
     contatos_emergencia = relationship("ContatoEmergencia", back_populates="paciente", cascade="all, delete-orphan")
     agendamentos = relationship("Agendamento", back_populates="paciente")
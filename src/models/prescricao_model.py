@@ -1,12 +1,14 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, String, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, String, DateTime, ForeignKey, BigInteger, Sequence, Integer, Index, Date
+from sqlalchemy.dialects.postgresql import JSONB, ARRAY
 from sqlalchemy.orm import relationship
 
 from src.resources.database import Base
 
+prescricoes_versao_seq = Sequence("prescricoes_versao_seq", metadata=Base.metadata)
+
 
 class Prescricao(Base):
     __tablename__ = "prescricoes"
@@ -17,10 +19,39 @@ class Prescricao(Base):
     data_emissao = Column(DateTime, default=datetime.now)
     status = Column(String, default="pendente")
     conteudo = Column(JSONB, nullable=False)
-    historico_status = Column(JSONB, nullable=True, default=list)
-    historico_agendamentos = Column(JSONB, nullable=True, default=list)
+    # Derivados de conteudo.blocos por ciclo_service.indexar_dias_ciclo.
+    dias_com_medicacao = Column(ARRAY(Integer), nullable=False, server_default="{}")
+    itens_por_dia = Column(JSONB, nullable=True)
     prescricao_substituta_id = Column(String, ForeignKey("prescricoes.id"), nullable=True)
     prescricao_original_id = Column(String, ForeignKey("prescricoes.id"), nullable=True)
+    versao = Column(
+        BigInteger,
+        nullable=False,
+        index=True,
+        server_default=prescricoes_versao_seq.next_value(),
+        onupdate=prescricoes_versao_seq.next_value()
+    )
 
     paciente = relationship("Paciente", back_populates="prescricoes")
     medico = relationship("User")
+
+    __table_args__ = (
+        Index("ix_prescricoes_dias_com_medicacao", "dias_com_medicacao", postgresql_using="gin"),
+    )
+    __mapper_args__ = {"eager_defaults": True}
+
+
+class PendenciaCiclo(Base):
+    """Dias do ciclo de prescrições ativas ainda sem agendamento ativo.
+
+    Mantida pelos fluxos de escrita de agendamentos e prescrições (PrescricaoProvider.atualizar_pendencias),
+    para que a lista de pendências não precise cruzar todas as prescrições com a agenda a cada consulta.
+    """
+
+    __tablename__ = "pendencias_ciclo"
+
+    prescricao_id = Column(String, ForeignKey("prescricoes.id", ondelete="CASCADE"), primary_key=True)
+    dia_ciclo = Column(Integer, primary_key=True)
+    paciente_id = Column(String, ForeignKey("pacientes.id"), nullable=False)
+    # Data em que o dia deveria acontecer, contada a partir do Dia 1 agendado (ou da emissão, se nada foi agendado).
+    data_prevista = Column(Date, nullable=False, index=True)
@@ -1,10 +1,12 @@
 import uuid
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Text, Boolean, JSON, BigInteger, Sequence
 from sqlalchemy.dialects.postgresql import JSONB
 
 from src.resources.database import Base
 
+protocolos_versao_seq = Sequence("protocolos_versao_seq", metadata=Base.metadata)
+
 
 class Protocolo(Base):
     __tablename__ = "protocolos"
@@ -24,3 +26,11 @@ class Protocolo(Base):
     ativo = Column(Boolean, default=True)
 
     templates_ciclo = Column(JSONB, nullable=False)
+    versao = Column(
+        BigInteger,
+        nullable=False,
+        server_default=protocolos_versao_seq.next_value(),
+        onupdate=protocolos_versao_seq.next_value()
+    )
+
+    __mapper_args__ = {"eager_defaults": True}
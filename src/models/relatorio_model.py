@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlalchemy import Column, String, Text, Integer, DateTime, LargeBinary, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import deferred
+
+from src.resources.database import Base
+
+
+class TrabalhoRelatorio(Base):
+    """
+    Relatório pedido para geração em segundo plano.
+    Fica no banco para sobreviver a reinícios e ser processado por qualquer worker; o PDF pronto é guardado
+    junto até expirar.
+    """
+    __tablename__ = "trabalhos_relatorio"
+
+    id = Column(String, primary_key=True)
+    tipo = Column(String, nullable=False)
+    parametros = Column(JSONB, nullable=False)
+    status = Column(String, nullable=False, default="pendente")
+    tentativas = Column(Integer, nullable=False, default=0)
+    # Espera antes de uma nova tentativa; nulo quando o trabalho pode ser reservado imediatamente.
+    disponivel_em = Column(DateTime, nullable=True)
+    erro = Column(Text, nullable=True)
+    nome_arquivo = Column(String, nullable=True)
+    arquivo = deferred(Column(LargeBinary, nullable=True))
+    criado_por_id = Column(String, nullable=True)
+    criado_em = Column(DateTime, nullable=False, default=datetime.now)
+    iniciado_em = Column(DateTime, nullable=True)
+    concluido_em = Column(DateTime, nullable=True)
+    expira_em = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_trabalhos_relatorio_fila", "status", "criado_em"),
+        Index("ix_trabalhos_relatorio_expira_em", "expira_em"),
+    )
@@ -1,12 +1,19 @@
-from datetime import date
-from typing import List, Optional
+from datetime import date, datetime
+from typing import List, Optional, Tuple, Dict
 
-from sqlalchemy import select
+from sqlalchemy import select, func, literal, Text, insert, update, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from src.models.agendamento_model import Agendamento
+from src.models.agendamento_model import Agendamento, ContadorStatusPrescricao, MovimentoAgendamento
+from src.models.auditoria_model import EventoAuditoria
+from src.models.auth_model import User
+from src.models.paciente_model import Paciente
 from src.providers.interfaces.agendamento_provider_interface import AgendamentoProviderInterface
+from src.services.auditoria_service import ENTIDADE_AGENDAMENTO
+from src.services.ocupacao_service import STATUS_FORA_DA_CAPACIDADE
 
 
 class AgendamentoSQLAlchemyProvider(AgendamentoProviderInterface):
@@ -16,9 +23,12 @@ class AgendamentoSQLAlchemyProvider(AgendamentoProviderInterface):
     async def commit(self):
         await self.session.commit()
 
-    async def listar_agendamentos(self, data_inicio: Optional[date] = None, data_fim: Optional[date] = None, paciente_id: Optional[str] = None) -> List[Agendamento]:
+    async def listar_agendamentos(self, data_inicio: Optional[date] = None, data_fim: Optional[date] = None, paciente_id: Optional[str] = None,
+                                  alterados_desde: Optional[int] = None) -> List[Agendamento]:
         query = select(Agendamento).options(selectinload(Agendamento.paciente), selectinload(Agendamento.criado_por))
 
+        if alterados_desde is not None:
+            query = query.where(Agendamento.transacao >= alterados_desde)
         if data_inicio:
             query = query.where(Agendamento.data >= data_inicio)
         if data_fim:
@@ -31,6 +41,151 @@ class AgendamentoSQLAlchemyProvider(AgendamentoProviderInterface):
         result = await self.session.execute(query)
         return result.scalars().all()
 
+    async def listar_agendamentos_resumidos(self, data_inicio: Optional[date] = None, data_fim: Optional[date] = None,
+                                            paciente_id: Optional[str] = None, tipo: Optional[str] = None) -> List[dict]:
+        # Projeção sem detalhes.historico_prescricoes, que só interessa à visão completa.
+        detalhes_resumo = Agendamento.detalhes.op("-", return_type=JSONB)(literal("historico_prescricoes", Text))
+
+        query = select(
+            Agendamento.id,
+            Agendamento.criado_por_id,
+            Agendamento.paciente_id,
+            Agendamento.tipo,
+            Agendamento.data,
+            Agendamento.turno,
+            Agendamento.horario_inicio,
+            Agendamento.horario_fim,
+            Agendamento.checkin,
+            Agendamento.status,
+            Agendamento.encaixe,
+            Agendamento.observacoes,
+            Agendamento.tags,
+            Agendamento.poltrona,
+            detalhes_resumo.label("detalhes"),
+            Paciente.nome.label("paciente_nome"),
+            Paciente.registro.label("paciente_registro"),
+            Paciente.observacoes_clinicas.label("paciente_observacoes_clinicas"),
+            User.username.label("criado_por_username"),
+            User.display_name.label("criado_por_display_name"),
+        ).outerjoin(Paciente, Paciente.id == Agendamento.paciente_id).outerjoin(User, User.username == Agendamento.criado_por_id)
+
+        if data_inicio:
+            query = query.where(Agendamento.data >= data_inicio)
+        if data_fim:
+            query = query.where(Agendamento.data <= data_fim)
+        if paciente_id:
+            query = query.where(Agendamento.paciente_id == paciente_id)
+        if tipo:
+            query = query.where(Agendamento.tipo == tipo)
+
+        query = query.order_by(Agendamento.data, Agendamento.horario_inicio)
+
+        result = await self.session.execute(query)
+
+        agendamentos = []
+        for row in result.mappings():
+            item = dict(row)
+            nome = item.pop("paciente_nome")
+            registro = item.pop("paciente_registro")
+            observacoes_clinicas = item.pop("paciente_observacoes_clinicas")
+            username = item.pop("criado_por_username")
+            display_name = item.pop("criado_por_display_name")
+
+            item["detalhes"] = item["detalhes"] or {}
+            item["paciente"] = {
+                "id": item["paciente_id"],
+                "nome": nome,
+                "registro": registro,
+                "observacoes_clinicas": observacoes_clinicas,
+            } if nome is not None else None
+            item["criado_por"] = {"username": username, "display_name": display_name} if username else None
+            agendamentos.append(item)
+
+        return agendamentos
+
+    async def contar_ocupacao(self, data_inicio: date, data_fim: date) -> List[dict]:
+        query = select(
+            Agendamento.data,
+            Agendamento.turno,
+            Agendamento.tipo,
+            Agendamento.horario_inicio,
+            Agendamento.horario_fim,
+            func.count(Agendamento.id).label("total")
+        ).where(
+            Agendamento.data >= data_inicio,
+            Agendamento.data <= data_fim,
+            Agendamento.status.notin_(STATUS_FORA_DA_CAPACIDADE)
+        ).group_by(
+            Agendamento.data,
+            Agendamento.turno,
+            Agendamento.tipo,
+            Agendamento.horario_inicio,
+            Agendamento.horario_fim
+        )
+
+        result = await self.session.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    async def contar_resumo_calendario(self, data_inicio: date, data_fim: date) -> List[dict]:
+        query = select(
+            Agendamento.data,
+            Agendamento.tipo,
+            Agendamento.status,
+            Agendamento.encaixe,
+            func.count(Agendamento.id).label("total")
+        ).where(
+            Agendamento.data >= data_inicio,
+            Agendamento.data <= data_fim
+        ).group_by(Agendamento.data, Agendamento.tipo, Agendamento.status, Agendamento.encaixe)
+
+        result = await self.session.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    async def bloquear_dia(self, dia: date):
+        # Serializa as verificações de capacidade do mesmo dia até o fim da transação.
+        await self.session.execute(select(func.pg_advisory_xact_lock(dia.toordinal())))
+
+    async def obter_cursor_sincronizacao(self) -> int:
+        # Toda transação abaixo do xmin já terminou: o que ela gravou está visível para as consultas seguintes.
+        result = await self.session.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"))
+        return result.scalar_one()
+
+    async def obter_versao_periodo(self, data_inicio: Optional[date] = None, data_fim: Optional[date] = None,
+                                   paciente_id: Optional[str] = None) -> Tuple[int, int, int, Optional[datetime]]:
+        # A contagem cobre agendamentos que saíram do período sem alterar a maior versão restante.
+        # Paciente e criador vêm embutidos nas respostas, então as versões deles entram junto.
+        query = select(
+            func.coalesce(func.max(Agendamento.versao), 0),
+            func.count(Agendamento.id),
+            func.coalesce(func.max(Paciente.versao), 0),
+            func.max(User.updated_at)
+        ).select_from(Agendamento).join(Paciente, Agendamento.paciente_id == Paciente.id).outerjoin(
+            User, Agendamento.criado_por_id == User.username
+        )
+        if data_inicio:
+            query = query.where(Agendamento.data >= data_inicio)
+        if data_fim:
+            query = query.where(Agendamento.data <= data_fim)
+        if paciente_id:
+            query = query.where(Agendamento.paciente_id == paciente_id)
+
+        result = await self.session.execute(query)
+        versao, total, versao_pacientes, atualizacao_usuarios = result.one()
+        return versao, total, versao_pacientes, atualizacao_usuarios
+
+    async def listar_ids_movidos_desde(self, transacao: int, data_inicio: Optional[date] = None, data_fim: Optional[date] = None,
+                                       paciente_id: Optional[str] = None) -> List[str]:
+        query = select(MovimentoAgendamento.agendamento_id).where(MovimentoAgendamento.transacao >= transacao).distinct()
+        if data_inicio:
+            query = query.where(MovimentoAgendamento.data_origem >= data_inicio)
+        if data_fim:
+            query = query.where(MovimentoAgendamento.data_origem <= data_fim)
+        if paciente_id:
+            query = query.where(MovimentoAgendamento.paciente_origem == paciente_id)
+
+        result = await self.session.execute(query)
+        return result.scalars().all()
+
     async def obter_agendamento(self, agendamento_id: str) -> Optional[Agendamento]:
         query = select(Agendamento).where(Agendamento.id == agendamento_id).options(selectinload(Agendamento.paciente), selectinload(Agendamento.criado_por))
         result = await self.session.execute(query)
@@ -42,27 +197,87 @@ class AgendamentoSQLAlchemyProvider(AgendamentoProviderInterface):
         return result.scalars().all()
 
 
-    async def buscar_por_prescricao_e_dia(self, prescricao_id: str, dia_ciclo: int) -> List[Agendamento]:
-        query = select(Agendamento).where(
-            Agendamento.detalhes['infusao']['prescricao_id'].astext == prescricao_id,
-            Agendamento.detalhes['infusao']['dia_ciclo'].as_integer() == dia_ciclo
-        )
+    async def listar_por_prescricao(self, prescricao_id: str, incluir_concluidos: bool = True) -> List[Agendamento]:
+        query = select(Agendamento).where(Agendamento.prescricao_id == prescricao_id)
+
+        if not incluir_concluidos:
+            query = query.where(Agendamento.status != 'concluido')
 
         result = await self.session.execute(query)
         return result.scalars().all()
 
 
-    async def listar_por_prescricao(self, prescricao_id: str, incluir_concluidos: bool = True) -> List[Agendamento]:
-        query = select(Agendamento).where(
-            Agendamento.detalhes['infusao']['prescricao_id'].as_string() == prescricao_id
+    async def contar_status_por_prescricao(self, prescricao_ids: List[str]) -> Dict[str, Dict[str, int]]:
+        if not prescricao_ids:
+            return {}
+        # Os contadores são atualizados por trigger: o que ainda está só na sessão precisa ir ao banco antes.
+        await self.session.flush()
+
+        query = select(
+            ContadorStatusPrescricao.prescricao_id,
+            ContadorStatusPrescricao.status,
+            ContadorStatusPrescricao.total
+        ).where(
+            ContadorStatusPrescricao.prescricao_id.in_(prescricao_ids),
+            ContadorStatusPrescricao.total > 0
         )
+        result = await self.session.execute(query)
 
-        if not incluir_concluidos:
-            query = query.where(Agendamento.status != 'concluido')
+        contagem = {}
+        for prescricao_id, status, total in result.all():
+            contagem.setdefault(prescricao_id, {})[status] = total
+        return contagem
+
+
+    async def listar_infusoes_por_data(self, datas: List[date]) -> List[Agendamento]:
+        if not datas:
+            return []
+
+        query = select(Agendamento).where(
+            Agendamento.data.in_(datas),
+            Agendamento.tipo == "infusao",
+            Agendamento.status.notin_(STATUS_FORA_DA_CAPACIDADE)
+        ).order_by(Agendamento.data, Agendamento.horario_inicio)
 
         result = await self.session.execute(query)
         return result.scalars().all()
 
+    async def buscar_sobreposicao_paciente(
+            self,
+            paciente_id: str,
+            dia: date,
+            horario_inicio: str,
+            horario_fim: str,
+            ignorar_ids: List[str]
+    ) -> Optional[Agendamento]:
+        # Sonda o índice (paciente_id, data); o paciente tem poucos agendamentos no dia para filtrar o horário.
+        query = select(Agendamento).where(
+            Agendamento.paciente_id == paciente_id,
+            Agendamento.data == dia,
+            Agendamento.horario_inicio < horario_fim,
+            Agendamento.horario_fim > horario_inicio,
+            Agendamento.status.notin_(STATUS_FORA_DA_CAPACIDADE)
+        ).order_by(Agendamento.horario_inicio).limit(1)
+
+        if ignorar_ids:
+            query = query.where(Agendamento.id.notin_(ignorar_ids))
+
+        result = await self.session.execute(query)
+        return result.scalars().first()
+
+    async def registrar_eventos_auditoria(self, eventos: List[dict]):
+        if not eventos:
+            return
+        await self.session.execute(insert(EventoAuditoria), eventos)
+
+    async def listar_eventos_auditoria(self, agendamento_id: str) -> List[EventoAuditoria]:
+        query = select(EventoAuditoria).where(
+            EventoAuditoria.entidade == ENTIDADE_AGENDAMENTO,
+            EventoAuditoria.entidade_id == agendamento_id
+        ).order_by(EventoAuditoria.data, EventoAuditoria.id)
+
+        result = await self.session.execute(query)
+        return result.scalars().all()
 
     async def criar_agendamento(self, agendamento: Agendamento, commit: bool = True) -> Agendamento:
         self.session.add(agendamento)
@@ -70,8 +285,31 @@ class AgendamentoSQLAlchemyProvider(AgendamentoProviderInterface):
             await self.session.commit()
             await self.session.refresh(agendamento)
             return await self.obter_agendamento(agendamento.id)
+        # O flush antecipa violações de unicidade para antes do restante da transação.
+        await self.session.flush()
         return agendamento
 
+    async def criar_agendamentos_em_lote(self, valores: List[dict]) -> List[Agendamento]:
+        if not valores:
+            return []
+
+        result = await self.session.scalars(insert(Agendamento).returning(Agendamento), valores)
+        criados = result.all()
+
+        # Paciente e usuário costumam já estar no identity map; evita reselecionar os agendamentos só para as relações.
+        for agendamento in criados:
+            paciente = await self.session.get(Paciente, agendamento.paciente_id) if agendamento.paciente_id else None
+            criado_por = await self.session.get(User, agendamento.criado_por_id)
+            set_committed_value(agendamento, "paciente", paciente)
+            set_committed_value(agendamento, "criado_por", criado_por)
+
+        return criados
+
+    async def atualizar_agendamentos_em_lote(self, valores: List[dict]):
+        if not valores:
+            return
+        await self.session.execute(update(Agendamento), valores)
+
     async def atualizar_agendamento(self, agendamento: Agendamento, commit: bool = True) -> Agendamento:
         if commit:
             await self.session.commit()
@@ -82,7 +320,10 @@ class AgendamentoSQLAlchemyProvider(AgendamentoProviderInterface):
         result = await self.session.execute(query)
         return result.scalar_one()
 
-    async def atualizar_agendamento_multi(self, agendamentos: List[Agendamento]) -> List[Agendamento]:
-        await self.session.commit()
+    async def atualizar_agendamento_multi(self, agendamentos: List[Agendamento], commit: bool = True) -> List[Agendamento]:
+        if commit:
+            await self.session.commit()
+        else:
+            await self.session.flush()
         ids = [a.id for a in agendamentos]
         return await self.buscar_por_id_multi(ids)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -22,6 +24,10 @@ class ConfiguracaoSQLAlchemyProvider(ConfiguracaoProviderInterface):
 
         return config
 
+    async def obter_versao(self) -> Optional[int]:
+        result = await self.session.execute(select(Configuracao.versao).where(Configuracao.id == 1))
+        return result.scalar_one_or_none()
+
     async def salvar_configuracao(self, configuracao: Configuracao) -> Configuracao:
         if configuracao.id != 1:
             configuracao.id = 1
@@ -1,17 +1,31 @@
+from datetime import date
 from typing import List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import select, func, insert, delete, exists, Integer, Date, cast
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from src.models.prescricao_model import Prescricao
+from src.models.agendamento_model import Agendamento
+from src.models.auditoria_model import EventoAuditoria
+from src.models.paciente_model import Paciente
+from src.models.prescricao_model import Prescricao, PendenciaCiclo
 from src.providers.interfaces.prescricao_provider_interface import PrescricaoProviderInterface
+from src.services.auditoria_service import ENTIDADE_PRESCRICAO
+from src.services.ocupacao_service import STATUS_FORA_DA_CAPACIDADE
+
+STATUS_PRESCRICAO_ATIVOS = ["pendente", "agendada", "em-curso"]
+# Espaços das travas consultivas de pendencias_ciclo (forma de duas chaves, separada das travas por dia).
+TRAVA_PENDENCIAS_GERAL = 7101
+TRAVA_PENDENCIAS_PRESCRICAO = 7102
 
 
 class PrescricaoSQLAlchemyProvider(PrescricaoProviderInterface):
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    async def commit(self):
+        await self.session.commit()
+
     async def listar_por_paciente(self, paciente_id: str) -> List[Prescricao]:
         query = select(Prescricao).where(Prescricao.paciente_id == paciente_id).order_by(Prescricao.data_emissao.desc())
 
@@ -45,6 +59,139 @@ class PrescricaoSQLAlchemyProvider(PrescricaoProviderInterface):
         result = await self.session.execute(query)
         return result.scalars().all()
 
+    async def listar_para_impressao(self, dia: date) -> List[Prescricao]:
+        # Prescrições das infusões do dia, na ordem do primeiro horário de cada uma.
+        primeiro_horario = select(
+            Agendamento.prescricao_id,
+            func.min(Agendamento.horario_inicio).label("horario_inicio")
+        ).where(
+            Agendamento.data == dia,
+            Agendamento.prescricao_id.isnot(None),
+            Agendamento.status.notin_(STATUS_FORA_DA_CAPACIDADE)
+        ).group_by(Agendamento.prescricao_id).subquery()
+
+        query = select(Prescricao).join(
+            primeiro_horario, primeiro_horario.c.prescricao_id == Prescricao.id
+        ).order_by(primeiro_horario.c.horario_inicio, Prescricao.id)
+
+        result = await self.session.execute(query)
+        return result.scalars().all()
+
+    async def obter_versao_atual(self) -> int:
+        result = await self.session.execute(select(func.coalesce(func.max(Prescricao.versao), 0)))
+        return result.scalar_one()
+
+    async def obter_prescricao_resumo_multi(self, prescricao_ids: List[str]) -> List[dict]:
+        if not prescricao_ids:
+            return []
+
+        query = select(
+            Prescricao.id,
+            Prescricao.paciente_id,
+            Prescricao.medico_id,
+            Prescricao.data_emissao,
+            Prescricao.status,
+            Prescricao.conteudo,
+            Prescricao.dias_com_medicacao,
+            Prescricao.prescricao_substituta_id,
+            Prescricao.prescricao_original_id,
+        ).where(Prescricao.id.in_(prescricao_ids))
+        result = await self.session.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    async def registrar_eventos_auditoria(self, eventos: List[dict]):
+        if not eventos:
+            return
+        await self.session.execute(insert(EventoAuditoria), eventos)
+
+    async def listar_eventos_auditoria(self, prescricao_id: str) -> List[EventoAuditoria]:
+        query = select(EventoAuditoria).where(
+            EventoAuditoria.entidade == ENTIDADE_PRESCRICAO,
+            EventoAuditoria.entidade_id == prescricao_id
+        ).order_by(EventoAuditoria.data, EventoAuditoria.id)
+
+        result = await self.session.execute(query)
+        return result.scalars().all()
+
+    async def _travar_pendencias(self, ids: Optional[List[str]]):
+        # Duas transações recalculando a mesma prescrição inseririam as mesmas linhas depois do DELETE.
+        # O recálculo completo trava tudo; os parciais compartilham a trava geral e travam só as suas prescrições,
+        # sempre na mesma ordem para não haver deadlock.
+        if ids is None:
+            await self.session.execute(select(func.pg_advisory_xact_lock(TRAVA_PENDENCIAS_GERAL, 0)))
+            return
+        await self.session.execute(select(func.pg_advisory_xact_lock_shared(TRAVA_PENDENCIAS_GERAL, 0)))
+        for prescricao_id in sorted(ids):
+            await self.session.execute(
+                select(func.pg_advisory_xact_lock(TRAVA_PENDENCIAS_PRESCRICAO, func.hashtext(prescricao_id)))
+            )
+
+    async def atualizar_pendencias(self, prescricao_ids: Optional[List[str]] = None):
+        # Recalcula por completo as prescrições informadas (ou todas) num único DELETE + INSERT ... SELECT.
+        ids = None if prescricao_ids is None else list({p_id for p_id in prescricao_ids if p_id})
+        if ids == []:
+            return
+        await self._travar_pendencias(ids)
+        await self.session.flush()
+
+        remocao = delete(PendenciaCiclo)
+        if ids is not None:
+            remocao = remocao.where(PendenciaCiclo.prescricao_id.in_(ids))
+        await self.session.execute(remocao)
+
+        por_dia = select(
+            Prescricao.id.label("prescricao_id"),
+            Prescricao.paciente_id,
+            Prescricao.data_emissao,
+            func.unnest(Prescricao.dias_com_medicacao, type_=Integer).label("dia_ciclo")
+        ).where(Prescricao.status.in_(STATUS_PRESCRICAO_ATIVOS))
+        if ids is not None:
+            por_dia = por_dia.where(Prescricao.id.in_(ids))
+        por_dia = por_dia.subquery()
+
+        agendamento_ativo = (
+            Agendamento.prescricao_id == por_dia.c.prescricao_id,
+            Agendamento.status.notin_(STATUS_FORA_DA_CAPACIDADE)
+        )
+        inicio_ciclo = select(
+            func.min(Agendamento.data - (Agendamento.dia_ciclo - 1))
+        ).where(*agendamento_ativo).correlate(por_dia).scalar_subquery()
+
+        query = select(
+            por_dia.c.prescricao_id,
+            por_dia.c.dia_ciclo,
+            por_dia.c.paciente_id,
+            func.coalesce(inicio_ciclo, cast(por_dia.c.data_emissao, Date)) + (por_dia.c.dia_ciclo - 1)
+        ).where(
+            ~exists().where(*agendamento_ativo, Agendamento.dia_ciclo == por_dia.c.dia_ciclo).correlate(por_dia)
+        )
+
+        await self.session.execute(insert(PendenciaCiclo).from_select(
+            ["prescricao_id", "dia_ciclo", "paciente_id", "data_prevista"], query
+        ))
+
+    async def listar_pendencias(self, data_limite: Optional[date] = None) -> List[dict]:
+        query = select(
+            PendenciaCiclo.prescricao_id,
+            PendenciaCiclo.dia_ciclo,
+            PendenciaCiclo.data_prevista,
+            PendenciaCiclo.paciente_id,
+            Paciente.nome.label("paciente_nome"),
+            Paciente.registro.label("paciente_registro"),
+            Prescricao.conteudo['protocolo', 'nome'].astext.label("protocolo"),
+            Prescricao.status.label("status_prescricao")
+        ).join(
+            Prescricao, Prescricao.id == PendenciaCiclo.prescricao_id
+        ).join(
+            Paciente, Paciente.id == PendenciaCiclo.paciente_id
+        ).order_by(PendenciaCiclo.data_prevista, Paciente.nome, PendenciaCiclo.dia_ciclo)
+
+        if data_limite:
+            query = query.where(PendenciaCiclo.data_prevista <= data_limite)
+
+        result = await self.session.execute(query)
+        return [dict(row) for row in result.mappings()]
+
     async def criar_prescricao(self, prescricao: Prescricao, commit: bool = True) -> Prescricao:
         self.session.add(prescricao)
         if commit:
@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -20,11 +20,22 @@ class ProtocoloSQLAlchemyProvider(ProtocoloProviderInterface):
         result = await self.session.execute(query)
         return result.scalars().all()
 
+    async def obter_versao_catalogo(self) -> Tuple[int, int]:
+        query = select(func.coalesce(func.max(Protocolo.versao), 0), func.count(Protocolo.id))
+        result = await self.session.execute(query)
+        versao, total = result.one()
+        return versao, total
+
     async def obter_protocolo(self, protocolo_id: str) -> Optional[Protocolo]:
         query = select(Protocolo).where(Protocolo.id == protocolo_id)
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
+    async def obter_protocolo_por_nome(self, nome: str) -> Optional[Protocolo]:
+        query = select(Protocolo).where(Protocolo.nome == nome).limit(1)
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
     async def criar_protocolo(self, protocolo: Protocolo) -> Protocolo:
         self.session.add(protocolo)
         await self.session.commit()
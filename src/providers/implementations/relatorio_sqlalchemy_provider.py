@@ -0,0 +1,108 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, update, delete, case, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+
+from src.models.relatorio_model import TrabalhoRelatorio
+from src.providers.interfaces.relatorio_provider_interface import RelatorioProviderInterface
+
+
+class RelatorioSQLAlchemyProvider(RelatorioProviderInterface):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def criar_trabalho(self, trabalho: TrabalhoRelatorio) -> TrabalhoRelatorio:
+        self.session.add(trabalho)
+        await self.session.commit()
+        return trabalho
+
+    async def obter_trabalho(self, trabalho_id: str, com_arquivo: bool = False) -> Optional[TrabalhoRelatorio]:
+        query = select(TrabalhoRelatorio).where(TrabalhoRelatorio.id == trabalho_id)
+        if com_arquivo:
+            query = query.options(undefer(TrabalhoRelatorio.arquivo))
+
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def reservar_proximo(self) -> Optional[TrabalhoRelatorio]:
+        # SKIP LOCKED: workers concorrentes pegam trabalhos diferentes sem esperar uns pelos outros.
+        query = select(TrabalhoRelatorio).where(
+            TrabalhoRelatorio.status == "pendente",
+            or_(TrabalhoRelatorio.disponivel_em.is_(None), TrabalhoRelatorio.disponivel_em <= datetime.now())
+        ).order_by(TrabalhoRelatorio.criado_em).limit(1).with_for_update(skip_locked=True)
+
+        result = await self.session.execute(query)
+        trabalho = result.scalar_one_or_none()
+        if not trabalho:
+            await self.session.rollback()
+            return None
+
+        trabalho.status = "processando"
+        trabalho.tentativas += 1
+        trabalho.iniciado_em = datetime.now()
+        trabalho.erro = None
+        await self.session.commit()
+        return trabalho
+
+    async def concluir_trabalho(self, trabalho_id: str, arquivo: bytes, nome_arquivo: str, expira_em: datetime):
+        await self.session.execute(
+            update(TrabalhoRelatorio).where(TrabalhoRelatorio.id == trabalho_id).values(
+                status="concluido",
+                arquivo=arquivo,
+                nome_arquivo=nome_arquivo,
+                concluido_em=datetime.now(),
+                expira_em=expira_em
+            )
+        )
+        await self.session.commit()
+
+    async def registrar_falha(self, trabalho_id: str, erro: str, tentativas_maximas: int, expira_em: datetime,
+                              disponivel_em: datetime):
+        esgotado = TrabalhoRelatorio.tentativas >= tentativas_maximas
+        await self.session.execute(
+            update(TrabalhoRelatorio).where(TrabalhoRelatorio.id == trabalho_id).values(
+                status=case((esgotado, "erro"), else_="pendente"),
+                erro=erro,
+                concluido_em=case((esgotado, datetime.now()), else_=None),
+                expira_em=case((esgotado, expira_em), else_=None),
+                disponivel_em=case((esgotado, None), else_=disponivel_em)
+            )
+        )
+        await self.session.commit()
+
+    async def adiar_trabalho(self, trabalho_id: str, erro: str, disponivel_em: datetime):
+        # Falta de capacidade momentânea não é falha do trabalho: devolve a tentativa e espera para tentar de novo.
+        await self.session.execute(
+            update(TrabalhoRelatorio).where(TrabalhoRelatorio.id == trabalho_id).values(
+                status="pendente",
+                tentativas=TrabalhoRelatorio.tentativas - 1,
+                erro=erro,
+                disponivel_em=disponivel_em
+            )
+        )
+        await self.session.commit()
+
+    async def recuperar_interrompidos(self, iniciados_antes_de: datetime, tentativas_maximas: int, expira_em: datetime) -> int:
+        # Trabalhos de um worker que caiu no meio da geração voltam para a fila.
+        esgotado = TrabalhoRelatorio.tentativas >= tentativas_maximas
+        result = await self.session.execute(
+            update(TrabalhoRelatorio).where(
+                TrabalhoRelatorio.status == "processando",
+                TrabalhoRelatorio.iniciado_em < iniciados_antes_de
+            ).values(
+                status=case((esgotado, "erro"), else_="pendente"),
+                erro="Geração interrompida",
+                expira_em=case((esgotado, expira_em), else_=None)
+            )
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    async def remover_expirados(self, agora: datetime) -> int:
+        result = await self.session.execute(
+            delete(TrabalhoRelatorio).where(TrabalhoRelatorio.expira_em < agora)
+        )
+        await self.session.commit()
+        return result.rowcount
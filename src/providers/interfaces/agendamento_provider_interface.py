@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
-from datetime import date
-from typing import List, Optional
+from datetime import date, datetime
+from typing import List, Optional, Tuple, Dict
 
+from src.models.auditoria_model import EventoAuditoria
 from src.models.agendamento_model import Agendamento
 
 
@@ -17,9 +18,55 @@ class AgendamentoProviderInterface(ABC):
             data_inicio: Optional[date] = None,
             data_fim: Optional[date] = None,
             paciente_id: Optional[str] = None,
+            alterados_desde: Optional[int] = None,
     ) -> List[Agendamento]:
         pass
 
+    @abstractmethod
+    async def listar_agendamentos_resumidos(
+            self,
+            data_inicio: Optional[date] = None,
+            data_fim: Optional[date] = None,
+            paciente_id: Optional[str] = None,
+            tipo: Optional[str] = None,
+    ) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def contar_ocupacao(self, data_inicio: date, data_fim: date) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def contar_resumo_calendario(self, data_inicio: date, data_fim: date) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def bloquear_dia(self, dia: date):
+        pass
+
+    @abstractmethod
+    async def obter_cursor_sincronizacao(self) -> int:
+        pass
+
+    @abstractmethod
+    async def obter_versao_periodo(
+            self,
+            data_inicio: Optional[date] = None,
+            data_fim: Optional[date] = None,
+            paciente_id: Optional[str] = None,
+    ) -> Tuple[int, int, int, Optional[datetime]]:
+        pass
+
+    @abstractmethod
+    async def listar_ids_movidos_desde(
+            self,
+            transacao: int,
+            data_inicio: Optional[date] = None,
+            data_fim: Optional[date] = None,
+            paciente_id: Optional[str] = None,
+    ) -> List[str]:
+        pass
+
     @abstractmethod
     async def obter_agendamento(
             self, agendamento_id: str,
@@ -31,19 +78,38 @@ class AgendamentoProviderInterface(ABC):
         pass
 
     @abstractmethod
-    async def buscar_por_prescricao_e_dia(
+    async def listar_por_prescricao(
             self,
             prescricao_id: str,
-            dia_ciclo: int,
+            incluir_concluidos: bool = True,
     ) -> List[Agendamento]:
         pass
 
     @abstractmethod
-    async def listar_por_prescricao(
+    async def contar_status_por_prescricao(self, prescricao_ids: List[str]) -> Dict[str, Dict[str, int]]:
+        pass
+
+    @abstractmethod
+    async def listar_infusoes_por_data(self, datas: List[date]) -> List[Agendamento]:
+        pass
+
+    @abstractmethod
+    async def buscar_sobreposicao_paciente(
             self,
-            prescricao_id: str,
-            incluir_concluidos: bool = True,
-    ) -> List[Agendamento]:
+            paciente_id: str,
+            dia: date,
+            horario_inicio: str,
+            horario_fim: str,
+            ignorar_ids: List[str]
+    ) -> Optional[Agendamento]:
+        pass
+
+    @abstractmethod
+    async def registrar_eventos_auditoria(self, eventos: List[dict]):
+        pass
+
+    @abstractmethod
+    async def listar_eventos_auditoria(self, agendamento_id: str) -> List[EventoAuditoria]:
         pass
 
     @abstractmethod
@@ -53,6 +119,10 @@ class AgendamentoProviderInterface(ABC):
     ) -> Agendamento:
         pass
 
+    @abstractmethod
+    async def criar_agendamentos_em_lote(self, valores: List[dict]) -> List[Agendamento]:
+        pass
+
     @abstractmethod
     async def atualizar_agendamento(
             self, agendamento: Agendamento,
@@ -61,5 +131,9 @@ class AgendamentoProviderInterface(ABC):
         pass
 
     @abstractmethod
-    async def atualizar_agendamento_multi(self, agendamentos: List[Agendamento]) -> List[Agendamento]:
+    async def atualizar_agendamentos_em_lote(self, valores: List[dict]):
+        pass
+
+    @abstractmethod
+    async def atualizar_agendamento_multi(self, agendamentos: List[Agendamento], commit: bool = True) -> List[Agendamento]:
         pass
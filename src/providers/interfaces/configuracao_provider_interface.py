@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 from src.models.configuracao_model import Configuracao
 
@@ -8,6 +9,10 @@ class ConfiguracaoProviderInterface(ABC):
     async def obter_configuracao(self) -> Configuracao:
         pass
 
+    @abstractmethod
+    async def obter_versao(self) -> Optional[int]:
+        pass
+
     @abstractmethod
     async def salvar_configuracao(self, configuracao: Configuracao) -> Configuracao:
         pass
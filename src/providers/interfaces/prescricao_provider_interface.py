@@ -1,10 +1,16 @@
 from abc import ABC, abstractmethod
+from datetime import date
 from typing import List, Optional
 
+from src.models.auditoria_model import EventoAuditoria
 from src.models.prescricao_model import Prescricao
 
 
 class PrescricaoProviderInterface(ABC):
+    @abstractmethod
+    async def commit(self):
+        pass
+
     @abstractmethod
     async def listar_por_paciente(self, paciente_id: str) -> List[Prescricao]:
         pass
@@ -21,6 +27,34 @@ class PrescricaoProviderInterface(ABC):
     async def obter_prescricao_multi(self, prescricao_ids: List[str]) -> List[Prescricao]:
         pass
 
+    @abstractmethod
+    async def listar_para_impressao(self, dia: date) -> List[Prescricao]:
+        pass
+
+    @abstractmethod
+    async def obter_versao_atual(self) -> int:
+        pass
+
+    @abstractmethod
+    async def obter_prescricao_resumo_multi(self, prescricao_ids: List[str]) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def registrar_eventos_auditoria(self, eventos: List[dict]):
+        pass
+
+    @abstractmethod
+    async def listar_eventos_auditoria(self, prescricao_id: str) -> List[EventoAuditoria]:
+        pass
+
+    @abstractmethod
+    async def atualizar_pendencias(self, prescricao_ids: Optional[List[str]] = None):
+        pass
+
+    @abstractmethod
+    async def listar_pendencias(self, data_limite: Optional[date] = None) -> List[dict]:
+        pass
+
     @abstractmethod
     async def criar_prescricao(self, prescricao: Prescricao, commit: bool = True) -> Prescricao:
         pass
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from src.models.protocolo_model import Protocolo
 
@@ -9,10 +9,18 @@ class ProtocoloProviderInterface(ABC):
     async def listar_protocolos(self, ativo: Optional[bool] = None) -> List[Protocolo]:
         pass
 
+    @abstractmethod
+    async def obter_versao_catalogo(self) -> Tuple[int, int]:
+        pass
+
     @abstractmethod
     async def obter_protocolo(self, protocolo_id: str) -> Optional[Protocolo]:
         pass
 
+    @abstractmethod
+    async def obter_protocolo_por_nome(self, nome: str) -> Optional[Protocolo]:
+        pass
+
     @abstractmethod
     async def criar_protocolo(self, protocolo: Protocolo) -> Protocolo:
         pass
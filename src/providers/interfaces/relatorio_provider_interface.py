@@ -0,0 +1,40 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional
+
+from src.models.relatorio_model import TrabalhoRelatorio
+
+
+class RelatorioProviderInterface(ABC):
+    @abstractmethod
+    async def criar_trabalho(self, trabalho: TrabalhoRelatorio) -> TrabalhoRelatorio:
+        pass
+
+    @abstractmethod
+    async def obter_trabalho(self, trabalho_id: str, com_arquivo: bool = False) -> Optional[TrabalhoRelatorio]:
+        pass
+
+    @abstractmethod
+    async def reservar_proximo(self) -> Optional[TrabalhoRelatorio]:
+        pass
+
+    @abstractmethod
+    async def concluir_trabalho(self, trabalho_id: str, arquivo: bytes, nome_arquivo: str, expira_em: datetime):
+        pass
+
+    @abstractmethod
+    async def registrar_falha(self, trabalho_id: str, erro: str, tentativas_maximas: int, expira_em: datetime,
+                              disponivel_em: datetime):
+        pass
+
+    @abstractmethod
+    async def adiar_trabalho(self, trabalho_id: str, erro: str, disponivel_em: datetime):
+        pass
+
+    @abstractmethod
+    async def recuperar_interrompidos(self, iniciados_antes_de: datetime, tentativas_maximas: int, expira_em: datetime) -> int:
+        pass
+
+    @abstractmethod
+    async def remover_expirados(self, agora: datetime) -> int:
+        pass
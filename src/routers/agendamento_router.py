@@ -1,28 +1,79 @@
 from datetime import date
-from typing import List, Optional
+from typing import List, Optional, Union, Literal
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse, JSONResponse
 
 from src.auth.auth_handler import auth_handler, require_groups
 from src.controllers import agendamento_controller
-from src.dependencies import get_agendamento_provider, get_prescricao_provider
+from src.dependencies import get_agendamento_provider, get_prescricao_provider, get_configuracao_provider, \
+    get_protocolo_provider
 from src.providers.interfaces.agendamento_provider_interface import AgendamentoProviderInterface
+from src.providers.interfaces.configuracao_provider_interface import ConfiguracaoProviderInterface
 from src.providers.interfaces.prescricao_provider_interface import PrescricaoProviderInterface
+from src.providers.interfaces.protocolo_provider_interface import ProtocoloProviderInterface
 from src.schemas.agendamento_schema import AgendamentoCreate, AgendamentoUpdate, AgendamentoResponse, \
     AgendamentoBulkUpdateList, AgendamentoPrescricaoUpdate, AgendamentoRemarcacaoRequest, \
-    AgendamentoRemarcacaoLoteRequest
+    AgendamentoRemarcacaoLoteRequest, AgendamentoSyncResponse, AgendamentoListaNormalizadaResponse, \
+    AgendamentoGridResponse, VisaoAgendaEnum, OcupacaoResponse, ResumoCalendarioResponse, AgendamentoHistoricoItem, \
+    AgendamentoCicloCreate, AgendamentoCicloResponse, SugestoesCicloResponse, AlocacaoPoltronasResponse
+from src.services import etag_service
 
 router = APIRouter(prefix="/api/agendamentos", tags=["Agendamentos"], dependencies=[Depends(auth_handler.decode_token)])
+# EventSource não envia Authorization: o stream fica fora do router acima e se autentica pelo token da URL.
+stream_router = APIRouter(prefix="/api/agendamentos", tags=["Agendamentos"])
 
 
-@router.get("", response_model=List[AgendamentoResponse])
+@router.get(
+    "",
+    response_model=Union[List[AgendamentoResponse], AgendamentoListaNormalizadaResponse, List[AgendamentoGridResponse]]
+)
 async def listar_agendamentos(
+        request: Request,
+        response: Response,
         data_inicio: Optional[date] = Query(None),
         data_fim: Optional[date] = Query(None),
         paciente_id: Optional[str] = Query(None),
+        formato: Literal["completo", "normalizado"] = Query("completo"),
+        view: VisaoAgendaEnum = Query(VisaoAgendaEnum.FULL),
         agendamento_provider: AgendamentoProviderInterface = Depends(get_agendamento_provider),
         prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider)
 ):
+    etag = await agendamento_controller.obter_etag_agendamentos(
+        agendamento_provider,
+        prescricao_provider,
+        data_inicio,
+        data_fim,
+        paciente_id,
+        formato,
+        view.value
+    )
+    if etag_service.etag_corresponde(request, etag):
+        return etag_service.resposta_nao_modificada(etag)
+    etag_service.aplicar_etag(response, etag)
+
+    if view != VisaoAgendaEnum.FULL:
+        resumidos = await agendamento_controller.listar_agendamentos_resumidos(
+            agendamento_provider,
+            prescricao_provider,
+            data_inicio,
+            data_fim,
+            paciente_id,
+            view
+        )
+        # Serializado aqui para que o Union do response_model não reencaixe os itens no schema completo.
+        resposta = JSONResponse(content=jsonable_encoder(resumidos))
+        etag_service.aplicar_etag(resposta, etag)
+        return resposta
+    if formato == "normalizado":
+        return await agendamento_controller.listar_agendamentos_normalizado(
+            agendamento_provider,
+            prescricao_provider,
+            data_inicio,
+            data_fim,
+            paciente_id
+        )
     return await agendamento_controller.listar_agendamentos(
         agendamento_provider,
         prescricao_provider,
@@ -32,11 +83,112 @@ async def listar_agendamentos(
     )
 
 
+@router.get("/sync", response_model=AgendamentoSyncResponse)
+async def sincronizar_agendamentos(
+        data_inicio: Optional[date] = Query(None),
+        data_fim: Optional[date] = Query(None),
+        paciente_id: Optional[str] = Query(None),
+        since: Optional[int] = Query(None, ge=0),
+        agendamento_provider: AgendamentoProviderInterface = Depends(get_agendamento_provider),
+        prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider)
+):
+    return await agendamento_controller.sincronizar_agendamentos(
+        agendamento_provider,
+        prescricao_provider,
+        data_inicio,
+        data_fim,
+        paciente_id,
+        since
+    )
+
+
+@router.get("/ocupacao", response_model=OcupacaoResponse)
+async def obter_ocupacao(
+        inicio: date = Query(...),
+        fim: date = Query(...),
+        agendamento_provider: AgendamentoProviderInterface = Depends(get_agendamento_provider),
+        configuracao_provider: ConfiguracaoProviderInterface = Depends(get_configuracao_provider)
+):
+    return await agendamento_controller.obter_ocupacao(agendamento_provider, configuracao_provider, inicio, fim)
+
+
+@router.get("/resumo-calendario", response_model=ResumoCalendarioResponse)
+async def obter_resumo_calendario(
+        mes: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+        agendamento_provider: AgendamentoProviderInterface = Depends(get_agendamento_provider)
+):
+    return await agendamento_controller.obter_resumo_calendario(agendamento_provider, mes)
+
+
+@router.get("/sugestoes-ciclo", response_model=SugestoesCicloResponse)
+async def sugerir_horarios_ciclo(
+        prescricao_id: str = Query(...),
+        inicio: Optional[date] = Query(None),
+        semanas: int = Query(12, ge=1, le=26),
+        limite: int = Query(5, ge=1, le=20),
+        agendamento_provider: AgendamentoProviderInterface = Depends(get_agendamento_provider),
+        prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider),
+        protocolo_provider: ProtocoloProviderInterface = Depends(get_protocolo_provider),
+        configuracao_provider: ConfiguracaoProviderInterface = Depends(get_configuracao_provider)
+):
+    return await agendamento_controller.sugerir_horarios_ciclo(
+        agendamento_provider,
+        prescricao_provider,
+        protocolo_provider,
+        configuracao_provider,
+        prescricao_id,
+        inicio or date.today(),
+        semanas,
+        limite
+    )
+
+
+@router.get("/poltronas", response_model=AlocacaoPoltronasResponse)
+async def obter_alocacao_poltronas(
+        data: date = Query(...),
+        agendamento_provider: AgendamentoProviderInterface = Depends(get_agendamento_provider),
+        configuracao_provider: ConfiguracaoProviderInterface = Depends(get_configuracao_provider)
+):
+    return await agendamento_controller.obter_alocacao_poltronas(agendamento_provider, configuracao_provider, data)
+
+
+@router.post("/poltronas/otimizar", response_model=AlocacaoPoltronasResponse)
+async def otimizar_poltronas(
+        data: date = Query(...),
+        agendamento_provider: AgendamentoProviderInterface = Depends(get_agendamento_provider),
+        configuracao_provider: ConfiguracaoProviderInterface = Depends(get_configuracao_provider),
+        current_user: dict = Depends(require_groups(["Enfermagem", "Administradores"]))
+):
+    return await agendamento_controller.obter_alocacao_poltronas(
+        agendamento_provider, configuracao_provider, data, otimizar=True
+    )
+
+
+@router.post("/stream/token")
+async def gerar_token_stream(current_user: dict = Depends(auth_handler.decode_token)):
+    user_id = current_user.get("username") or current_user.get("sub")
+    return {"token": auth_handler.encode_token_stream(user_id)}
+
+
+@stream_router.get("/stream")
+async def stream_agendamentos(
+        request: Request,
+        data: Optional[date] = Query(None),
+        current_user: dict = Depends(auth_handler.decode_token_stream)
+):
+    return StreamingResponse(
+        agendamento_controller.stream_eventos_agendamento(request.is_disconnected, data),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("", response_model=AgendamentoResponse)
 async def criar_agendamento(
         dados: AgendamentoCreate,
         agendamento_provider: AgendamentoProviderInterface = Depends(get_agendamento_provider),
         prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider),
+        configuracao_provider: ConfiguracaoProviderInterface = Depends(get_configuracao_provider),
         current_user: dict = Depends(auth_handler.get_current_user)
 ):
     user_id = current_user.get("username") or current_user.get("sub")
@@ -46,6 +198,31 @@ async def criar_agendamento(
     return await agendamento_controller.criar_agendamento(
         agendamento_provider,
         prescricao_provider,
+        configuracao_provider,
+        dados,
+        criado_por_id=user_id,
+        usuario_nome=user_name
+    )
+
+
+@router.post("/ciclo", response_model=AgendamentoCicloResponse)
+async def agendar_ciclo(
+        dados: AgendamentoCicloCreate,
+        agendamento_provider: AgendamentoProviderInterface = Depends(get_agendamento_provider),
+        prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider),
+        protocolo_provider: ProtocoloProviderInterface = Depends(get_protocolo_provider),
+        configuracao_provider: ConfiguracaoProviderInterface = Depends(get_configuracao_provider),
+        current_user: dict = Depends(auth_handler.get_current_user)
+):
+    user_id = current_user.get("username") or current_user.get("sub")
+    user_name = current_user.get("display_name") or current_user.get("displayName")
+    if not user_id: raise HTTPException(status_code=400, detail="Usuário não identificado no token.")
+
+    return await agendamento_controller.agendar_ciclo(
+        agendamento_provider,
+        prescricao_provider,
+        protocolo_provider,
+        configuracao_provider,
         dados,
         criado_por_id=user_id,
         usuario_nome=user_name
@@ -57,6 +234,7 @@ async def atualizar_agendamentos_em_lote(
         dados: AgendamentoBulkUpdateList,
         provider: AgendamentoProviderInterface = Depends(get_agendamento_provider),
         prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider),
+        configuracao_provider: ConfiguracaoProviderInterface = Depends(get_configuracao_provider),
         current_user: dict = Depends(auth_handler.get_current_user)
 ):
     user_id = current_user.get("username") or current_user.get("sub")
@@ -64,6 +242,7 @@ async def atualizar_agendamentos_em_lote(
     return await agendamento_controller.atualizar_agendamentos_lote(
         provider=provider,
         prescricao_provider=prescricao_provider,
+        configuracao_provider=configuracao_provider,
         dados_lote=dados,
         usuario_id=user_id,
         usuario_nome=user_name,
@@ -76,14 +255,24 @@ async def atualizar_agendamento(
         dados: AgendamentoUpdate,
         provider: AgendamentoProviderInterface = Depends(get_agendamento_provider),
         prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider),
+        configuracao_provider: ConfiguracaoProviderInterface = Depends(get_configuracao_provider),
         current_user: dict = Depends(auth_handler.get_current_user)
 ):
     user_id = current_user.get("username") or current_user.get("sub")
     user_name = current_user.get("display_name") or current_user.get("displayName")
-    return await agendamento_controller.atualizar_agendamento(provider, prescricao_provider, agendamento_id, dados,
+    return await agendamento_controller.atualizar_agendamento(provider, prescricao_provider, configuracao_provider,
+                                                              agendamento_id, dados,
                                                               usuario_id=user_id, usuario_nome=user_name)
 
 
+@router.get("/{agendamento_id}/historico", response_model=List[AgendamentoHistoricoItem])
+async def listar_historico_agendamento(
+        agendamento_id: str,
+        agendamento_provider: AgendamentoProviderInterface = Depends(get_agendamento_provider)
+):
+    return await agendamento_controller.listar_historico_agendamento(agendamento_provider, agendamento_id)
+
+
 @router.put("/{agendamento_id}/prescricao", response_model=AgendamentoResponse)
 async def trocar_prescricao_agendamento(
         agendamento_id: str,
@@ -110,12 +299,13 @@ async def remarcar_agendamento_endpoint(
         dados: AgendamentoRemarcacaoRequest,
         provider: AgendamentoProviderInterface = Depends(get_agendamento_provider),
         prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider),
+        configuracao_provider: ConfiguracaoProviderInterface = Depends(get_configuracao_provider),
         current_user: dict = Depends(auth_handler.get_current_user)
 ):
     user_id = current_user.get("username") or current_user.get("sub")
     user_name = current_user.get("display_name") or current_user.get("displayName")
     return await agendamento_controller.remarcar_agendamento(
-        provider, prescricao_provider, agendamento_id, dados, user_id, user_name
+        provider, prescricao_provider, configuracao_provider, agendamento_id, dados, user_id, user_name
     )
 
 
@@ -124,10 +314,11 @@ async def remarcar_lote_endpoint(
         dados: AgendamentoRemarcacaoLoteRequest,
         provider: AgendamentoProviderInterface = Depends(get_agendamento_provider),
         prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider),
+        configuracao_provider: ConfiguracaoProviderInterface = Depends(get_configuracao_provider),
         current_user: dict = Depends(auth_handler.get_current_user)
 ):
     user_id = current_user.get("username") or current_user.get("sub")
     user_name = current_user.get("display_name") or current_user.get("displayName")
     return await agendamento_controller.remarcar_agendamentos_lote(
-        provider, prescricao_provider, dados, user_id, user_name
+        provider, prescricao_provider, configuracao_provider, dados, user_id, user_name
     )
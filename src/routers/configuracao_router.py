@@ -1,17 +1,23 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 
 from src.auth.auth_handler import auth_handler
 from src.controllers import configuracao_controller
 from src.dependencies import get_configuracao_provider
 from src.providers.interfaces.configuracao_provider_interface import ConfiguracaoProviderInterface
 from src.schemas.configuracao_schema import ConfiguracaoUpdate, ConfiguracaoResponse
+from src.services import etag_service
 
 router = APIRouter(prefix="/api/configuracoes", tags=["Configurações"],
     dependencies=[Depends(auth_handler.decode_token)])
 
 
 @router.get("", response_model=ConfiguracaoResponse)
-async def obter_configuracao(provider: ConfiguracaoProviderInterface = Depends(get_configuracao_provider)):
+async def obter_configuracao(request: Request, response: Response,
+        provider: ConfiguracaoProviderInterface = Depends(get_configuracao_provider)):
+    etag = await configuracao_controller.obter_etag_configuracao(provider)
+    if etag_service.etag_corresponde(request, etag):
+        return etag_service.resposta_nao_modificada(etag)
+    etag_service.aplicar_etag(response, etag)
     return await configuracao_controller.obter_configuracao(provider)
 
 
@@ -1,6 +1,7 @@
-from typing import List
+from datetime import date
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 
 from src.auth.auth_handler import auth_handler, require_groups
 from src.controllers import prescricao_controller
@@ -8,7 +9,8 @@ from src.dependencies import get_prescricao_provider, get_agendamento_provider,
 from src.providers.interfaces.agendamento_provider_interface import AgendamentoProviderInterface
 from src.providers.interfaces.auth_provider_interface import AuthProviderInterface
 from src.providers.interfaces.prescricao_provider_interface import PrescricaoProviderInterface
-from src.schemas.prescricao_schema import PrescricaoCreate, PrescricaoResponse, PrescricaoStatusUpdate, PrescricaoSubstituicaoCreate
+from src.schemas.prescricao_schema import PrescricaoCreate, PrescricaoResponse, PrescricaoStatusUpdate, PrescricaoSubstituicaoCreate, \
+    PrescricaoHistoricoResponse, PendenciaCicloResponse
 
 router = APIRouter(prefix="/api/prescricoes", tags=["Prescrições"], dependencies=[Depends(auth_handler.decode_token)])
 
@@ -21,6 +23,23 @@ async def listar_prescricoes_por_paciente(
     return await prescricao_controller.listar_prescricoes_por_paciente(prescricao_provider, paciente_id)
 
 
+@router.get("/pendencias", response_model=List[PendenciaCicloResponse])
+async def listar_pendencias(
+        data_limite: Optional[date] = Query(None),
+        prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider),
+):
+    return await prescricao_controller.listar_pendencias(prescricao_provider, data_limite)
+
+
+@router.get("/pdf-lote")
+async def gerar_pdf_lote(
+        data: Optional[date] = Query(None),
+        ids: Optional[List[str]] = Query(None),
+        prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider),
+):
+    return await prescricao_controller.gerar_pdf_lote(prescricao_provider, data, ids)
+
+
 @router.post("", response_model=PrescricaoResponse)
 async def criar_prescricao(
         dados: PrescricaoCreate,
@@ -73,9 +92,19 @@ async def atualizar_status_prescricao(
         )
 
 
+@router.get("/{prescricao_id}/historico", response_model=PrescricaoHistoricoResponse)
+async def obter_historico_prescricao(
+        prescricao_id: str,
+        prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider),
+):
+    return await prescricao_controller.obter_historico_prescricao(prescricao_provider, prescricao_id)
+
+
 @router.get("/{prescricao_id}/pdf")
 async def gerar_pdf(
         prescricao_id: str,
+        request: Request,
+        gerado_em: bool = Query(False),
         prescricao_provider: PrescricaoProviderInterface = Depends(get_prescricao_provider),
 ):
-    return await prescricao_controller.gerar_pdf_prescricao(prescricao_id, prescricao_provider)
+    return await prescricao_controller.gerar_pdf_prescricao(prescricao_id, prescricao_provider, request, gerado_em)
@@ -1,19 +1,24 @@
 from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 
 from src.auth.auth_handler import auth_handler
 from src.controllers import protocolo_controller
 from src.dependencies import get_protocolo_provider
 from src.providers.interfaces.protocolo_provider_interface import ProtocoloProviderInterface
 from src.schemas.protocolo_schema import ProtocoloCreate, ProtocoloUpdate, ProtocoloResponse
+from src.services import etag_service
 
 router = APIRouter(prefix="/api/protocolos", tags=["Protocolos"], dependencies=[Depends(auth_handler.decode_token)])
 
 
 @router.get("", response_model=List[ProtocoloResponse])
-async def listar_protocolos(ativo: Optional[bool] = Query(None),
+async def listar_protocolos(request: Request, response: Response, ativo: Optional[bool] = Query(None),
         provider: ProtocoloProviderInterface = Depends(get_protocolo_provider)):
+    etag = await protocolo_controller.obter_etag_protocolos(provider, ativo)
+    if etag_service.etag_corresponde(request, etag):
+        return etag_service.resposta_nao_modificada(etag)
+    etag_service.aplicar_etag(response, etag)
     return await protocolo_controller.listar_protocolos(provider, ativo)
 
 
@@ -1,13 +1,16 @@
 from datetime import date
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, status
 
-from src.auth.auth_handler import auth_handler
+from src.auth.auth_handler import auth_handler, require_groups
 from src.controllers import relatorio_controller
-from src.dependencies import get_agendamento_provider, get_prescricao_provider, get_equipe_provider
+from src.dependencies import get_agendamento_provider, get_prescricao_provider, get_equipe_provider, get_relatorio_provider
 from src.providers.interfaces.agendamento_provider_interface import AgendamentoProviderInterface
 from src.providers.interfaces.equipe_provider_interface import EquipeProviderInterface
 from src.providers.interfaces.prescricao_provider_interface import PrescricaoProviderInterface
+from src.providers.interfaces.relatorio_provider_interface import RelatorioProviderInterface
+from src.schemas.relatorio_schema import TrabalhoRelatorioCreate, TrabalhoRelatorioResponse
+from src.services.pdf_service import renderizador_pdf
 
 router = APIRouter(prefix="/api/relatorios", tags=["Relatórios"], dependencies=[Depends(auth_handler.decode_token)])
 
@@ -42,3 +45,34 @@ async def relatorio_medicacoes(
         agendamento_provider,
         prescricao_provider
     )
+
+
+@router.get("/pdf/metricas", dependencies=[Depends(require_groups(["Administradores"]))])
+async def metricas_pdf():
+    return renderizador_pdf.metricas()
+
+
+@router.post("/trabalhos", response_model=TrabalhoRelatorioResponse, status_code=status.HTTP_202_ACCEPTED)
+async def criar_trabalho(
+        dados: TrabalhoRelatorioCreate,
+        relatorio_provider: RelatorioProviderInterface = Depends(get_relatorio_provider),
+        current_user: dict = Depends(auth_handler.decode_token)
+):
+    user_id = current_user.get("username") or current_user.get("sub")
+    return await relatorio_controller.criar_trabalho(dados, relatorio_provider, user_id)
+
+
+@router.get("/trabalhos/{trabalho_id}", response_model=TrabalhoRelatorioResponse)
+async def obter_trabalho(
+        trabalho_id: str,
+        relatorio_provider: RelatorioProviderInterface = Depends(get_relatorio_provider)
+):
+    return await relatorio_controller.obter_trabalho(trabalho_id, relatorio_provider)
+
+
+@router.get("/trabalhos/{trabalho_id}/arquivo")
+async def baixar_trabalho(
+        trabalho_id: str,
+        relatorio_provider: RelatorioProviderInterface = Depends(get_relatorio_provider)
+):
+    return await relatorio_controller.baixar_trabalho(trabalho_id, relatorio_provider)
@@ -1,12 +1,15 @@
 import enum
 from datetime import date, datetime
-from typing import List, Optional
+from typing import List, Optional, Dict, Annotated
 
 from pydantic import BaseModel, ConfigDict, model_validator, Field, computed_field
 from pydantic.alias_generators import to_camel
 
 from src.schemas.prescricao_schema import PrescricaoResponse
 
+# Gravado como TIME no banco; na API segue "HH:MM" (segundos vindos de inputs do navegador são descartados).
+Horario = Annotated[str, Field(pattern=r"^([01]\d|2[0-3]):[0-5]\d(:[0-5]\d)?$")]
+
 
 class BaseSchema(BaseModel):
     model_config = ConfigDict(
@@ -45,6 +48,12 @@ class FarmaciaStatusEnum(str, enum.Enum):
     PRESCRICAO_DEVOLVIDA = 'prescricao-devolvida' # Devolvido
 
 
+class VisaoAgendaEnum(str, enum.Enum):
+    GRID = 'grid'
+    FARMACIA = 'farmacia'
+    FULL = 'full'
+
+
 class TipoAgendamento(str, enum.Enum):
     INFUSAO = "infusao"
     PROCEDIMENTO = "procedimento"
@@ -166,7 +175,7 @@ class DetalhesConsultaUpdate(BaseSchema):
     tipo_consulta: Optional[TipoConsulta] = None
 
 
-class DetalhesAgendamento(BaseSchema):
+class DetalhesAgendamentoResumo(BaseSchema):
     infusao: Optional[DetalhesInfusao] = None
     procedimento: Optional[DetalhesProcedimento] = None
     consulta: Optional[DetalhesConsulta] = None
@@ -174,6 +183,9 @@ class DetalhesAgendamento(BaseSchema):
     intercorrencia: Optional[DetalhesIntercorrencia] = None
     cancelamento: Optional[DetalhesCancelamento] = None
     remarcacao: Optional[DetalhesRemarcacao] = None
+
+
+class DetalhesAgendamento(DetalhesAgendamentoResumo):
     historico_prescricoes: Optional[List[HistoricoPrescricaoAgendamentoItem]] = []
 
 
@@ -193,8 +205,8 @@ class AgendamentoBase(BaseSchema):
     tipo: TipoAgendamento
     data: date
     turno: str
-    horario_inicio: str
-    horario_fim: str
+    horario_inicio: Horario
+    horario_fim: Horario
     checkin: bool = False
     status: AgendamentoStatusEnum = AgendamentoStatusEnum.AGENDADO
     encaixe: bool = False
@@ -218,8 +230,8 @@ class AgendamentoCreate(AgendamentoBase):
 class AgendamentoUpdate(BaseSchema):
     data: Optional[date] = None
     turno: Optional[str] = None
-    horario_inicio: Optional[str] = None
-    horario_fim: Optional[str] = None
+    horario_inicio: Optional[Horario] = None
+    horario_fim: Optional[Horario] = None
     checkin: Optional[bool] = None
     status: Optional[AgendamentoStatusEnum] = None
     encaixe: Optional[bool] = None
@@ -270,24 +282,157 @@ class CriadoPorResponse(BaseModel):
         return getattr(self, 'display_name', None) or self.username
 
 
-class AgendamentoResponse(AgendamentoBase):
+class AgendamentoResponseBase(AgendamentoBase):
+    id: str
+    poltrona: Optional[int] = None
+    criado_por_id: Optional[str] = None
+    criado_por: Optional[CriadoPorResponse] = None
+    paciente: Optional[AgendamentoPaciente] = None
+
+
+class AgendamentoResponse(AgendamentoResponseBase):
+    prescricao: Optional[PrescricaoResponse] = None
+
+
+class AgendamentoGridResponse(AgendamentoBase):
     id: str
+    poltrona: Optional[int] = None
     criado_por_id: Optional[str] = None
     criado_por: Optional[CriadoPorResponse] = None
     paciente: Optional[AgendamentoPaciente] = None
+    detalhes: DetalhesAgendamentoResumo = Field(default_factory=DetalhesAgendamentoResumo)
     prescricao: Optional[PrescricaoResponse] = None
-    historico_alteracoes: List[AgendamentoHistoricoItem] = []
+
+
+class AgendamentoNormalizadoItem(AgendamentoResponseBase):
+    prescricao_id: Optional[str] = None
+
+
+class AgendamentoListaNormalizadaResponse(BaseSchema):
+    agendamentos: List[AgendamentoNormalizadoItem] = []
+    prescricoes: Dict[str, PrescricaoResponse] = {}
 
 
 class AgendamentoRemarcacaoRequest(BaseSchema):
     nova_data: date
-    novo_horario: str
+    novo_horario: Horario
     motivo: str
     manter_horario: bool = False
 
 class AgendamentoRemarcacaoLoteRequest(BaseSchema):
     ids: List[str]
     nova_data: date
-    novo_horario: Optional[str] = None
+    novo_horario: Optional[Horario] = None
     motivo: str
     manter_horario: bool = False
+
+
+class AgendamentoCicloCreate(BaseSchema):
+    prescricao_id: str
+    data_inicio: date
+    horario_inicio: Horario
+    horario_fim: Optional[Horario] = None
+    encaixe: bool = False
+    observacoes: Optional[str] = None
+    tags: Optional[List[str]] = []
+
+
+class ConflitoCiclo(BaseSchema):
+    dia_ciclo: int
+    data: date
+    motivo: str
+
+
+class AgendamentoCicloResponse(BaseSchema):
+    agendamentos: List[AgendamentoResponse] = []
+
+
+class SugestaoDiaCiclo(BaseSchema):
+    dia_ciclo: int
+    data: date
+    horario_inicio: str
+    horario_fim: str
+    ocupacao_pico: int
+    vagas_ocupadas: int
+    vagas: Optional[int] = None
+
+
+class SugestaoCiclo(BaseSchema):
+    data_inicio: date
+    dias: List[SugestaoDiaCiclo] = []
+
+
+class SugestoesCicloResponse(BaseSchema):
+    prescricao_id: str
+    duracao_minutos: int
+    categoria: Optional[str] = None
+    sugestoes: List[SugestaoCiclo] = []
+
+
+class PoltronaAlocacao(BaseSchema):
+    agendamento_id: str
+    paciente_id: Optional[str] = None
+    horario_inicio: str
+    horario_fim: str
+    poltrona: Optional[int] = None
+    fixo: bool = False
+
+
+class AlocacaoPoltronasResponse(BaseSchema):
+    data: date
+    total_poltronas: Optional[int] = None
+    poltronas_usadas: int = 0
+    minutos_ociosos: int = 0
+    alocacoes: List[PoltronaAlocacao] = []
+    sem_poltrona: List[str] = []
+
+
+class AgendamentoSyncResponse(BaseSchema):
+    cursor: int
+    completo: bool
+    agendamentos: List[AgendamentoResponse] = []
+    removidos: List[str] = []
+
+
+class OcupacaoCategoria(BaseSchema):
+    categoria: str
+    vagas: Optional[int] = None
+    ocupadas: int = 0
+    livres: Optional[int] = None
+
+
+class OcupacaoFaixa(BaseSchema):
+    inicio: str
+    fim: str
+    ocupadas: int
+
+
+class OcupacaoTurno(BaseSchema):
+    turno: str
+    ocupadas: Dict[str, int] = {}
+    linha_tempo: List[OcupacaoFaixa] = []
+
+
+class OcupacaoDia(BaseSchema):
+    data: date
+    categorias: List[OcupacaoCategoria] = []
+    turnos: List[OcupacaoTurno] = []
+
+
+class OcupacaoResponse(BaseSchema):
+    inicio: date
+    fim: date
+    dias: List[OcupacaoDia] = []
+
+
+class ResumoCalendarioDia(BaseSchema):
+    data: date
+    total: int = 0
+    encaixes: int = 0
+    por_tipo: Dict[str, int] = {}
+    por_status: Dict[str, int] = {}
+
+
+class ResumoCalendarioResponse(BaseSchema):
+    mes: str
+    dias: List[ResumoCalendarioDia] = []
@@ -120,12 +120,28 @@ class PrescricaoResponse(BaseSchema):
     data_emissao: datetime
     status: PrescricaoStatusEnum  # TODO: Permitir atualizar status no banco de dados
     conteudo: PrescricaoConteudo
-    historico_status: List[PrescricaoStatusHistoricoItem] = []
-    historico_agendamentos: List[PrescricaoHistoricoAgendamentoItem] = []
+    dias_com_medicacao: List[int] = []
     prescricao_substituta_id: Optional[str] = None
     prescricao_original_id: Optional[str] = None
 
 
+class PendenciaCicloResponse(BaseSchema):
+    prescricao_id: str
+    dia_ciclo: int
+    data_prevista: date
+    atrasada: bool
+    paciente_id: str
+    paciente_nome: str
+    paciente_registro: Optional[str] = None
+    protocolo: Optional[str] = None
+    status_prescricao: PrescricaoStatusEnum
+
+
+class PrescricaoHistoricoResponse(BaseSchema):
+    historico_status: List[PrescricaoStatusHistoricoItem] = []
+    historico_agendamentos: List[PrescricaoHistoricoAgendamentoItem] = []
+
+
 class PrescricaoStatusUpdate(BaseSchema):
     status: PrescricaoStatusEnum
     motivo: Optional[str] = None
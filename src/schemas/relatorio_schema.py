@@ -0,0 +1,56 @@
+import enum
+from datetime import date, datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, model_validator
+from pydantic.alias_generators import to_camel
+
+
+class BaseSchema(BaseModel):
+    model_config = ConfigDict(
+        from_attributes=True,
+        alias_generator=to_camel,
+        populate_by_name=True,
+        use_enum_values=True
+    )
+
+
+class TipoRelatorioEnum(str, enum.Enum):
+    FIM_PLANTAO = "fim-plantao"
+    MEDICACOES = "medicacoes"
+
+
+class StatusTrabalhoEnum(str, enum.Enum):
+    PENDENTE = "pendente"
+    PROCESSANDO = "processando"
+    CONCLUIDO = "concluido"
+    ERRO = "erro"
+
+
+class TrabalhoRelatorioCreate(BaseSchema):
+    tipo: TipoRelatorioEnum
+    data_inicio: date
+    data_fim: Optional[date] = None
+
+    @model_validator(mode="after")
+    def validar_periodo(self):
+        if self.data_fim is None:
+            self.data_fim = self.data_inicio
+        if self.data_fim < self.data_inicio:
+            raise ValueError("data_fim deve ser igual ou posterior a data_inicio")
+        return self
+
+
+class TrabalhoRelatorioResponse(BaseSchema):
+    id: str
+    tipo: TipoRelatorioEnum
+    parametros: dict
+    status: StatusTrabalhoEnum
+    tentativas: int
+    erro: Optional[str] = None
+    disponivel_em: Optional[datetime] = None
+    nome_arquivo: Optional[str] = None
+    criado_em: datetime
+    iniciado_em: Optional[datetime] = None
+    concluido_em: Optional[datetime] = None
+    expira_em: Optional[datetime] = None
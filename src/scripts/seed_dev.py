@@ -11,6 +11,8 @@ from src.models.auth_model import User
 from src.models.configuracao_model import Configuracao
 from src.models.equipe_model import Profissional, EscalaPlantao, AusenciaProfissional
 from src.models.protocolo_model import Protocolo
+from src.models.relatorio_model import TrabalhoRelatorio
+from src.providers.implementations.prescricao_sqlalchemy_provider import PrescricaoSQLAlchemyProvider
 from src.resources.database import app_engine, AppSessionLocal, Base
 from src.resources.database_aghu import AghuSessionLocal
 from src.schemas.protocolo_schema import ProtocoloCreate
@@ -18,9 +20,13 @@ from src.scripts.seed_utils.constants import (
     TAGS_CONFIG, DILUENTES_CONFIG, CARGOS, FUNCOES, VAGAS_CONFIG, DIAS_FUNCIONAMENTO, HORARIO_ABERTURA,
     HORARIO_FECHAMENTO, NUM_PACIENTES_APP, USUARIOS_SEED, MEDICOS_SEED, EQUIPE_SEED, ESCALAS_SEED, AUSENCIAS_SEED
 )
+from src.scripts.seed_utils.migracoes import aplicar_migracoes
 from src.scripts.seed_utils.patient_seeder import processar_jornada_paciente
 from src.scripts.seed_utils.protocolos_teste import PROTOCOLOS_DATA
 
+# Registrado no metadata para o create_all.
+__all__ = ["TrabalhoRelatorio"]
+
 fake = Faker('pt_BR')
 
 
@@ -44,8 +50,13 @@ async def reset_database(conn):
         "ausencia_profissional",
         "profissionais",
         "itens_prescricao",
+        "pendencias_ciclo",
         "prescricoes",
         "agendamentos",
+        "contadores_status_prescricao",
+        "movimentos_agendamento",
+        "eventos_auditoria",
+        "trabalhos_relatorio",
         "contatos_emergencia",
         "itens_protocolo",
         "pacientes",
@@ -57,6 +68,8 @@ async def reset_database(conn):
     for t in tables:
         await conn.execute(text(f"DROP TABLE IF EXISTS {t} CASCADE"))
     await conn.run_sync(Base.metadata.create_all)
+    # Triggers e índices que só existem nas migrações.
+    await aplicar_migracoes(conn)
 
 
 async def criar_usuarios_e_equipe(session: AsyncSession) -> list[User]:
@@ -122,6 +135,8 @@ async def setup_app():
         for p_aghu in pacientes_selecionados:
             await processar_jornada_paciente(session, p_aghu, protocolos, medicos)
 
+        print("Calculando pendências de agendamento...")
+        await PrescricaoSQLAlchemyProvider(session).atualizar_pendencias()
         await session.commit()
         print("Seed concluído com sucesso!")
 
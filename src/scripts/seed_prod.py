@@ -2,22 +2,27 @@ import asyncio
 
 from sqlalchemy import select
 
-from src.models.agendamento_model import Agendamento
+from src.models.agendamento_model import Agendamento, ContadorStatusPrescricao, MovimentoAgendamento
+from src.models.auditoria_model import EventoAuditoria
 from src.models.auth_model import User, RefreshToken
 from src.models.configuracao_model import Configuracao
 from src.models.equipe_model import Profissional, EscalaPlantao, AusenciaProfissional
 from src.models.paciente_model import Paciente
-from src.models.prescricao_model import Prescricao
+from src.models.prescricao_model import Prescricao, PendenciaCiclo
 from src.models.protocolo_model import Protocolo
+from src.models.relatorio_model import TrabalhoRelatorio
+from src.providers.implementations.prescricao_sqlalchemy_provider import PrescricaoSQLAlchemyProvider
 from src.resources.database import app_engine, AppSessionLocal, Base
 from src.scripts.seed_utils.constants import (
     TAGS_CONFIG, DILUENTES_CONFIG, CARGOS, FUNCOES, VAGAS_CONFIG, DIAS_FUNCIONAMENTO, HORARIO_ABERTURA,
     HORARIO_FECHAMENTO
 )
+from src.scripts.seed_utils.migracoes import aplicar_migracoes
 
 __all__ = [
     "User", "RefreshToken", "Profissional", "EscalaPlantao", "AusenciaProfissional", "Paciente", "Prescricao",
-    "Agendamento", "Protocolo", "Configuracao"
+    "Agendamento", "ContadorStatusPrescricao", "MovimentoAgendamento", "EventoAuditoria", "PendenciaCiclo", "Protocolo",
+    "Configuracao", "TrabalhoRelatorio"
 ]
 
 
@@ -25,6 +30,7 @@ async def setup_app():
     print("Configurando banco de dados...")
     async with app_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await aplicar_migracoes(conn)
 
     async with AppSessionLocal() as session:
         query = select(Configuracao).where(Configuracao.id == 1)
@@ -49,6 +55,11 @@ async def setup_app():
             await session.commit()
             print("Seed concluído com sucesso!")
 
+        # A tabela de pendências é derivada; reconstruí-la a cada deploy cobre bancos anteriores a ela.
+        print("Recalculando pendências de agendamento...")
+        await PrescricaoSQLAlchemyProvider(session).atualizar_pendencias()
+        await session.commit()
+
 
 async def main():
     await setup_app()
@@ -2,6 +2,7 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
+from src.models.auditoria_model import EventoAuditoria
 from src.models.auth_model import User
 from src.models.paciente_model import Paciente
 from src.models.protocolo_model import Protocolo
@@ -9,6 +10,7 @@ from src.schemas.prescricao_schema import (
     PacienteSnapshot, MedicoSnapshot, ProtocoloRef, BlocoPrescricao, ItemPrescricao, UnidadeDoseEnum
 )
 from src.schemas.protocolo_schema import TemplateCiclo
+from src.services import auditoria_service
 from src.scripts.seed_utils.helpers import calcular_bsa
 
 
@@ -105,45 +107,33 @@ def criar_prescricao_payload(
     return documento_json
 
 
-def criar_historico_status_inicial(status_atual: str) -> list[dict]:
-    return [{
-        "data": datetime.now().isoformat(),
-        "usuario_id": "seed",
-        "usuario_nome": "Seed",
-        "status_anterior": status_atual,
-        "status_novo": status_atual,
-        "motivo": "Seed inicial"
-    }]
+def criar_evento_status_inicial(prescricao_id: str, status_atual: str) -> EventoAuditoria:
+    return EventoAuditoria(**auditoria_service.evento_status_prescricao(
+        prescricao_id, status_atual, status_atual, "seed", "Seed", "Seed inicial"
+    ))
 
 
-def criar_historico_agendamento(
+def criar_evento_agendamento_prescricao(
+        prescricao_id: str,
         ag_id: str,
         status_agendamento,
-) -> dict:
-    status_val = status_agendamento.value if hasattr(status_agendamento, 'value') else str(status_agendamento)
-    return {
-        "data": datetime.now().isoformat(),
-        "agendamento_id": ag_id,
-        "status_agendamento": status_val,
-        "usuario_id": "seed",
-        "usuario_nome": "Seed",
-        "observacoes": "Agendamento criado via seed"
-    }
+) -> EventoAuditoria:
+    return EventoAuditoria(**auditoria_service.evento_agendamento_prescricao(
+        prescricao_id, ag_id, status_agendamento, "seed", "Seed", "Agendamento criado via seed"
+    ))
 
 
-def criar_historico_alteracao_agendamento(
+def criar_evento_alteracao_agendamento(
+        ag_id: str,
         tipo: str,
         campo: str,
         valor_antigo: Optional[str],
         valor_novo: Optional[str],
-) -> dict:
-    return {
-        "data": datetime.now().isoformat(),
-        "usuario_id": "seed",
-        "usuario_nome": "Seed",
-        "tipo_alteracao": tipo,
-        "campo": campo,
-        "valor_antigo": valor_antigo,
-        "valor_novo": valor_novo,
-        "motivo": "Seed inicial"
-    }
+) -> EventoAuditoria:
+    return EventoAuditoria(**auditoria_service.evento_alteracao_agendamento(
+        ag_id, tipo, "seed", "Seed",
+        valor_antigo=valor_antigo,
+        valor_novo=valor_novo,
+        campo=campo,
+        motivo="Seed inicial"
+    ))
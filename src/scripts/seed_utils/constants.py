@@ -34,7 +34,8 @@ VAGAS_CONFIG = {
     "infusao_longo": 4,
     "infusao_extra_longo": 4,
     "consultas": 10,
-    "procedimentos": 10
+    "procedimentos": 10,
+    "poltronas": 20
 }
 
 USUARIOS_SEED = [
@@ -0,0 +1,258 @@
+from sqlalchemy import text
+
+# Ajustes idempotentes para bancos criados antes das colunas/índices atuais.
+# O create_all só cria tabelas inexistentes; alterações em tabelas já existentes entram aqui.
+MIGRACOES = [
+    (
+        "agendamentos: versão e data de atualização para sincronização incremental",
+        [
+            "CREATE SEQUENCE IF NOT EXISTS agendamentos_versao_seq",
+            "ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS versao BIGINT",
+            "ALTER TABLE agendamentos ALTER COLUMN versao SET DEFAULT nextval('agendamentos_versao_seq')",
+            "UPDATE agendamentos SET versao = nextval('agendamentos_versao_seq') WHERE versao IS NULL",
+            "ALTER TABLE agendamentos ALTER COLUMN versao SET NOT NULL",
+            "CREATE INDEX IF NOT EXISTS ix_agendamentos_versao ON agendamentos (versao)",
+            "ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS atualizado_em TIMESTAMP NOT NULL DEFAULT now()",
+        ]
+    ),
+    (
+        "prescricoes, protocolos e configuracoes: versão para ETag",
+        [
+            "CREATE SEQUENCE IF NOT EXISTS prescricoes_versao_seq",
+            "ALTER TABLE prescricoes ADD COLUMN IF NOT EXISTS versao BIGINT",
+            "ALTER TABLE prescricoes ALTER COLUMN versao SET DEFAULT nextval('prescricoes_versao_seq')",
+            "UPDATE prescricoes SET versao = nextval('prescricoes_versao_seq') WHERE versao IS NULL",
+            "ALTER TABLE prescricoes ALTER COLUMN versao SET NOT NULL",
+            "CREATE INDEX IF NOT EXISTS ix_prescricoes_versao ON prescricoes (versao)",
+            "CREATE SEQUENCE IF NOT EXISTS protocolos_versao_seq",
+            "ALTER TABLE protocolos ADD COLUMN IF NOT EXISTS versao BIGINT",
+            "ALTER TABLE protocolos ALTER COLUMN versao SET DEFAULT nextval('protocolos_versao_seq')",
+            "UPDATE protocolos SET versao = nextval('protocolos_versao_seq') WHERE versao IS NULL",
+            "ALTER TABLE protocolos ALTER COLUMN versao SET NOT NULL",
+            "CREATE SEQUENCE IF NOT EXISTS configuracoes_versao_seq",
+            "ALTER TABLE configuracoes ADD COLUMN IF NOT EXISTS versao BIGINT",
+            "ALTER TABLE configuracoes ALTER COLUMN versao SET DEFAULT nextval('configuracoes_versao_seq')",
+            "UPDATE configuracoes SET versao = nextval('configuracoes_versao_seq') WHERE versao IS NULL",
+            "ALTER TABLE configuracoes ALTER COLUMN versao SET NOT NULL",
+        ]
+    ),
+    (
+        "agendamentos: colunas geradas de prescrição e dia do ciclo",
+        [
+            "ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS prescricao_id VARCHAR "
+            "GENERATED ALWAYS AS (detalhes -> 'infusao' ->> 'prescricao_id') STORED",
+            "ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS dia_ciclo INTEGER "
+            "GENERATED ALWAYS AS ((detalhes -> 'infusao' ->> 'dia_ciclo')::integer) STORED",
+            "CREATE INDEX IF NOT EXISTS ix_agendamentos_prescricao_dia ON agendamentos (prescricao_id, dia_ciclo)",
+        ]
+    ),
+    (
+        "agendamentos: poltrona alocada",
+        [
+            "ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS poltrona INTEGER",
+        ]
+    ),
+    (
+        "agendamentos: horários como TIME",
+        [
+            # Converte só enquanto as colunas ainda forem texto; a API continua recebendo e devolvendo "HH:MM".
+            """
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM information_schema.columns
+                           WHERE table_name = 'agendamentos' AND column_name = 'horario_inicio'
+                             AND data_type <> 'time without time zone') THEN
+                    ALTER TABLE agendamentos
+                        ALTER COLUMN horario_inicio TYPE TIME USING horario_inicio::time,
+                        ALTER COLUMN horario_fim TYPE TIME USING horario_fim::time;
+                END IF;
+            END $$
+            """,
+            # A sobreposição é sempre checada por paciente e dia, pelo índice (paciente_id, data); o GiST de
+            # período não era usado por nenhuma consulta e só encarecia as escritas.
+            "DROP INDEX IF EXISTS ix_agendamentos_periodo",
+        ]
+    ),
+    (
+        "agendamentos: índice por paciente e data para checar sobreposição",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_agendamentos_paciente_data ON agendamentos (paciente_id, data)",
+        ]
+    ),
+    (
+        "agendamentos: unicidade do dia do ciclo ativo por prescrição",
+        [
+            # Falha se já houver duplicidades ativas; elas precisam ser resolvidas (remarcadas/suspensas) antes.
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_agendamentos_prescricao_dia_ativo ON agendamentos "
+            "(prescricao_id, dia_ciclo) WHERE status NOT IN ('suspenso', 'remarcado')",
+        ]
+    ),
+    (
+        "prescricoes: dias com medicação e itens por dia do ciclo",
+        [
+            "ALTER TABLE prescricoes ADD COLUMN IF NOT EXISTS dias_com_medicacao INTEGER[] NOT NULL DEFAULT '{}'",
+            "ALTER TABLE prescricoes ADD COLUMN IF NOT EXISTS itens_por_dia JSONB",
+            # Mesma derivação de ciclo_service.indexar_dias_ciclo (posições a partir de zero).
+            """
+            UPDATE prescricoes p SET
+                dias_com_medicacao = COALESCE(x.dias, '{}'),
+                itens_por_dia = COALESCE(x.itens, '{}'::jsonb)
+            FROM (
+                SELECT id,
+                       array_agg(dia::integer ORDER BY dia::integer) AS dias,
+                       jsonb_object_agg(dia, posicoes) AS itens
+                FROM (
+                    SELECT p2.id, d.dia, jsonb_agg(jsonb_build_array(b.ordem - 1, i.ordem - 1) ORDER BY b.ordem, i.ordem) AS posicoes
+                    FROM prescricoes p2,
+                         jsonb_array_elements(COALESCE(p2.conteudo -> 'blocos', '[]'::jsonb)) WITH ORDINALITY AS b(bloco, ordem),
+                         jsonb_array_elements(COALESCE(b.bloco -> 'itens', '[]'::jsonb)) WITH ORDINALITY AS i(item, ordem),
+                         LATERAL (SELECT DISTINCT jsonb_array_elements_text(COALESCE(i.item -> 'dias_do_ciclo', '[]'::jsonb)) AS dia) d
+                    WHERE p2.itens_por_dia IS NULL
+                    GROUP BY p2.id, d.dia
+                ) por_dia
+                GROUP BY id
+            ) x
+            WHERE p.id = x.id
+            """,
+            "UPDATE prescricoes SET itens_por_dia = '{}'::jsonb WHERE itens_por_dia IS NULL",
+            "CREATE INDEX IF NOT EXISTS ix_prescricoes_dias_com_medicacao ON prescricoes USING gin (dias_com_medicacao)",
+        ]
+    ),
+    (
+        "contadores_status_prescricao: trigger de contagem por status",
+        [
+            """
+            CREATE OR REPLACE FUNCTION contar_status_prescricao() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    IF OLD.prescricao_id IS NOT NULL THEN
+                        UPDATE contadores_status_prescricao SET total = total - 1
+                        WHERE prescricao_id = OLD.prescricao_id AND status = OLD.status;
+                    END IF;
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                    IF NEW.prescricao_id IS NOT NULL THEN
+                        INSERT INTO contadores_status_prescricao (prescricao_id, status, total)
+                        VALUES (NEW.prescricao_id, NEW.status, 1)
+                        ON CONFLICT (prescricao_id, status)
+                        DO UPDATE SET total = contadores_status_prescricao.total + 1;
+                    END IF;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            "DROP TRIGGER IF EXISTS tg_agendamentos_contar_status ON agendamentos",
+            "CREATE TRIGGER tg_agendamentos_contar_status AFTER INSERT OR DELETE ON agendamentos "
+            "FOR EACH ROW EXECUTE FUNCTION contar_status_prescricao()",
+            "DROP TRIGGER IF EXISTS tg_agendamentos_contar_status_update ON agendamentos",
+            "CREATE TRIGGER tg_agendamentos_contar_status_update AFTER UPDATE ON agendamentos "
+            "FOR EACH ROW WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.prescricao_id IS DISTINCT FROM NEW.prescricao_id) "
+            "EXECUTE FUNCTION contar_status_prescricao()",
+            # Recontagem completa: cobre bancos anteriores ao trigger e corrige qualquer desvio.
+            "DELETE FROM contadores_status_prescricao",
+            "INSERT INTO contadores_status_prescricao (prescricao_id, status, total) "
+            "SELECT prescricao_id, status, count(*) FROM agendamentos WHERE prescricao_id IS NOT NULL "
+            "GROUP BY prescricao_id, status",
+        ]
+    ),
+    (
+        "agendamentos: transação da escrita e movimentos para a sincronização incremental",
+        [
+            "ALTER TABLE agendamentos ADD COLUMN IF NOT EXISTS transacao BIGINT NOT NULL "
+            "DEFAULT pg_current_xact_id()::text::bigint",
+            "CREATE INDEX IF NOT EXISTS ix_agendamentos_transacao ON agendamentos (transacao)",
+            """
+            CREATE OR REPLACE FUNCTION registrar_movimento_agendamento() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO movimentos_agendamento (agendamento_id, data_origem, paciente_origem)
+                VALUES (OLD.id, OLD.data, OLD.paciente_id);
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            "DROP TRIGGER IF EXISTS tg_agendamentos_movimento ON agendamentos",
+            "CREATE TRIGGER tg_agendamentos_movimento AFTER UPDATE ON agendamentos "
+            "FOR EACH ROW WHEN (OLD.data IS DISTINCT FROM NEW.data OR OLD.paciente_id IS DISTINCT FROM NEW.paciente_id) "
+            "EXECUTE FUNCTION registrar_movimento_agendamento()",
+        ]
+    ),
+    (
+        "pacientes: versão para o ETag das listagens de agendamentos",
+        [
+            "CREATE SEQUENCE IF NOT EXISTS pacientes_versao_seq",
+            "ALTER TABLE pacientes ADD COLUMN IF NOT EXISTS versao BIGINT",
+            "ALTER TABLE pacientes ALTER COLUMN versao SET DEFAULT nextval('pacientes_versao_seq')",
+            "UPDATE pacientes SET versao = nextval('pacientes_versao_seq') WHERE versao IS NULL",
+            "ALTER TABLE pacientes ALTER COLUMN versao SET NOT NULL",
+        ]
+    ),
+    (
+        "trabalhos_relatorio: espera entre tentativas",
+        [
+            "ALTER TABLE trabalhos_relatorio ADD COLUMN IF NOT EXISTS disponivel_em TIMESTAMP",
+        ]
+    ),
+    (
+        "eventos_auditoria: históricos JSONB de agendamentos e prescrições",
+        [
+            # A tabela já existe pelo create_all; os arrays antigos são copiados uma única vez e as colunas removidas.
+            """
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM information_schema.columns
+                           WHERE table_name = 'agendamentos' AND column_name = 'historico_alteracoes') THEN
+                    INSERT INTO eventos_auditoria
+                        (entidade, entidade_id, categoria, tipo, campo, valor_antigo, valor_novo, motivo,
+                         usuario_id, usuario_nome, data)
+                    SELECT 'agendamento', a.id, 'alteracao', e ->> 'tipo_alteracao', e ->> 'campo',
+                           e ->> 'valor_antigo', e ->> 'valor_novo', e ->> 'motivo',
+                           e ->> 'usuario_id', e ->> 'usuario_nome', (e ->> 'data')::timestamp
+                    FROM agendamentos a,
+                         jsonb_array_elements(COALESCE(a.historico_alteracoes, '[]'::jsonb)) WITH ORDINALITY AS h(e, ordem)
+                    ORDER BY a.id, h.ordem;
+
+                    ALTER TABLE agendamentos DROP COLUMN historico_alteracoes;
+                END IF;
+
+                IF EXISTS (SELECT 1 FROM information_schema.columns
+                           WHERE table_name = 'prescricoes' AND column_name = 'historico_status') THEN
+                    INSERT INTO eventos_auditoria
+                        (entidade, entidade_id, categoria, tipo, campo, valor_antigo, valor_novo, motivo,
+                         usuario_id, usuario_nome, data)
+                    SELECT 'prescricao', p.id, 'status', 'status', 'status',
+                           e ->> 'status_anterior', e ->> 'status_novo', e ->> 'motivo',
+                           e ->> 'usuario_id', e ->> 'usuario_nome', (e ->> 'data')::timestamp
+                    FROM prescricoes p,
+                         jsonb_array_elements(COALESCE(p.historico_status, '[]'::jsonb)) WITH ORDINALITY AS h(e, ordem)
+                    ORDER BY p.id, h.ordem;
+
+                    ALTER TABLE prescricoes DROP COLUMN historico_status;
+                END IF;
+
+                IF EXISTS (SELECT 1 FROM information_schema.columns
+                           WHERE table_name = 'prescricoes' AND column_name = 'historico_agendamentos') THEN
+                    INSERT INTO eventos_auditoria
+                        (entidade, entidade_id, categoria, tipo, valor_novo, motivo, referencia_id,
+                         usuario_id, usuario_nome, data)
+                    SELECT 'prescricao', p.id, 'agendamento', 'agendamento',
+                           e ->> 'status_agendamento', e ->> 'observacoes', e ->> 'agendamento_id',
+                           e ->> 'usuario_id', e ->> 'usuario_nome', (e ->> 'data')::timestamp
+                    FROM prescricoes p,
+                         jsonb_array_elements(COALESCE(p.historico_agendamentos, '[]'::jsonb)) WITH ORDINALITY AS h(e, ordem)
+                    ORDER BY p.id, h.ordem;
+
+                    ALTER TABLE prescricoes DROP COLUMN historico_agendamentos;
+                END IF;
+            END $$
+            """,
+        ]
+    ),
+]
+
+
+async def aplicar_migracoes(conn):
+    for descricao, comandos in MIGRACOES:
+        print(f"Aplicando migração: {descricao}")
+        for comando in comandos:
+            await conn.execute(text(comando))
@@ -16,11 +16,12 @@ from src.schemas.agendamento_schema import (
 )
 from src.schemas.prescricao_schema import PrescricaoStatusEnum
 from src.scripts.seed_utils.builders import (
-    criar_prescricao_payload, criar_historico_status_inicial, criar_historico_agendamento,
-    criar_historico_alteracao_agendamento
+    criar_prescricao_payload, criar_evento_status_inicial, criar_evento_agendamento_prescricao,
+    criar_evento_alteracao_agendamento
 )
 from src.scripts.seed_utils.constants import TAGS_CONFIG
 from src.scripts.seed_utils.helpers import encontrar_data_valida, gerar_horario
+from src.services.ciclo_service import indexar_dias_ciclo
 
 fake = Faker('pt_BR')
 
@@ -133,13 +134,11 @@ def _criar_agendamentos_infusao(
             status=ag_validator.status,
             tags=ag_validator.tags,
             observacoes=ag_validator.observacoes,
-            detalhes=detalhes_json,
-            historico_alteracoes=[
-                criar_historico_alteracao_agendamento("status", "status", None, ag_validator.status)
-            ]
+            detalhes=detalhes_json
         )
         session.add(ag)
-        prescricao.historico_agendamentos.append(criar_historico_agendamento(ag.id, ag.status))
+        session.add(criar_evento_alteracao_agendamento(ag.id, "status", "status", None, ag_validator.status))
+        session.add(criar_evento_agendamento_prescricao(prescricao.id, ag.id, ag.status))
 
 
 def _criar_ciclo_completo(
@@ -161,6 +160,7 @@ def _criar_ciclo_completo(
         status_presc = PrescricaoStatusEnum.PENDENTE
 
     conteudo_json = criar_prescricao_payload(protocolo, paciente, medico, ciclo_num)
+    dias_infusao, itens_por_dia = indexar_dias_ciclo(conteudo_json['blocos'])
 
     data_emissao = datetime.combine(data_inicio_ciclo, datetime.min.time())
     if status_presc != PrescricaoStatusEnum.PENDENTE:
@@ -173,20 +173,15 @@ def _criar_ciclo_completo(
         data_emissao=data_emissao,
         status=status_presc,
         conteudo=conteudo_json,
-        historico_status=criar_historico_status_inicial(status_presc.value),
-        historico_agendamentos=[]
+        dias_com_medicacao=dias_infusao,
+        itens_por_dia=itens_por_dia
     )
     session.add(presc)
-
-    dias_infusao = set()
-    for bloco in conteudo_json['blocos']:
-        for item in bloco['itens']:
-            for d in item['dias_do_ciclo']:
-                dias_infusao.add(d)
+    session.add(criar_evento_status_inicial(presc.id, status_presc.value))
 
     _criar_agendamentos_infusao(
         session, paciente, presc, protocolo,
-        data_inicio_ciclo, ciclo_num, sorted(dias_infusao)
+        data_inicio_ciclo, ciclo_num, dias_infusao
     )
 
 
@@ -220,12 +215,10 @@ def gerar_eventos_extras(session: AsyncSession, paciente: Paciente):
             horario_fim=fim,
             checkin=passado,
             status=status,
-            detalhes={detalhe_key: detalhe_val},
-            historico_alteracoes=[
-                criar_historico_alteracao_agendamento("status", "status", None, status.value)
-            ]
+            detalhes={detalhe_key: detalhe_val}
         )
         session.add(ag)
+        session.add(criar_evento_alteracao_agendamento(ag.id, "status", "status", None, status.value))
 
 
 async def processar_jornada_paciente(
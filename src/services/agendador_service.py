@@ -0,0 +1,140 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Iterable, Tuple
+
+from src.services.ocupacao_service import contar_por_categoria, minutos_do_horario, horario_dos_minutos
+
+INTERVALO_MINUTOS = 15
+
+
+def dia_semana(dia: date) -> int:
+    # Mesma convenção do front e das configurações (0 = domingo).
+    return dia.isoweekday() % 7
+
+
+# Poltronas ocupadas em cada intervalo de INTERVALO_MINUTOS entre a abertura e o fechamento.
+def montar_perfil_dia(linhas: List[dict], abertura: int, fechamento: int) -> List[int]:
+    total_intervalos = max((fechamento - abertura) // INTERVALO_MINUTOS, 0)
+    variacoes = [0] * (total_intervalos + 1)
+
+    for linha in linhas:
+        try:
+            inicio = minutos_do_horario(linha["horario_inicio"])
+            fim = minutos_do_horario(linha["horario_fim"])
+        except (ValueError, AttributeError):
+            continue
+        i = max((inicio - abertura) // INTERVALO_MINUTOS, 0)
+        f = min(-(-(fim - abertura) // INTERVALO_MINUTOS), total_intervalos)
+        if f <= i:
+            continue
+        variacoes[i] += linha["total"]
+        variacoes[f] -= linha["total"]
+
+    perfil = []
+    ocupadas = 0
+    for variacao in variacoes[:total_intervalos]:
+        ocupadas += variacao
+        perfil.append(ocupadas)
+    return perfil
+
+
+# Início (em minutos) com o menor pico de ocupação para a duração pedida; no empate, o mais cedo.
+def melhor_horario(perfil: List[int], abertura: int, duracao: int) -> Optional[Tuple[int, int]]:
+    largura = -(-duracao // INTERVALO_MINUTOS)
+    if largura <= 0 or largura > len(perfil):
+        return None
+
+    melhor = None
+    for inicio in range(len(perfil) - largura + 1):
+        pico = max(perfil[inicio:inicio + largura])
+        if melhor is None or pico < melhor[1]:
+            melhor = (inicio, pico)
+            if pico == 0:
+                break
+
+    return abertura + melhor[0] * INTERVALO_MINUTOS, melhor[1]
+
+
+class AgendaLivre:
+    """Visão em memória da ocupação de um período, montada a partir das linhas de contar_ocupacao."""
+
+    def __init__(
+            self,
+            linhas_por_dia: Dict[date, List[dict]],
+            horario_abertura: str,
+            horario_fechamento: str,
+            dias_funcionamento: Iterable[int],
+            vagas: Dict[str, int]
+    ):
+        self.linhas_por_dia = linhas_por_dia
+        self.abertura = minutos_do_horario(horario_abertura)
+        self.fechamento = minutos_do_horario(horario_fechamento)
+        self.dias_funcionamento = set(dias_funcionamento or [])
+        self.vagas = vagas or {}
+        self._opcoes: Dict[date, Optional[dict]] = {}
+
+    def opcao_dia(self, dia: date, categoria: Optional[str], duracao: int) -> Optional[dict]:
+        if dia not in self._opcoes:
+            self._opcoes[dia] = self._calcular_opcao(dia, categoria, duracao)
+        return self._opcoes[dia]
+
+    def _calcular_opcao(self, dia: date, categoria: Optional[str], duracao: int) -> Optional[dict]:
+        if self.dias_funcionamento and dia_semana(dia) not in self.dias_funcionamento:
+            return None
+
+        linhas = self.linhas_por_dia.get(dia, [])
+        limite = self.vagas.get(categoria) if categoria else None
+        ocupadas = contar_por_categoria(linhas).get(categoria, 0) if categoria else 0
+        if limite is not None and ocupadas >= limite:
+            return None
+
+        # Só infusões ocupam poltrona; consultas e procedimentos não entram no perfil.
+        infusoes = [linha for linha in linhas if linha["tipo"] == "infusao"]
+        horario = melhor_horario(montar_perfil_dia(infusoes, self.abertura, self.fechamento), self.abertura, duracao)
+        if not horario:
+            return None
+
+        inicio, pico = horario
+        poltronas = self.vagas.get("poltronas")
+        if poltronas is not None and pico >= poltronas:
+            return None
+
+        return {
+            "data": dia,
+            "horario_inicio": horario_dos_minutos(inicio),
+            "horario_fim": horario_dos_minutos(inicio + duracao),
+            "ocupacao_pico": pico,
+            "vagas_ocupadas": ocupadas,
+            "vagas": limite
+        }
+
+
+def sugerir_ciclos(
+        agenda: AgendaLivre,
+        dias_ciclo: List[int],
+        inicio: date,
+        semanas: int,
+        duracao: int,
+        categoria: Optional[str],
+        dias_semana_permitidos: Iterable[int],
+        limite: int
+) -> List[dict]:
+    permitidos = set(dias_semana_permitidos or [])
+    sugestoes = []
+
+    for deslocamento in range(semanas * 7):
+        data_inicio = inicio + timedelta(days=deslocamento)
+        dias = []
+        for dia in dias_ciclo:
+            data_dia = data_inicio + timedelta(days=dia - 1)
+            if permitidos and dia_semana(data_dia) not in permitidos:
+                break
+            opcao = agenda.opcao_dia(data_dia, categoria, duracao)
+            if not opcao:
+                break
+            dias.append({"dia_ciclo": dia, **opcao})
+        else:
+            sugestoes.append({"data_inicio": data_inicio, "dias": dias})
+            if len(sugestoes) >= limite:
+                break
+
+    return sugestoes
@@ -0,0 +1,135 @@
+from datetime import datetime
+from typing import List, Optional
+
+from src.models.auditoria_model import EventoAuditoria
+
+ENTIDADE_AGENDAMENTO = "agendamento"
+ENTIDADE_PRESCRICAO = "prescricao"
+
+CATEGORIA_ALTERACAO = "alteracao"
+CATEGORIA_STATUS = "status"
+CATEGORIA_AGENDAMENTO = "agendamento"
+
+
+def _texto(valor) -> Optional[str]:
+    if valor is None:
+        return None
+    return valor.value if hasattr(valor, "value") else str(valor)
+
+
+def evento_alteracao_agendamento(
+        agendamento_id: str,
+        tipo_alteracao: str,
+        usuario_id: Optional[str],
+        usuario_nome: Optional[str],
+        valor_antigo=None,
+        valor_novo=None,
+        campo: Optional[str] = None,
+        motivo: Optional[str] = None
+) -> dict:
+    return {
+        "entidade": ENTIDADE_AGENDAMENTO,
+        "entidade_id": agendamento_id,
+        "categoria": CATEGORIA_ALTERACAO,
+        "tipo": tipo_alteracao,
+        "campo": campo,
+        "valor_antigo": _texto(valor_antigo),
+        "valor_novo": _texto(valor_novo),
+        "motivo": motivo,
+        "referencia_id": None,
+        "usuario_id": usuario_id,
+        "usuario_nome": usuario_nome,
+        "data": datetime.now()
+    }
+
+
+def evento_status_prescricao(
+        prescricao_id: str,
+        status_anterior,
+        status_novo,
+        usuario_id: Optional[str],
+        usuario_nome: Optional[str],
+        motivo: Optional[str] = None
+) -> dict:
+    return {
+        "entidade": ENTIDADE_PRESCRICAO,
+        "entidade_id": prescricao_id,
+        "categoria": CATEGORIA_STATUS,
+        "tipo": "status",
+        "campo": "status",
+        "valor_antigo": _texto(status_anterior),
+        "valor_novo": _texto(status_novo),
+        "motivo": motivo,
+        "referencia_id": None,
+        "usuario_id": usuario_id,
+        "usuario_nome": usuario_nome,
+        "data": datetime.now()
+    }
+
+
+def evento_agendamento_prescricao(
+        prescricao_id: str,
+        agendamento_id: str,
+        status_agendamento,
+        usuario_id: Optional[str],
+        usuario_nome: Optional[str],
+        observacoes: Optional[str] = None
+) -> dict:
+    return {
+        "entidade": ENTIDADE_PRESCRICAO,
+        "entidade_id": prescricao_id,
+        "categoria": CATEGORIA_AGENDAMENTO,
+        "tipo": "agendamento",
+        "campo": None,
+        "valor_antigo": None,
+        "valor_novo": _texto(status_agendamento),
+        "motivo": observacoes,
+        "referencia_id": agendamento_id,
+        "usuario_id": usuario_id,
+        "usuario_nome": usuario_nome,
+        "data": datetime.now()
+    }
+
+
+def montar_historico_agendamento(eventos: List[EventoAuditoria]) -> List[dict]:
+    return [
+        {
+            "data": e.data,
+            "usuario_id": e.usuario_id,
+            "usuario_nome": e.usuario_nome,
+            "tipo_alteracao": e.tipo,
+            "campo": e.campo,
+            "valor_antigo": e.valor_antigo,
+            "valor_novo": e.valor_novo,
+            "motivo": e.motivo
+        }
+        for e in eventos if e.categoria == CATEGORIA_ALTERACAO
+    ]
+
+
+def montar_historico_status_prescricao(eventos: List[EventoAuditoria]) -> List[dict]:
+    return [
+        {
+            "data": e.data,
+            "usuario_id": e.usuario_id,
+            "usuario_nome": e.usuario_nome,
+            "status_anterior": e.valor_antigo,
+            "status_novo": e.valor_novo,
+            "motivo": e.motivo
+        }
+        for e in eventos if e.categoria == CATEGORIA_STATUS
+    ]
+
+
+def montar_historico_agendamentos_prescricao(eventos: List[EventoAuditoria]) -> List[dict]:
+    return [
+        {
+            "data": e.data,
+            "agendamento_id": e.referencia_id,
+            "status_agendamento": e.valor_novo,
+            "usuario_id": e.usuario_id,
+            "usuario_nome": e.usuario_nome,
+            "observacoes": e.motivo
+        }
+        for e in eventos if e.categoria == CATEGORIA_AGENDAMENTO
+    ]
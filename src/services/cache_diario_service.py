@@ -0,0 +1,90 @@
+import os
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from src.services.eventos_service import eventos_agendamento
+
+LIMITE_DIAS_EM_CACHE = 400
+# Rede de segurança para um evento perdido (NOTIFY de outro worker durante uma queda do LISTEN, por exemplo).
+CACHE_DIARIO_TTL_SEGUNDOS = float(os.getenv("CACHE_DIARIO_TTL_SEGUNDOS", "300"))
+
+
+class CacheDiario:
+    """
+    Cache em memória de agregados da agenda, uma entrada por data.
+    É invalidado pelos eventos de agendamento, que chegam a todos os workers via LISTEN/NOTIFY,
+    e cada entrada expira após um tempo máximo mesmo sem eventos.
+    """
+
+    def __init__(self, limite: int = LIMITE_DIAS_EM_CACHE, ttl: float = CACHE_DIARIO_TTL_SEGUNDOS):
+        self.limite = limite
+        self.ttl = ttl
+        self.geracao = 0
+        self._valores: "OrderedDict[date, Tuple[float, Any]]" = OrderedDict()
+
+    def obter(self, dia: date) -> Optional[Any]:
+        entrada = self._valores.get(dia)
+        if entrada is None:
+            return None
+        guardado_em, valor = entrada
+        if time.monotonic() - guardado_em > self.ttl:
+            del self._valores[dia]
+            return None
+        self._valores.move_to_end(dia)
+        return valor
+
+    def guardar(self, dia: date, valor: Any, geracao: int):
+        # Leituras que começaram antes de uma invalidação não podem repovoar o cache com dados antigos.
+        if geracao != self.geracao:
+            return
+        self._valores[dia] = (time.monotonic(), valor)
+        self._valores.move_to_end(dia)
+        while len(self._valores) > self.limite:
+            self._valores.popitem(last=False)
+
+    def invalidar(self, dias: Iterable[date]):
+        self.geracao += 1
+        for dia in dias:
+            self._valores.pop(dia, None)
+
+    def limpar(self):
+        self.geracao += 1
+        self._valores.clear()
+
+    def ao_receber_evento(self, evento: dict):
+        datas = evento.get("datas")
+        if not datas:
+            self.limpar()
+            return
+        self.invalidar(date.fromisoformat(d) for d in datas)
+
+    async def obter_periodo(
+            self,
+            inicio: date,
+            fim: date,
+            carregar: Callable[[date, date], Awaitable[Dict[date, Any]]],
+            vazio: Callable[[], Any]
+    ) -> Dict[date, Any]:
+        dias = [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+        resultado = {dia: self.obter(dia) for dia in dias}
+        faltantes = [dia for dia, valor in resultado.items() if valor is None]
+
+        if faltantes:
+            geracao = self.geracao
+            carregados = await carregar(faltantes[0], faltantes[-1])
+            for dia in faltantes:
+                valor = carregados.get(dia)
+                if valor is None:
+                    valor = vazio()
+                resultado[dia] = valor
+                self.guardar(dia, valor, geracao)
+
+        return resultado
+
+
+def criar_cache_diario() -> CacheDiario:
+    cache = CacheDiario()
+    eventos_agendamento.registrar_ouvinte(cache.ao_receber_evento)
+    return cache
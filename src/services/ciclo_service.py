@@ -0,0 +1,18 @@
+from typing import Dict, List, Tuple
+
+
+# Derivados do conteúdo uma única vez, na criação da prescrição; o conteúdo não muda depois disso.
+# As posições [bloco, item] apontam direto para conteudo['blocos'], sem depender de id_item.
+def indexar_dias_ciclo(blocos: List[dict]) -> Tuple[List[int], Dict[str, List[List[int]]]]:
+    itens_por_dia = {}
+    for i_bloco, bloco in enumerate(blocos or []):
+        for i_item, item in enumerate(bloco.get('itens', [])):
+            for dia in dict.fromkeys(item.get('dias_do_ciclo', [])):
+                itens_por_dia.setdefault(str(dia), []).append([i_bloco, i_item])
+
+    return sorted(int(dia) for dia in itens_por_dia), itens_por_dia
+
+
+def itens_do_dia(conteudo: dict, itens_por_dia: Dict[str, List[List[int]]], dia: int) -> List[dict]:
+    blocos = (conteudo or {}).get('blocos', [])
+    return [blocos[i_bloco]['itens'][i_item] for i_bloco, i_item in (itens_por_dia or {}).get(str(dia), [])]
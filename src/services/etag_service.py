@@ -0,0 +1,39 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+CACHE_CONTROL_REVALIDAR = "no-cache"
+
+
+def gerar_etag(*partes) -> str:
+    chave = "|".join("" if parte is None else str(parte) for parte in partes)
+    return '"' + hashlib.sha1(chave.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_corresponde(request: Request, etag: Optional[str]) -> bool:
+    if not etag:
+        return False
+
+    cabecalho = request.headers.get("if-none-match")
+    if not cabecalho:
+        return False
+    if cabecalho.strip() == "*":
+        return True
+
+    candidatos = {valor.strip().removeprefix("W/") for valor in cabecalho.split(",")}
+    return etag in candidatos
+
+
+def aplicar_etag(response: Response, etag: Optional[str]):
+    if not etag:
+        return
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL_REVALIDAR
+
+
+def resposta_nao_modificada(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL_REVALIDAR}
+    )
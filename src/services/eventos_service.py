@@ -0,0 +1,152 @@
+import asyncio
+import json
+from typing import Optional, Set, List, Callable
+
+import asyncpg
+
+from src.resources.database import app_engine
+
+CANAL_EVENTOS_AGENDAMENTO = "agendamentos_eventos"
+TAMANHO_FILA_ASSINANTE = 100
+LIMITE_PAYLOAD_NOTIFY = 7500
+ESPERA_RECONEXAO_INICIAL = 1
+ESPERA_RECONEXAO_MAXIMA = 30
+INTERVALO_VERIFICACAO_SEGUNDOS = 30
+
+# Publicado localmente quando o LISTEN volta depois de uma queda: notificações do intervalo se perderam,
+# então caches e clientes precisam recarregar tudo. Não tem "datas" de propósito.
+EVENTO_RECONEXAO = {"tipo": "reconexao"}
+
+
+class EventosAgendamentoBroadcaster:
+    """
+    Distribui eventos de agendamento aos streams SSE do worker.
+    Publica via NOTIFY e recebe via LISTEN, para que todos os workers vejam as mesmas alterações.
+    """
+
+    def __init__(self, canal: str = CANAL_EVENTOS_AGENDAMENTO):
+        self.canal = canal
+        self._assinantes: Set[asyncio.Queue] = set()
+        self._ouvintes: List[Callable[[dict], None]] = []
+        self._conexao: Optional[asyncpg.Connection] = None
+        self._lock = asyncio.Lock()
+        self._perdida = asyncio.Event()
+        self._tarefa: Optional[asyncio.Task] = None
+
+    async def iniciar(self):
+        self._tarefa = asyncio.create_task(self._manter_conexao())
+
+    async def encerrar(self):
+        for fila in list(self._assinantes):
+            self._enfileirar(fila, None)
+        if self._tarefa:
+            self._tarefa.cancel()
+            await asyncio.gather(self._tarefa, return_exceptions=True)
+            self._tarefa = None
+        if self._conexao:
+            await self._conexao.close()
+            self._conexao = None
+
+    async def _conectar(self) -> asyncpg.Connection:
+        dsn = app_engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        conexao = await asyncpg.connect(dsn)
+        conexao.add_termination_listener(self._ao_perder_conexao)
+        await conexao.add_listener(self.canal, self._ao_receber_notificacao)
+        return conexao
+
+    async def _manter_conexao(self):
+        espera = ESPERA_RECONEXAO_INICIAL
+        perdeu_eventos = False
+        while True:
+            self._perdida.clear()
+            try:
+                self._conexao = await self._conectar()
+            except Exception as e:
+                print(f"AVISO: LISTEN/NOTIFY indisponível, eventos restritos a este worker (nova tentativa em {espera}s): {e}")
+                self._conexao = None
+                perdeu_eventos = True
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, ESPERA_RECONEXAO_MAXIMA)
+                continue
+
+            espera = ESPERA_RECONEXAO_INICIAL
+            if perdeu_eventos:
+                self._distribuir(dict(EVENTO_RECONEXAO))
+
+            await self._vigiar_conexao()
+            perdeu_eventos = True
+            conexao, self._conexao = self._conexao, None
+            if conexao and not conexao.is_closed():
+                conexao.terminate()
+
+    async def _vigiar_conexao(self):
+        # O aviso de término não pega conexões meio abertas; um SELECT periódico confirma que o LISTEN continua vivo.
+        while True:
+            try:
+                await asyncio.wait_for(self._perdida.wait(), timeout=INTERVALO_VERIFICACAO_SEGUNDOS)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                async with self._lock:
+                    await self._conexao.fetchval("SELECT 1", timeout=5)
+            except Exception as e:
+                print(f"AVISO: conexão de LISTEN/NOTIFY perdida: {e}")
+                return
+
+    def _ao_perder_conexao(self, conexao):
+        self._perdida.set()
+
+    def assinar(self) -> asyncio.Queue:
+        fila = asyncio.Queue(maxsize=TAMANHO_FILA_ASSINANTE)
+        self._assinantes.add(fila)
+        return fila
+
+    def cancelar_assinatura(self, fila: asyncio.Queue):
+        self._assinantes.discard(fila)
+
+    def registrar_ouvinte(self, ouvinte: Callable[[dict], None]):
+        self._ouvintes.append(ouvinte)
+
+    async def publicar(self, evento: dict):
+        payload = json.dumps(evento, default=str)
+        if len(payload) > LIMITE_PAYLOAD_NOTIFY:
+            evento = {k: v for k, v in evento.items() if k != "ids"}
+            payload = json.dumps(evento, default=str)
+
+        if self._conexao and not self._conexao.is_closed():
+            try:
+                async with self._lock:
+                    await self._conexao.execute("SELECT pg_notify($1, $2)", self.canal, payload)
+                return
+            except Exception as e:
+                print(f"Erro ao publicar evento via NOTIFY: {e}")
+                self._perdida.set()
+
+        self._distribuir(evento)
+
+    def _ao_receber_notificacao(self, conexao, pid, canal, payload):
+        try:
+            evento = json.loads(payload)
+        except ValueError:
+            return
+        self._distribuir(evento)
+
+    def _distribuir(self, evento: dict):
+        for ouvinte in self._ouvintes:
+            try:
+                ouvinte(evento)
+            except Exception as e:
+                print(f"Erro em ouvinte de eventos de agendamento: {e}")
+        for fila in list(self._assinantes):
+            self._enfileirar(fila, evento)
+
+    @staticmethod
+    def _enfileirar(fila: asyncio.Queue, evento: Optional[dict]):
+        if fila.full():
+            # Assinante lento: descarta o evento mais antigo em vez de bloquear os demais.
+            fila.get_nowait()
+        fila.put_nowait(evento)
+
+
+eventos_agendamento = EventosAgendamentoBroadcaster()
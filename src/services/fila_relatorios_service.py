@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from src.models.relatorio_model import TrabalhoRelatorio
+from src.providers.implementations.agendamento_sqlalchemy_provider import AgendamentoSQLAlchemyProvider
+from src.providers.implementations.equipe_sqlalchemy_provider import EquipeSqlAlchemyProvider
+from src.providers.implementations.prescricao_sqlalchemy_provider import PrescricaoSQLAlchemyProvider
+from src.providers.implementations.relatorio_sqlalchemy_provider import RelatorioSQLAlchemyProvider
+from src.resources.database import AppSessionLocal
+
+RELATORIO_WORKERS = int(os.getenv("RELATORIO_WORKERS", "2"))
+RELATORIO_RETENCAO_HORAS = float(os.getenv("RELATORIO_RETENCAO_HORAS", "24"))
+RELATORIO_TIMEOUT_MINUTOS = float(os.getenv("RELATORIO_TIMEOUT_MINUTOS", "30"))
+RELATORIO_TENTATIVAS = 3
+ESPERA_TENTATIVA_SEGUNDOS = 30
+ESPERA_SOBRECARGA_SEGUNDOS = 5
+INTERVALO_CONSULTA_SEGUNDOS = 5
+INTERVALO_LIMPEZA_SEGUNDOS = 300
+# Folga para a recuperação não devolver à fila um trabalho que o próprio worker ainda está encerrando por timeout.
+MARGEM_RECUPERACAO_SEGUNDOS = 60
+
+ExecutorRelatorio = Callable[..., Awaitable[Tuple[bytes, str]]]
+
+
+class FilaRelatorios:
+    """
+    Consome a tabela trabalhos_relatorio com um pool de tarefas por worker.
+    A reserva usa FOR UPDATE SKIP LOCKED, então vários workers e réplicas podem consumir a mesma fila.
+    """
+
+    def __init__(self, workers: int = RELATORIO_WORKERS):
+        self.workers = max(workers, 1)
+        self._executor: Optional[ExecutorRelatorio] = None
+        self._tarefas: List[asyncio.Task] = []
+        self._aviso = asyncio.Event()
+        self._ultima_limpeza = 0.0
+
+    async def iniciar(self, executor: ExecutorRelatorio):
+        self._executor = executor
+        self._tarefas = [asyncio.create_task(self._consumir()) for _ in range(self.workers)]
+
+    async def encerrar(self):
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        self._tarefas = []
+
+    def notificar(self):
+        # Acorda os consumidores deste worker; os demais encontram o trabalho na próxima consulta.
+        self._aviso.set()
+
+    def _expiracao(self) -> datetime:
+        return datetime.now() + timedelta(hours=RELATORIO_RETENCAO_HORAS)
+
+    @staticmethod
+    def _descrever_erro(e: Exception) -> str:
+        if isinstance(e, asyncio.TimeoutError):
+            return "Tempo esgotado na geração do relatório"
+        if not isinstance(e, HTTPException):
+            return str(e)
+        if isinstance(e.detail, str):
+            return e.detail
+        return json.dumps(e.detail, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _espera_sobrecarga(e: HTTPException) -> float:
+        try:
+            return float((e.headers or {}).get("Retry-After", ESPERA_SOBRECARGA_SEGUNDOS))
+        except ValueError:
+            return ESPERA_SOBRECARGA_SEGUNDOS
+
+    async def _consumir(self):
+        while True:
+            self._aviso.clear()
+            try:
+                await self._limpar()
+                processou = await self._processar_proximo()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"AVISO: falha na fila de relatórios: {e}")
+                processou = False
+
+            if not processou:
+                try:
+                    await asyncio.wait_for(self._aviso.wait(), timeout=INTERVALO_CONSULTA_SEGUNDOS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _limpar(self):
+        if time.monotonic() - self._ultima_limpeza < INTERVALO_LIMPEZA_SEGUNDOS:
+            return
+        self._ultima_limpeza = time.monotonic()
+
+        async with AppSessionLocal() as session:
+            provider = RelatorioSQLAlchemyProvider(session)
+            agora = datetime.now()
+            await provider.recuperar_interrompidos(
+                agora - timedelta(minutes=RELATORIO_TIMEOUT_MINUTOS, seconds=MARGEM_RECUPERACAO_SEGUNDOS),
+                RELATORIO_TENTATIVAS,
+                self._expiracao()
+            )
+            await provider.remover_expirados(agora)
+
+    async def _processar_proximo(self) -> bool:
+        async with AppSessionLocal() as session:
+            relatorio_provider = RelatorioSQLAlchemyProvider(session)
+            trabalho: Optional[TrabalhoRelatorio] = await relatorio_provider.reservar_proximo()
+            if not trabalho:
+                return False
+
+            # O rollback expira as instâncias da sessão; depois dele só se usam estes valores.
+            trabalho_id = trabalho.id
+            tentativas = trabalho.tentativas
+            try:
+                # Passado o limite, o trabalho seria devolvido à fila e executado de novo por outro worker.
+                arquivo, nome_arquivo = await asyncio.wait_for(
+                    self._executor(
+                        trabalho,
+                        AgendamentoSQLAlchemyProvider(session),
+                        PrescricaoSQLAlchemyProvider(session),
+                        EquipeSqlAlchemyProvider(session)
+                    ),
+                    timeout=RELATORIO_TIMEOUT_MINUTOS * 60
+                )
+            except Exception as e:
+                await session.rollback()
+                erro = self._descrever_erro(e)
+                if isinstance(e, HTTPException) and e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                    # Renderizador cheio: não conta como tentativa.
+                    disponivel_em = datetime.now() + timedelta(seconds=self._espera_sobrecarga(e))
+                    await relatorio_provider.adiar_trabalho(trabalho_id, erro, disponivel_em)
+                    return False
+
+                # Espera exponencial entre as tentativas: 30 s, 60 s, 120 s...
+                disponivel_em = datetime.now() + timedelta(seconds=ESPERA_TENTATIVA_SEGUNDOS * 2 ** (tentativas - 1))
+                await relatorio_provider.registrar_falha(
+                    trabalho_id, erro, RELATORIO_TENTATIVAS, self._expiracao(), disponivel_em
+                )
+                return True
+
+            await relatorio_provider.concluir_trabalho(trabalho_id, arquivo, nome_arquivo, self._expiracao())
+            return True
+
+
+fila_relatorios = FilaRelatorios()
@@ -0,0 +1,119 @@
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from src.services.cache_diario_service import criar_cache_diario
+
+LIMITE_RAPIDO_MINUTOS = 30
+LIMITE_MEDIO_MINUTOS = 120
+LIMITE_LONGO_MINUTOS = 240
+
+CATEGORIAS_VAGAS = [
+    "infusao_rapido",
+    "infusao_medio",
+    "infusao_longo",
+    "infusao_extra_longo",
+    "consultas",
+    "procedimentos",
+]
+
+STATUS_FORA_DA_CAPACIDADE = ["remarcado", "suspenso"]
+
+ULTIMO_MINUTO_DIA = 23 * 60 + 59
+
+cache_ocupacao = criar_cache_diario()
+
+
+def minutos_do_horario(horario: str) -> int:
+    horas, minutos = horario.split(":")[:2]
+    return int(horas) * 60 + int(minutos)
+
+
+def horario_dos_minutos(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def categoria_vaga(tipo: str, horario_inicio: str, horario_fim: str) -> Optional[str]:
+    if tipo == "consulta":
+        return "consultas"
+    if tipo == "procedimento":
+        return "procedimentos"
+    if tipo != "infusao":
+        return None
+
+    try:
+        duracao = minutos_do_horario(horario_fim) - minutos_do_horario(horario_inicio)
+    except (ValueError, AttributeError):
+        return None
+
+    if duracao <= LIMITE_RAPIDO_MINUTOS:
+        return "infusao_rapido"
+    if duracao <= LIMITE_MEDIO_MINUTOS:
+        return "infusao_medio"
+    if duracao <= LIMITE_LONGO_MINUTOS:
+        return "infusao_longo"
+    return "infusao_extra_longo"
+
+
+def contar_por_categoria(linhas: List[dict]) -> Dict[str, int]:
+    contagem = defaultdict(int)
+    for linha in linhas:
+        categoria = categoria_vaga(linha["tipo"], linha["horario_inicio"], linha["horario_fim"])
+        if categoria:
+            contagem[categoria] += linha["total"]
+    return dict(contagem)
+
+
+def montar_linha_tempo(linhas: List[dict]) -> List[dict]:
+    variacoes = defaultdict(int)
+    for linha in linhas:
+        try:
+            inicio = minutos_do_horario(linha["horario_inicio"])
+            fim = minutos_do_horario(linha["horario_fim"])
+        except (ValueError, AttributeError):
+            continue
+        if fim <= inicio:
+            continue
+        variacoes[inicio] += linha["total"]
+        variacoes[fim] -= linha["total"]
+
+    faixas = []
+    ocupadas = 0
+    pontos = sorted(variacoes)
+    for atual, proximo in zip(pontos, pontos[1:]):
+        ocupadas += variacoes[atual]
+        if ocupadas > 0:
+            faixas.append({
+                "inicio": horario_dos_minutos(atual),
+                "fim": horario_dos_minutos(proximo),
+                "ocupadas": ocupadas
+            })
+    return faixas
+
+
+def montar_ocupacao_dia(linhas: List[dict], vagas: Dict[str, int]) -> dict:
+    por_turno = defaultdict(list)
+    for linha in linhas:
+        por_turno[linha["turno"]].append(linha)
+
+    contagem_dia = contar_por_categoria(linhas)
+    categorias = []
+    for categoria in CATEGORIAS_VAGAS:
+        limite = vagas.get(categoria)
+        ocupadas = contagem_dia.get(categoria, 0)
+        categorias.append({
+            "categoria": categoria,
+            "vagas": limite,
+            "ocupadas": ocupadas,
+            "livres": max(limite - ocupadas, 0) if limite is not None else None
+        })
+
+    turnos = [
+        {
+            "turno": turno,
+            "ocupadas": contar_por_categoria(linhas_turno),
+            "linha_tempo": montar_linha_tempo(linhas_turno)
+        }
+        for turno, linhas_turno in sorted(por_turno.items())
+    ]
+
+    return {"categorias": categorias, "turnos": turnos}
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import os
+import tempfile
+import uuid
+from typing import Optional
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(tempfile.gettempdir(), "quimio_pdf_cache"))
+PDF_CACHE_LIMITE_MB = int(os.getenv("PDF_CACHE_LIMITE_MB", "256"))
+
+
+def chave_pdf(*partes) -> str:
+    serializado = json.dumps(partes, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+
+class CachePdf:
+    """
+    Cache em disco de PDFs endereçados pelo conteúdo, compartilhado entre os workers.
+    A data de modificação marca o último uso; ao passar do limite, os menos usados são removidos.
+    """
+
+    def __init__(self, diretorio: str = PDF_CACHE_DIR, limite_bytes: int = PDF_CACHE_LIMITE_MB * 1024 * 1024):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self._tamanho_estimado: Optional[int] = None
+
+    def caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.pdf")
+
+    def ler(self, chave: str) -> Optional[bytes]:
+        # Outro worker pode remover o arquivo a qualquer momento; o conteúdo lido aqui não depende mais dele.
+        caminho = self.caminho(chave)
+        try:
+            with open(caminho, "rb") as arquivo:
+                conteudo = arquivo.read()
+            os.utime(caminho)
+        except FileNotFoundError:
+            return None
+        return conteudo
+
+    def guardar(self, chave: str, conteudo: bytes) -> str:
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = self.caminho(chave)
+        # Grava num temporário e renomeia, para nenhum leitor ver um arquivo pela metade.
+        temporario = os.path.join(self.diretorio, f".{chave}.{uuid.uuid4().hex}.tmp")
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(conteudo)
+        os.replace(temporario, caminho)
+
+        if self._tamanho_estimado is not None:
+            self._tamanho_estimado += len(conteudo)
+        if self._tamanho_estimado is None or self._tamanho_estimado > self.limite_bytes:
+            self._remover_excedente(preservar=caminho)
+        return caminho
+
+    def _remover_excedente(self, preservar: str):
+        arquivos = []
+        with os.scandir(self.diretorio) as entradas:
+            for entrada in entradas:
+                if not entrada.name.endswith(".pdf"):
+                    continue
+                try:
+                    info = entrada.stat()
+                except FileNotFoundError:
+                    continue
+                arquivos.append((info.st_mtime, info.st_size, entrada.path))
+
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= self.limite_bytes:
+                break
+            if caminho == preservar:
+                continue
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+        self._tamanho_estimado = total
+
+
+cache_pdf = CachePdf()
@@ -0,0 +1,137 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from pypdf import PdfWriter
+from weasyprint import HTML
+
+from src.services.templates_service import carregar_templates, renderizar_html
+
+PDF_PROCESSOS = int(os.getenv("PDF_PROCESSOS", "2"))
+PDF_FILA_MAXIMA = int(os.getenv("PDF_FILA_MAXIMA", "16"))
+PDF_TIMEOUT_SEGUNDOS = float(os.getenv("PDF_TIMEOUT_SEGUNDOS", "60"))
+
+
+# Executado nos processos do pool: recebe só o nome do template e um contexto serializável.
+def _renderizar(template_nome: str, contexto: dict) -> bytes:
+    return HTML(string=renderizar_html(template_nome, contexto)).write_pdf()
+
+
+def concatenar_pdfs(pdfs: List[bytes]) -> bytes:
+    escritor = PdfWriter()
+    for pdf in pdfs:
+        escritor.append(io.BytesIO(pdf))
+    saida = io.BytesIO()
+    escritor.write(saida)
+    return saida.getvalue()
+
+
+class RenderizadorPdf:
+    """
+    Renderiza templates Jinja em PDF (WeasyPrint) num pool de processos, fora do event loop.
+    Limita os trabalhos pendentes por worker e o tempo de cada um, e mantém métricas simples.
+    """
+
+    def __init__(self, processos: int = PDF_PROCESSOS, fila_maxima: int = PDF_FILA_MAXIMA,
+                 timeout: float = PDF_TIMEOUT_SEGUNDOS):
+        self.processos = max(processos, 1)
+        self.fila_maxima = max(fila_maxima, self.processos)
+        self.timeout = timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pendentes = 0
+        self._metricas = {"concluidos": 0, "falhas": 0, "timeouts": 0, "rejeitados": 0, "segundos_total": 0.0}
+
+    def _obter_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: os filhos não herdam conexões nem o event loop do worker.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processos,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=carregar_templates
+            )
+        return self._pool
+
+    def _descartar_pool(self, interromper: bool = False, pool: Optional[ProcessPoolExecutor] = None):
+        # Um trabalho de um pool já substituído não derruba o pool novo.
+        if not self._pool or (pool is not None and pool is not self._pool):
+            return
+        pool, self._pool = self._pool, None
+        if interromper:
+            # O pool não cancela tarefas em execução: os processos presos são encerrados à força e os trabalhos
+            # deles terminam com BrokenProcessPool, liberando as vagas na fila.
+            for processo in list((getattr(pool, "_processes", None) or {}).values()):
+                processo.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _liberar_vaga(self, futuro: asyncio.Future):
+        self._pendentes -= 1
+        if not futuro.cancelled():
+            futuro.exception()
+
+    async def renderizar(self, template_nome: str, contexto: dict) -> bytes:
+        if self._pendentes >= self.fila_maxima:
+            self._metricas["rejeitados"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Muitos PDFs em geração. Tente novamente em instantes.",
+                headers={"Retry-After": "5"}
+            )
+
+        inicio = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        pool = self._obter_pool()
+        try:
+            futuro = loop.run_in_executor(pool, _renderizar, template_nome, contexto)
+        except BrokenProcessPool:
+            self._metricas["falhas"] += 1
+            self._descartar_pool(pool=pool)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Falha na geração do PDF")
+
+        # A vaga só é devolvida quando o processo realmente termina, não quando a requisição desiste de esperar.
+        self._pendentes += 1
+        futuro.add_done_callback(self._liberar_vaga)
+
+        try:
+            pdf = await asyncio.wait_for(asyncio.shield(futuro), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self._metricas["timeouts"] += 1
+            self._descartar_pool(interromper=True, pool=pool)
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Tempo esgotado na geração do PDF")
+        except BrokenProcessPool:
+            self._metricas["falhas"] += 1
+            self._descartar_pool(pool=pool)
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Falha na geração do PDF")
+        except Exception:
+            self._metricas["falhas"] += 1
+            raise
+
+        self._metricas["concluidos"] += 1
+        self._metricas["segundos_total"] += time.perf_counter() - inicio
+        return pdf
+
+    def metricas(self) -> dict:
+        concluidos = self._metricas["concluidos"]
+        return {
+            "processos": self.processos,
+            "fila_maxima": self.fila_maxima,
+            "pendentes": self._pendentes,
+            "concluidos": concluidos,
+            "falhas": self._metricas["falhas"],
+            "timeouts": self._metricas["timeouts"],
+            "rejeitados": self._metricas["rejeitados"],
+            "tempo_medio_segundos": round(self._metricas["segundos_total"] / concluidos, 3) if concluidos else None
+        }
+
+    def encerrar(self):
+        if self._pool:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+renderizador_pdf = RenderizadorPdf()
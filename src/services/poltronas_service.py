@@ -0,0 +1,107 @@
+from typing import Dict, List, Optional
+
+from src.services.ocupacao_service import minutos_do_horario
+
+# Quem já está sentado não troca de poltrona numa realocação.
+STATUS_POLTRONA_FIXA = ["em-infusao", "intercorrencia", "concluido"]
+
+
+def intervalo_do_agendamento(agendamento) -> Optional[dict]:
+    try:
+        inicio = minutos_do_horario(agendamento.horario_inicio)
+        fim = minutos_do_horario(agendamento.horario_fim)
+    except (ValueError, AttributeError):
+        return None
+    if fim <= inicio:
+        return None
+
+    return {
+        "id": agendamento.id,
+        "inicio": inicio,
+        "fim": fim,
+        "poltrona": agendamento.poltrona,
+        "fixo": agendamento.poltrona is not None and agendamento.status in STATUS_POLTRONA_FIXA
+    }
+
+
+def _livre(ocupacoes: List[dict], inicio: int, fim: int) -> bool:
+    return all(o["fim"] <= inicio or o["inicio"] >= fim for o in ocupacoes)
+
+
+def escolher_poltrona(
+        ocupacoes_por_poltrona: Dict[int, List[dict]],
+        intervalo: dict,
+        total_poltronas: Optional[int]
+) -> Optional[int]:
+    # Best fit: entre as poltronas livres no intervalo, a que ficaria com a menor folga antes dele.
+    melhor = None
+    for poltrona, ocupacoes in sorted(ocupacoes_por_poltrona.items()):
+        if not _livre(ocupacoes, intervalo["inicio"], intervalo["fim"]):
+            continue
+        anteriores = [o["fim"] for o in ocupacoes if o["fim"] <= intervalo["inicio"]]
+        folga = intervalo["inicio"] - max(anteriores) if anteriores else None
+        chave = (folga is None, folga or 0)
+        if melhor is None or chave < melhor[0]:
+            melhor = (chave, poltrona)
+
+    if melhor:
+        return melhor[1]
+
+    for poltrona in range(1, (total_poltronas or len(ocupacoes_por_poltrona) + 1) + 1):
+        if poltrona not in ocupacoes_por_poltrona:
+            return poltrona
+    return None
+
+
+def _ocupacoes(intervalos: List[dict]) -> Dict[int, List[dict]]:
+    ocupacoes = {}
+    for intervalo in intervalos:
+        if intervalo["poltrona"] is not None:
+            ocupacoes.setdefault(intervalo["poltrona"], []).append(intervalo)
+    return ocupacoes
+
+
+# Particionamento de intervalos: mantém os fixos e redistribui o resto por ordem de início, cada um na poltrona
+# que deixa menos tempo ocioso. Sem limite de poltronas, usa o mínimo necessário para o dia.
+def alocar_dia(intervalos: List[dict], total_poltronas: Optional[int]) -> Dict[str, Optional[int]]:
+    fixos = [dict(i) for i in intervalos if i["fixo"]]
+    ocupacoes = _ocupacoes(fixos)
+    alocacao = {i["id"]: i["poltrona"] for i in fixos}
+
+    moveis = sorted((i for i in intervalos if not i["fixo"]), key=lambda i: (i["inicio"], i["inicio"] - i["fim"]))
+    for intervalo in moveis:
+        poltrona = escolher_poltrona(ocupacoes, intervalo, total_poltronas)
+        alocacao[intervalo["id"]] = poltrona
+        if poltrona is not None:
+            ocupacoes.setdefault(poltrona, []).append({**intervalo, "poltrona": poltrona})
+    return alocacao
+
+
+# Acomoda os novos sem mexer nos demais; devolve None quando só uma realocação do dia resolve.
+def encaixar(intervalos: List[dict], novos_ids: List[str], total_poltronas: Optional[int]) -> Optional[Dict[str, Optional[int]]]:
+    pendentes = sorted((i for i in intervalos if i["id"] in novos_ids), key=lambda i: i["inicio"])
+    ocupacoes = _ocupacoes([i for i in intervalos if i["id"] not in novos_ids])
+
+    alocacao = {}
+    for intervalo in pendentes:
+        poltrona = escolher_poltrona(ocupacoes, intervalo, total_poltronas)
+        if poltrona is None:
+            return None
+        alocacao[intervalo["id"]] = poltrona
+        ocupacoes.setdefault(poltrona, []).append({**intervalo, "poltrona": poltrona})
+    return alocacao
+
+
+def minutos_ociosos(intervalos: List[dict], alocacao: Dict[str, Optional[int]]) -> int:
+    por_poltrona = {}
+    for intervalo in intervalos:
+        poltrona = alocacao.get(intervalo["id"])
+        if poltrona is not None:
+            por_poltrona.setdefault(poltrona, []).append(intervalo)
+
+    ociosos = 0
+    for ocupacoes in por_poltrona.values():
+        ocupacoes.sort(key=lambda o: o["inicio"])
+        for anterior, seguinte in zip(ocupacoes, ocupacoes[1:]):
+            ociosos += max(seguinte["inicio"] - anterior["fim"], 0)
+    return ociosos
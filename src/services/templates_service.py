@@ -0,0 +1,112 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from functools import lru_cache
+
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+TEMPLATES_CACHE_DIR = os.getenv("TEMPLATES_CACHE_DIR", os.path.join(tempfile.gettempdir(), "quimio_jinja_cache"))
+TEMPLATES_AUTO_RELOAD = os.getenv("TEMPLATES_AUTO_RELOAD", "false").lower() in ("1", "true", "sim")
+
+RE_FOLHA_ESTILO = re.compile(r'<link\b[^>]*\brel=["\']stylesheet["\'][^>]*\bhref=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
+RE_ATRIBUTO_SRC = re.compile(r'(\bsrc=)(["\'])([^"\']+)\2', re.IGNORECASE)
+RE_URL_CSS = re.compile(r'url\((["\']?)([^)"\']+)\1\)')
+
+
+def _referencia_local(referencia: str) -> bool:
+    # Só arquivos ao lado dos templates; URLs absolutas, data URIs e expressões Jinja ficam como estão.
+    return not (re.match(r'^[a-z][a-z0-9+.-]*:', referencia, re.IGNORECASE) or referencia.startswith(('/', '#', '{')))
+
+
+def _caminho_recurso(base: str, referencia: str) -> str:
+    caminho = os.path.normpath(os.path.join(base, referencia))
+    if os.path.commonpath([caminho, TEMPLATES_DIR]) != TEMPLATES_DIR or not os.path.isfile(caminho):
+        raise FileNotFoundError(f"Recurso não encontrado para os templates: {referencia}")
+    return caminho
+
+
+def _data_uri(caminho: str) -> str:
+    tipo = mimetypes.guess_type(caminho)[0] or "application/octet-stream"
+    with open(caminho, 'rb') as arquivo:
+        return f"data:{tipo};base64,{base64.b64encode(arquivo.read()).decode('ascii')}"
+
+
+def _embutir_urls_css(css: str, base: str) -> str:
+    def substituir(m):
+        referencia = m.group(2)
+        if not _referencia_local(referencia):
+            return m.group(0)
+        return f'url("{_data_uri(_caminho_recurso(base, referencia))}")'
+
+    return RE_URL_CSS.sub(substituir, css)
+
+
+def embutir_recursos(html: str, base: str = TEMPLATES_DIR) -> str:
+    def substituir_folha(m):
+        referencia = m.group(1)
+        if not _referencia_local(referencia):
+            return m.group(0)
+        caminho = _caminho_recurso(base, referencia)
+        with open(caminho, encoding='utf-8') as arquivo:
+            return f"<style>\n{_embutir_urls_css(arquivo.read(), os.path.dirname(caminho))}\n</style>"
+
+    def substituir_src(m):
+        referencia = m.group(3)
+        if not _referencia_local(referencia):
+            return m.group(0)
+        return f'{m.group(1)}{m.group(2)}{_data_uri(_caminho_recurso(base, referencia))}{m.group(2)}'
+
+    html = RE_FOLHA_ESTILO.sub(substituir_folha, html)
+    html = RE_ATRIBUTO_SRC.sub(substituir_src, html)
+    return _embutir_urls_css(html, base)
+
+
+class CarregadorTemplates(FileSystemLoader):
+    """
+    Carrega os templates já com CSS, fontes e imagens locais embutidos como data URIs,
+    para o WeasyPrint não precisar resolver nenhum arquivo ou URL durante a renderização.
+    """
+
+    def get_source(self, environment, template):
+        fonte, caminho, atualizado = super().get_source(environment, template)
+        return embutir_recursos(fonte, os.path.dirname(caminho)), caminho, atualizado
+
+
+@lru_cache(maxsize=None)
+def obter_ambiente() -> Environment:
+    os.makedirs(TEMPLATES_CACHE_DIR, exist_ok=True)
+    return Environment(
+        loader=CarregadorTemplates(TEMPLATES_DIR),
+        bytecode_cache=FileSystemBytecodeCache(TEMPLATES_CACHE_DIR),
+        auto_reload=TEMPLATES_AUTO_RELOAD
+    )
+
+
+def carregar_templates():
+    # Compila todos os templates de uma vez; com o cache de bytecode, um processo novo só lê do disco.
+    ambiente = obter_ambiente()
+    for nome in ambiente.list_templates(filter_func=lambda nome: nome.endswith('.html')):
+        ambiente.get_template(nome)
+
+
+def renderizar_html(template_nome: str, contexto: dict) -> str:
+    return obter_ambiente().get_template(template_nome).render(**contexto)
+
+
+def _versao_template(template_nome: str) -> str:
+    fonte, _, _ = obter_ambiente().loader.get_source(obter_ambiente(), template_nome)
+    return hashlib.sha1(fonte.encode('utf-8')).hexdigest()
+
+
+_versao_template_fixa = lru_cache(maxsize=None)(_versao_template)
+
+
+# Muda sempre que o template ou um recurso embutido nele muda; entra na chave dos PDFs guardados em cache.
+def versao_template(template_nome: str) -> str:
+    if TEMPLATES_AUTO_RELOAD:
+        return _versao_template(template_nome)
+    return _versao_template_fixa(template_nome)